@@ -7,14 +7,27 @@ with
 - D = number of random trials
 
 """
+import os
 import sys
 import logging
+import json
 import argparse
 import netsquid as ns
-import numpy as np
-from stabranksearcher.dicke_state_factory import get_dicke_state
-from stabranksearcher.rank_searcher import RandomWalkStabRankSearcher
+from stabranksearcher.dicke_state_factory import (
+    get_dicke_state,
+    get_recursive_dicke_basis,
+    get_stored_dicke_basis_getter,
+    save_dicke_state)
+from stabranksearcher.rank_searcher import (
+    RandomWalkStabRankSearcher,
+    GreedyPursuitStabRankSearcher,
+    OutOfCoreRandomWalkStabRankSearcher)
+from stabranksearcher.out_of_core import DEFAULT_MEMORY_BUDGET
 from stabranksearcher.quantum_state_tools import ket_to_qstate
+from stabranksearcher.result_store import ResultStore
+from stabranksearcher.canonicalization import TargetCanonicalizer
+from stabranksearcher.basis_file import save_basis
+from stabranksearcher.ket_cache import get_ket_cache
 
 
 if __name__ == "__main__":
@@ -28,9 +41,38 @@ if __name__ == "__main__":
     parser.add_argument('--beta_init', type=float, default=1)
     parser.add_argument('--beta_final', type=float, default=100)
     parser.add_argument('--number_of_betas', type=float, default=100)
+    parser.add_argument('--configuration', type=str, default=None,
+                        help='JSON file with annealing parameters, e.g. written by tune_annealing.py, overriding the options above')
+    parser.add_argument('--seed', type=int, default=None)
     parser.add_argument('--loglevel', type=str, default=None)
-    parser.add_argument('--outputfile', type=str, default=None)
+    parser.add_argument('--outputfile', type=str, default=None,
+                        help='file to which a found basis is written, readable with stabranksearcher.basis_file.load_basis')
+    parser.add_argument('--store', type=str, default=None,
+                        help='SQLite file in which results are stored; solved queries are not searched again')
+    parser.add_argument('--canonicalize', type=str, default=None, choices=TargetCanonicalizer.LOCAL_GATES,
+                        help='share stored results between targets equal up to qubit permutations and these local gates (requires --store)')
+    parser.add_argument('--warm_start', action='store_true',
+                        help='start from the stored basis for the nearest stabilizer rank (requires --store)')
+    parser.add_argument('--time_limit', type=float, default=None,
+                        help='maximal wall-clock time of the search in seconds')
+    parser.add_argument('--complex_arithmetic', action='store_true',
+                        help='walk over all stabilizer states rather than only the real ones (used by default, since Dicke states are real)')
+    parser.add_argument('--pool_size', type=int, default=0,
+                        help='if positive, start the walk from a basis chosen greedily from a pool of this many random stabilizer states')
+    parser.add_argument('--recursive_warm_start', action='store_true',
+                        help='start the walk from a basis spanning the target, built from the stored solutions for fewer qubits (if --store is given)')
+    parser.add_argument('--out_of_core', type=str, default=None, metavar='DIRECTORY',
+                        help='keep the target and the bases in memory-mapped files in this directory (preferably on a local disk), for numbers of qubits at which they do not fit in memory; ignores --store, --pool_size and --outputfile')
+    parser.add_argument('--memory_budget', type=int, default=DEFAULT_MEMORY_BUDGET,
+                        help='bytes of the chunks of the kets that are in memory at a time with --out_of_core')
     args = parser.parse_args()
+    if args.configuration is not None:
+        with open(args.configuration) as configuration_file:
+            configuration = json.load(configuration_file)
+        args.beta_init = configuration["beta_init"]
+        args.beta_final = configuration["beta_final"]
+        args.number_of_betas = configuration["number_of_betas"]
+        args.number_of_attempts = configuration["number_of_bases"]
 
     if args.loglevel == "INFO":
         loglevel = logging.INFO
@@ -43,21 +85,64 @@ if __name__ == "__main__":
     logging.info("Attempting to find stabilizer rank of Dick state.")
     logging.info("Parameters:\n\t- number of qubits: {}\n\t- Hamming weight: {}\n\t- Stabilizer rank to search for: {}\n\t- beta_init: {}\n\t- beta_final: {}\n\t- number_of_betas: {}".format(args.number_of_qubits, args.hamming_weight, args.stabrank, args.beta_init, args.beta_final, args.number_of_betas))
 
-    dicke_ket = get_dicke_state(number_of_qubits=args.number_of_qubits,
-                                hamming_weight=args.hamming_weight)
-    qstate = ket_to_qstate(dicke_ket)
-    searcher = RandomWalkStabRankSearcher(beta_init=args.beta_init, beta_final=args.beta_final, number_of_betas=args.number_of_betas)
-    basis = searcher.run(target_qstate=qstate, stabrank=args.stabrank,
-                         number_of_bases=args.number_of_attempts)
+    if args.out_of_core is not None:
+        dicke_ket = save_dicke_state(path=os.path.join(args.out_of_core, "dicke-{}-{}.npy".format(args.number_of_qubits,
+                                                                                             args.hamming_weight)),
+                                     number_of_qubits=args.number_of_qubits,
+                                     hamming_weight=args.hamming_weight)
+        result_store = None
+        searcher = OutOfCoreRandomWalkStabRankSearcher(beta_init=args.beta_init, beta_final=args.beta_final,
+                                                       number_of_betas=args.number_of_betas, rng=args.seed,
+                                                       time_limit=args.time_limit, directory=args.out_of_core,
+                                                       memory_budget=args.memory_budget,
+                                                       real=False if args.complex_arithmetic else None)
+        result = searcher.run(target_ket=dicke_ket, stabrank=args.stabrank, number_of_bases=args.number_of_attempts)
+    else:
+        dicke_ket = get_dicke_state(number_of_qubits=args.number_of_qubits,
+                                    hamming_weight=args.hamming_weight)
+        qstate = ket_to_qstate(dicke_ket)
+        canonicalizer = None if args.canonicalize is None else TargetCanonicalizer(local_gates=args.canonicalize)
+        result_store = None if args.store is None else ResultStore(args.store, canonicalizer=canonicalizer)
+        searcher = RandomWalkStabRankSearcher(beta_init=args.beta_init, beta_final=args.beta_final, number_of_betas=args.number_of_betas, rng=args.seed,
+                                              result_store=result_store, warm_start=args.warm_start, time_limit=args.time_limit,
+                                              real=False if args.complex_arithmetic else None)
+        initial_basis = None
+        if args.pool_size > 0:
+            greedy_searcher = GreedyPursuitStabRankSearcher(pool_size=args.pool_size, rng=args.seed)
+            greedy_result = greedy_searcher.run(target_qstate=qstate, stabrank=args.stabrank)
+            initial_basis = greedy_result.basis
+            logging.info("Score of greedy initial basis: {}".format(greedy_result.score))
+        elif args.recursive_warm_start:
+            get_known_basis = None if result_store is None else get_stored_dicke_basis_getter(result_store)
+            initial_basis = get_recursive_dicke_basis(number_of_qubits=args.number_of_qubits,
+                                                      hamming_weight=args.hamming_weight,
+                                                      get_known_basis=get_known_basis)
+            logging.info("Size of recursive initial basis: {}".format(initial_basis.size))
+        result = searcher.run(target_qstate=qstate, stabrank=args.stabrank,
+                              number_of_bases=args.number_of_attempts, initial_basis=initial_basis)
+    basis = result.found_basis
+    logging.info("Search stopped: {}, best score {}".format(result.stop_reason, result.score))
     logging.info("Found basis:{}".format(basis))
     if basis is not None:
         logging.info("Found rank: {}".format(basis.size))
 
-        should_write_to_file = (args.outputfile is not None)
+        should_write_to_file = (args.outputfile is not None and args.out_of_core is None)
         if should_write_to_file:
-            data = np.array([qstate.ket.flatten() for qstate in basis.qstates])
-            np.savetxt(args.outputfile, data)
+            metadata = {"number_of_qubits": args.number_of_qubits,
+                        "hamming_weight": args.hamming_weight,
+                        "stabrank": args.stabrank,
+                        "searcher": type(searcher).__name__,
+                        "parameters": {"beta_init": args.beta_init,
+                                       "beta_final": args.beta_final,
+                                       "number_of_betas": args.number_of_betas,
+                                       "number_of_attempts": args.number_of_attempts,
+                                       "seed": args.seed},
+                        "result": result.to_dict()}
+            save_basis(args.outputfile, basis=basis, target_ket=dicke_ket, metadata=metadata)
     logging.info("Number of attempts: {}".format(searcher.counter))
+    logging.info("Ket cache: {}".format(get_ket_cache().get_statistics()))
+    if result_store is not None:
+        result_store.close()
 
     output = 0 if basis is None else basis.size
     print("{},{},{},{},{}".format(args.number_of_qubits,
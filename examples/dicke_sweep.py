@@ -0,0 +1,97 @@
+"""Usage:
+python3 dicke_sweep.py populate --queue DIR --number_of_qubits 4 5 6 --stabrank 2 3 --beta_schedule 1 100 100
+python3 dicke_sweep.py work --queue DIR
+python3 dicke_sweep.py collect --queue DIR
+
+Runs a sweep over Dicke states with the random-walk searcher, using a work
+queue in the shared directory DIR. Start `work` on as many hosts and cores
+as available; workers claim grid points until none are left, and tasks of
+crashed workers are picked up again after the heartbeat timeout. `collect`
+prints one line per grid point, in the same format as
+`dicke_state_analyzer.py`.
+
+With `--store FILE`, all tasks record their results in the result store
+FILE. Since SQLite file locking is unreliable on network filesystems, FILE
+should be node-local; `{hostname}` in FILE is replaced by the host name of
+each worker, e.g. `--store /tmp/results-{hostname}.sqlite`, so that every
+node keeps a store of its own. With `--recursive_warm_start`, every task
+starts from a basis built from the solutions for fewer qubits in the
+results of the queue (found on any host) and in the store, instead of a
+random one, and with `--rank_descent` it searches for ever smaller bases
+from there down to its stabilizer rank. Sweeping over the numbers of
+qubits in increasing order (one `populate` and `work` round per number of
+qubits) lets every round build on the solutions of the previous ones.
+"""
+import argparse
+from stabranksearcher.work_queue import WorkQueue, run_worker, populate_dicke_sweep
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Sweep over Dicke states using a shared-directory work queue.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    populate_parser = subparsers.add_parser('populate')
+    populate_parser.add_argument('--queue', type=str, required=True)
+    populate_parser.add_argument('--number_of_qubits', type=int, nargs='+', required=True)
+    populate_parser.add_argument('--hamming_weight', type=int, nargs='+', default=None)
+    populate_parser.add_argument('--stabrank', type=int, nargs='+', required=True)
+    populate_parser.add_argument('--beta_schedule', type=float, nargs=3, action='append', required=True,
+                                 metavar=('BETA_INIT', 'BETA_FINAL', 'NUMBER_OF_BETAS'))
+    populate_parser.add_argument('--number_of_attempts', type=int, default=1000)
+    populate_parser.add_argument('--seed', type=int, default=None)
+    populate_parser.add_argument('--time_limit', type=float, default=None,
+                                 help='maximal wall-clock time in seconds per task')
+    populate_parser.add_argument('--number_of_walkers', type=int, default=None,
+                                 help='if given, every task runs this many walks in lockstep')
+    populate_parser.add_argument('--store', type=str, default=None,
+                                 help='node-local result store (sqlite file), {hostname} is replaced per host')
+    populate_parser.add_argument('--recursive_warm_start', action='store_true',
+                                 help='start from a basis built from the stored solutions for fewer qubits')
+    populate_parser.add_argument('--rank_descent', action='store_true',
+                                 help='search for ever smaller bases from that basis down to the stabilizer rank')
+
+    work_parser = subparsers.add_parser('work')
+    work_parser.add_argument('--queue', type=str, required=True)
+    work_parser.add_argument('--heartbeat_timeout', type=float, default=300.)
+
+    collect_parser = subparsers.add_parser('collect')
+    collect_parser.add_argument('--queue', type=str, required=True)
+
+    args = parser.parse_args()
+
+    if args.command == 'populate':
+        work_queue = WorkQueue(directory=args.queue)
+        beta_schedules = [(beta_init, beta_final, int(number_of_betas))
+                          for beta_init, beta_final, number_of_betas in args.beta_schedule]
+        task_ids = populate_dicke_sweep(work_queue=work_queue,
+                                        numbers_of_qubits=args.number_of_qubits,
+                                        hamming_weights=args.hamming_weight,
+                                        stabranks=args.stabrank,
+                                        beta_schedules=beta_schedules,
+                                        number_of_bases=args.number_of_attempts,
+                                        seed=args.seed,
+                                        time_limit=args.time_limit,
+                                        number_of_walkers=args.number_of_walkers,
+                                        result_store=args.store,
+                                        recursive_warm_start=args.recursive_warm_start,
+                                        rank_descent=args.rank_descent)
+        print("Queued {} tasks".format(len(task_ids)))
+    elif args.command == 'work':
+        number_of_tasks_run = run_worker(directory=args.queue, heartbeat_timeout=args.heartbeat_timeout)
+        print("Ran {} tasks".format(number_of_tasks_run))
+    else:
+        work_queue = WorkQueue(directory=args.queue)
+        results = work_queue.get_results()
+        for task_id, result in results.items():
+            task = result["task"]
+            output = result["size"] if result.get("success") else 0
+            print("{},{},{},{},{}".format(task["number_of_qubits"],
+                                          task["hamming_weight"],
+                                          task["stabrank"],
+                                          task["number_of_bases"],
+                                          output))
+        if not work_queue.is_finished():
+            print("# {} tasks pending, {} claimed".format(work_queue.number_pending,
+                                                          work_queue.number_claimed))
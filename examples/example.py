@@ -13,10 +13,10 @@ if __name__ == "__main__":
             ket, stabrank))
     qstate = ket_to_qstate(ket)
     searcher = NRandomStabRankSearcher()
-    basis = searcher.run(target_qstate=qstate, stabrank=stabrank, number_of_bases=100)
-    print("Found basis:", basis)
-    if basis is not None:
-        print("Found rank:", basis.size)
+    result = searcher.run(target_qstate=qstate, stabrank=stabrank, number_of_bases=100)
+    print("Found basis:", result.found_basis)
+    if result.success:
+        print("Found rank:", result.basis.size)
     print("Number of attempts:", searcher.counter)
 
     # Trying a non-stabilizer state with...
@@ -26,19 +26,20 @@ if __name__ == "__main__":
     ket = ket / np.linalg.norm(ket)
     qstate = ket_to_qstate(ket)
     searcher = NRandomStabRankSearcher()
-    basis = searcher.run(target_qstate=qstate, stabrank=stabrank, number_of_bases=100)
+    result = searcher.run(target_qstate=qstate, stabrank=stabrank, number_of_bases=100)
     print("\n\nNow investigating {} with stabilizer rank {}".format(
             ket, stabrank))
-    print("Found basis:", basis)
+    print("Found basis:", result.found_basis)
+    print("Best score:", result.score)
     print("Number of attempts:", searcher.counter)
 
     # ...and with stabilizer rank 2
     searcher.reset()
     stabrank = 2
-    basis = searcher.run(target_qstate=qstate, stabrank=2, number_of_bases=1000)
+    result = searcher.run(target_qstate=qstate, stabrank=2, number_of_bases=1000)
     print("\n\nNow investigating {} with stabilizer rank {}".format(
             ket, stabrank))
-    print("Found basis:", basis)
-    if basis is not None:
-        print("Found rank:", basis.size)
+    print("Found basis:", result.found_basis)
+    if result.success:
+        print("Found rank:", result.basis.size)
     print("Number of attempts:", searcher.counter)
@@ -0,0 +1,58 @@
+"""Usage:
+python3 search_service.py --socket /tmp/stabranksearcher.sock --workers 4
+
+Starts a local service that runs stabilizer-rank searches on a pool of
+warm worker processes. Jobs can then be submitted from Python with
+
+    import asyncio
+    from stabranksearcher.search_service import SearchServiceClient
+
+    async def main():
+        client = SearchServiceClient("/tmp/stabranksearcher.sock")
+        job_id = await client.submit({
+            "dicke": {"number_of_qubits": 4, "hamming_weight": 2},
+            "searcher": "random_walk",
+            "stabrank": 3,
+            "number_of_bases": 1000,
+            "parameters": {"beta_init": 1, "beta_final": 100, "number_of_betas": 100}})
+        async for event in client.stream(job_id):
+            print(event)
+
+    asyncio.run(main())
+"""
+import asyncio
+import logging
+import argparse
+from stabranksearcher.search_service import SearchService
+from stabranksearcher.shared_arrays import BACKENDS
+
+
+async def main(socket_path, max_workers, target_backend, shared_directory):
+    async with SearchService(socket_path=socket_path, max_workers=max_workers, target_backend=target_backend,
+                             shared_directory=shared_directory) as service:
+        logging.info("Listening on {}".format(socket_path))
+        await service.serve_forever()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Serve stabilizer-rank searches on a local Unix socket.')
+    parser.add_argument('--socket', type=str, default='/tmp/stabranksearcher.sock')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--target_backend', type=str, choices=BACKENDS + ('pickle',), default='shared_memory',
+                        help='how target kets are passed to the workers')
+    parser.add_argument('--shared_directory', type=str, default=None,
+                        help='directory of the memory-mapped targets of the memmap backend')
+    parser.add_argument('--loglevel', type=str, default=None)
+    args = parser.parse_args()
+
+    if args.loglevel == "INFO":
+        logging.basicConfig(level=logging.INFO)
+
+    try:
+        asyncio.run(main(socket_path=args.socket, max_workers=args.workers,
+                         target_backend=None if args.target_backend == 'pickle' else args.target_backend,
+                         shared_directory=args.shared_directory))
+    except KeyboardInterrupt:
+        pass
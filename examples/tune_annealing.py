@@ -0,0 +1,59 @@
+"""Usage:
+python3 tune_annealing.py --number_of_qubits 5 --hamming_weight 2 --stabrank 3 --beta_init 1 10 --beta_final 50 100 --number_of_betas 10 100 --number_of_attempts 100 1000 --outputfile best.json
+
+Chooses the annealing parameters of the random-walk searcher for a Dicke
+state from short pilot searches over the grid of the given values, either
+with the same number of runs per configuration (`--method grid`) or with
+successive halving (`--method halving`). With `--proxy_number_of_qubits`,
+the pilots search the Dicke state of the same Hamming weight on fewer
+qubits instead. Prints the ranking of the configurations and writes the
+best one as JSON, which `dicke_state_analyzer.py --configuration` reads.
+"""
+import json
+import argparse
+from stabranksearcher.dicke_state_factory import get_dicke_state
+from stabranksearcher.quantum_state_tools import ket_to_qstate
+from stabranksearcher.tuning import AnnealingTuner, get_annealing_grid
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Tune the annealing parameters of the random-walk searcher with pilot runs.')
+    parser.add_argument('--number_of_qubits', type=int, required=True)
+    parser.add_argument('--hamming_weight', type=int, required=True)
+    parser.add_argument('--stabrank', type=int, required=True)
+    parser.add_argument('--proxy_number_of_qubits', type=int, default=None,
+                        help='run the pilots on the Dicke state on this many qubits instead')
+    parser.add_argument('--beta_init', type=float, nargs='+', default=[1.])
+    parser.add_argument('--beta_final', type=float, nargs='+', default=[100.])
+    parser.add_argument('--number_of_betas', type=int, nargs='+', default=[100])
+    parser.add_argument('--number_of_attempts', type=int, nargs='+', default=[1000])
+    parser.add_argument('--method', type=str, choices=['grid', 'halving'], default='halving')
+    parser.add_argument('--number_of_runs', type=int, default=2,
+                        help='pilot runs per configuration (in the first round, for successive halving)')
+    parser.add_argument('--time_limit', type=float, default=None,
+                        help='maximal wall-clock time in seconds per pilot run')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--outputfile', type=str, default=None)
+    args = parser.parse_args()
+
+    number_of_qubits = args.number_of_qubits if args.proxy_number_of_qubits is None else args.proxy_number_of_qubits
+    target_qstate = ket_to_qstate(get_dicke_state(number_of_qubits=number_of_qubits,
+                                                  hamming_weight=args.hamming_weight))
+    configurations = get_annealing_grid(beta_inits=args.beta_init,
+                                        beta_finals=args.beta_final,
+                                        numbers_of_betas=args.number_of_betas,
+                                        numbers_of_bases=args.number_of_attempts)
+    tuner = AnnealingTuner(configurations=configurations, seed=args.seed, time_limit=args.time_limit)
+    if args.method == 'grid':
+        ranking = tuner.run_grid(target_qstate=target_qstate, stabrank=args.stabrank,
+                                 number_of_runs=args.number_of_runs)
+    else:
+        ranking = tuner.run_successive_halving(target_qstate=target_qstate, stabrank=args.stabrank,
+                                               number_of_runs=args.number_of_runs)
+    for statistics in ranking:
+        print(json.dumps(statistics.to_dict(), sort_keys=True))
+    if args.outputfile is not None:
+        with open(args.outputfile, "w") as outputfile:
+            json.dump(ranking[0].configuration, outputfile, indent=4, sort_keys=True)
@@ -1,62 +1,232 @@
+import copy
 import numpy as np
 
 import scipy
-from netsquid.qubits.stabtools import StabRepr
 import qiskit
-import netsquid as ns
-import netsquid.qubits.qubitapi as qapi
 from stabranksearcher.quantum_state_tools import (
     ket_to_qstate,
-    get_number_of_qubits_from_ket)
+    get_number_of_qubits_from_ket,
+    get_pauli_masks,
+    get_random_pauli_masks,
+    get_real_kets,
+    apply_paulis,
+    get_stabilizer_tableau,
+    stabilizer_tableau_to_qstate,
+    qstate_to_stabilizer_tableau)
+from stabranksearcher.ket_cache import get_qstate_ket
+from stabranksearcher.rng import get_rng
 
 
 class Basis:
-    """ is a list of QStates
+    """A list of stabilizer states, stored as the columns of a single
+    preallocated, column-contiguous ket matrix of size
+    `2^{number_of_qubits}` x `size`. QStates are only created when
+    :attr:`qstates` is accessed.
+
+    Copies made with :meth:`clone` share the ket matrix with the original
+    until one of them is modified, at which point the modified basis
+    copies the matrix (copy-on-write).
+
+    Next to its ket, the stabilizer tableau of each state is tracked
+    once it is known, so that the moves of :meth:`deterministically_modify`
+    are applied to the tableau as well, and states that would become zero
+    are detected before any ket is computed.
+
+    Parameters
+    ----------
+    qstates: list of QStates or None
+    kets: numpy array or None
+        Matrix whose columns are the kets of the basis. Exactly one of
+        `qstates` and `kets` should be given.
+    tableaux: list of :obj:`~stabranksearcher.tableau.StabilizerTableau` or None
+        Tableaux of the kets, or None for those that are unknown. Those of
+        qstates in the stabilizer representation are read off the qstates.
+    real: bool
+        Whether the states are real (up to a global phase, which is
+        dropped), in which case the kets are stored as float64 and the
+        moves are restricted to real Paulis, so that the states stay real.
+        All scoring is then done in real arithmetic, which takes half the
+        memory and about a quarter of the multiplications.
     """
 
+    # minimal norm of the part of a (normalized) ket orthogonal to the
+    # span of other kets, for it to count as linearly independent of them
+    _INDEPENDENCE_TOLERANCE = 1e-10
+
     class _Modification:
 
-        def __init__(self, index, qstate):
+        def __init__(self, index, ket, qstate, tableau):
             self.index = index
+            self.ket = ket
             self.qstate = qstate
-
-    def __init__(self, qstates):
-        self._qstates = qstates
-        if len(list(set(qstate.num_qubits for qstate in qstates))) != 1:
-            raise ValueError("QStates are not all on the same number of qubits")
+            self.tableau = tableau
+
+    # entry of the list of tableaux for a state that is known not to be a
+    # stabilizer state (unknown tableaux are None)
+    _NO_TABLEAU = False
+
+    def __init__(self, qstates=None, kets=None, tableaux=None, real=False):
+        if (qstates is None) == (kets is None):
+            raise ValueError("Exactly one of qstates and kets should be given")
+        self._real = real
+        if qstates is not None:
+            if len(list(set(qstate.num_qubits for qstate in qstates))) != 1:
+                raise ValueError("QStates are not all on the same number of qubits")
+            self._kets = Basis._allocate_kets(
+                number_of_qubits=qstates[0].num_qubits,
+                number_of_kets=len(qstates))
+            qstate_tableaux = [qstate_to_stabilizer_tableau(qstate) for qstate in qstates]
+            for index, (qstate, tableau) in enumerate(zip(qstates, qstate_tableaux)):
+                self._kets[:, index] = get_qstate_ket(qstate=qstate, tableau=tableau)
+            self._qstates = list(qstates)
+            if real:
+                self._kets = np.asfortranarray(Basis._to_real_kets(kets=self._kets))
+        else:
+            kets = np.asarray(kets)
+            if kets.ndim != 2 or kets.shape[1] == 0:
+                raise ValueError("kets should be a matrix with at least one column")
+            if real:
+                self._kets = np.array(Basis._to_real_kets(kets=kets), dtype=np.float64, order='F')
+            else:
+                self._kets = np.array(kets, dtype=np.complex128, order='F')
+            self._qstates = [None] * self._kets.shape[1]
+        if tableaux is not None:
+            if len(tableaux) != self.size:
+                raise ValueError("Need a single tableau per state")
+            self._tableaux = list(tableaux)
+        elif qstates is not None:
+            self._tableaux = qstate_tableaux
+        else:
+            self._tableaux = [None] * self.size
+        self._kets_are_shared = False
         self._last_modification = None
 
+    @staticmethod
+    def _allocate_kets(number_of_qubits, number_of_kets, dtype=np.complex128):
+        return np.zeros((2 ** number_of_qubits, number_of_kets),
+                        dtype=dtype,
+                        order='F')
+
+    @staticmethod
+    def _to_real_kets(kets):
+        real_kets = get_real_kets(kets=kets)
+        if real_kets is None:
+            raise ValueError("Not all states are real up to a global phase")
+        return real_kets
+
+    @property
+    def is_real(self):
+        """Whether this basis is restricted to real states, see the
+        parameter `real`."""
+        return self._real
+
+    def to_real(self):
+        """This basis with real kets, see the parameter `real`.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.basis.Basis`
+
+        Raises
+        ------
+        ValueError
+            If some state is not real up to a global phase.
+        """
+        return Basis(kets=self._kets, tableaux=self._tableaux, real=True)
+
+    def _writable_kets(self):
+        if self._kets_are_shared:
+            self._kets = self._kets.copy(order='F')
+            self._kets_are_shared = False
+        return self._kets
+
+    def clone(self):
+        """Copy of this basis (of the same class) that shares the ket
+        matrix with this basis until either of them is modified.
+        Runs in O(size), independent of the number of qubits.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.basis.Basis`
+        """
+        self._kets_are_shared = True
+        clone = copy.copy(self)
+        clone._qstates = [None] * self.size
+        clone._tableaux = list(self._tableaux)
+        clone._last_modification = None
+        return clone
+
+    def snapshot(self):
+        """Clone of this basis for recording its current state, e.g.
+        the best basis found so far during a random walk.
+        See :meth:`clone`.
+        """
+        return self.clone()
+
     @property
     def qstates(self):
+        """The states as QStates, in the stabilizer representation for
+        those whose tableau is known."""
+        for index, qstate in enumerate(self._qstates):
+            if qstate is None:
+                if self._tableaux[index]:
+                    self._qstates[index] = stabilizer_tableau_to_qstate(self._tableaux[index])
+                else:
+                    self._qstates[index] = ket_to_qstate(self._kets[:, [index]].astype(np.complex128))
         return self._qstates
 
+    @property
+    def tableaux(self):
+        """The known stabilizer tableaux of the states (None for unknown
+        ones), without computing any.
+
+        Returns
+        -------
+        list of :obj:`~stabranksearcher.tableau.StabilizerTableau` or None
+        """
+        return [tableau if tableau else None for tableau in self._tableaux]
+
+    def get_tableau(self, qstate_index):
+        """Stabilizer tableau of the state at `qstate_index`, computed from
+        its ket (once) if it is not known.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.tableau.StabilizerTableau` or None
+            None if the state is not a stabilizer state.
+        """
+        if self._tableaux[qstate_index] is None:
+            tableau = get_stabilizer_tableau(ket=self._kets[:, qstate_index])
+            self._tableaux[qstate_index] = Basis._NO_TABLEAU if tableau is None else tableau
+        return self._tableaux[qstate_index] or None
+
+    @property
+    def kets(self):
+        """Read-only view on the ket matrix, whose columns are the
+        states in this basis.
+
+        Returns
+        -------
+        numpy array
+        """
+        kets = self._kets.view()
+        kets.flags.writeable = False
+        return kets
+
     def to_projector(self):
         """
         Returns
         -------
         numpy array
         """
-        kets = [qstate.ket for qstate in self.qstates]
-        number_of_qubits = get_number_of_qubits_from_ket(ket=kets[0])
-        number_of_kets = self.size
-        return Basis._kets_to_projector(kets=kets,
-                                        number_of_qubits=number_of_qubits,
-                                        number_of_kets=number_of_kets)
+        return Basis._kets_to_projector(kets=self._kets)
 
     @staticmethod
-    def _kets_to_projector(kets, number_of_kets, number_of_qubits):
-
-        # build a matrix of size `2^{number_of_qubits}` x `size`
-        matrix = np.zeros((2 ** number_of_qubits, number_of_kets), dtype=np.complex_)
-
-        ket_index = 0
-        while ket_index < number_of_kets:
-            matrix[:, ket_index] = kets[ket_index].flatten()
-            ket_index += 1
+    def _kets_to_projector(kets):
 
         # The QR decomposition only works for linearly independent columns;
         # so we must first turn it into a linearly independent set
-        matrix = scipy.linalg.orth(matrix)
+        matrix = scipy.linalg.orth(kets)
 
         # compute the QR decomposition
         # TODO probably not needed any more since we have the orthonormal
@@ -68,16 +238,26 @@ class Basis:
         projector = np.matmul(q, qconj.T)
         return projector
 
+    def _orthonormal_kets(self):
+        """Orthonormal basis of the span of the kets, computed directly
+        from the ket matrix.
+
+        Returns
+        -------
+        numpy array
+        """
+        return scipy.linalg.orth(self._kets)
+
     @property
     def size(self):
-        return len(self._qstates)
+        return self._kets.shape[1]
 
     @property
     def len(self):
         return self.size
 
     def __str__(self):
-        return str([qstate.ket for qstate in self._qstates])
+        return str([self._kets[:, [index]] for index in range(self.size)])
 
     def does_qstate_live_in_subspace(self, qstate):
         """
@@ -100,25 +280,133 @@ class Basis:
         return np.isclose(self.score(qstate=qstate), 1)
 
     def score(self, qstate):
-        projector = self.to_projector()
-        output_ket = projector.dot(qstate.ket)
-        norm = np.linalg.norm(output_ket)
-        return norm
+        return self.score_ket(ket=qstate.ket)
+
+    def score_ket(self, ket):
+        """Norm of the projection of `ket` onto the span of this basis.
+
+        Parameters
+        ----------
+        ket: numpy array
+
+        Returns
+        -------
+        float
+
+        Notes
+        -----
+        Equals ||P|phi>|| with P the projector onto the basis, but never
+        builds P: the norm is that of Q^dagger |phi>, where the columns of
+        Q form an orthonormal basis of the span.
+        """
+        q = self._orthonormal_kets()
+        return np.linalg.norm(q.conj().T.dot(np.ravel(ket)))
+
+    def score_kets(self, kets):
+        """Scores of several kets at once, see :meth:`score_ket`.
+
+        Parameters
+        ----------
+        kets: numpy array
+            Matrix with the kets as columns.
+
+        Returns
+        -------
+        numpy array of float
+        """
+        q = self._orthonormal_kets()
+        return np.linalg.norm(q.conj().T.dot(kets), axis=0)
+
+    def without_qstate(self, qstate_index):
+        """New basis with the state at `qstate_index` left out.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.basis.Basis`
+        """
+        return Basis(kets=np.delete(self._kets, qstate_index, axis=1),
+                     tableaux=self._tableaux[:qstate_index] + self._tableaux[qstate_index + 1:],
+                     real=self._real)
+
+    def get_weakest_qstate_index(self, ket):
+        """Index of the state whose removal from this basis reduces the
+        score of `ket` the least.
+
+        Parameters
+        ----------
+        ket: numpy array
+
+        Returns
+        -------
+        int
+        """
+        if self.size == 1:
+            return 0
+        scores = [self.without_qstate(qstate_index=index).score_ket(ket=ket)
+                  for index in range(self.size)]
+        return int(np.argmax(scores))
+
+    def without_weakest_qstates(self, ket, size):
+        """New basis of `size` states, left after removing the weakest
+        state (see :meth:`get_weakest_qstate_index`) one at a time.
+
+        Parameters
+        ----------
+        ket: numpy array
+        size: int
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.basis.Basis`
+            This basis itself if it has at most `size` states.
+        """
+        basis = self
+        while basis.size > size:
+            basis = basis.without_qstate(qstate_index=basis.get_weakest_qstate_index(ket=ket))
+        return basis
 
     @property
     def number_of_qubits(self):
-        return self._qstates[0].num_qubits
+        return get_number_of_qubits_from_ket(ket=self._kets[:, 0])
 
     def undo_last_modification(self):
         if self._last_modification is None:
             raise Exception
         else:
             index = self._last_modification.index
-            qstate = self._last_modification.qstate
-            self._qstates[index] = qstate
+            self._writable_kets()[:, index] = self._last_modification.ket
+            self._qstates[index] = self._last_modification.qstate
+            self._tableaux[index] = self._last_modification.tableau
             self._last_modification = None
 
-    def randomly_modify(self):
+    def replace_qstate(self, qstate_index, qstate):
+        """Replace the state at `qstate_index` by `qstate`.
+        The replacement can be undone with :meth:`undo_last_modification`.
+        """
+        tableau = qstate_to_stabilizer_tableau(qstate)
+        self.replace_ket(qstate_index=qstate_index, ket=get_qstate_ket(qstate=qstate, tableau=tableau),
+                         tableau=tableau)
+        self._qstates[qstate_index] = qstate
+
+    def replace_ket(self, qstate_index, ket, tableau=None):
+        """Replace the state at `qstate_index` by the normalized `ket`,
+        whose tableau is `tableau` (None if unknown). The replacement can
+        be undone with :meth:`undo_last_modification`."""
+        if self._real:
+            ket = Basis._to_real_kets(kets=np.ravel(ket))
+        self._replace_ket(qstate_index=qstate_index, ket=ket, tableau=tableau)
+
+    def _replace_ket(self, qstate_index, ket, tableau=None):
+        self._last_modification = \
+            Basis._Modification(index=qstate_index,
+                                ket=self._kets[:, qstate_index].copy(),
+                                qstate=self._qstates[qstate_index],
+                                tableau=self._tableaux[qstate_index])
+        self._writable_kets()[:, qstate_index] = np.ravel(ket)
+        self._qstates[qstate_index] = None
+        self._tableaux[qstate_index] = tableau
+
+    def randomly_modify(self, rng=None):
         r"""Randomly choose a stabilizer state :math:`\ket{\phi}` in this basis
         and replace it by
         :math:`\ket{\phi'} := c(I + P)\ket{\phi}`, where :math:`I` is the
@@ -127,14 +415,26 @@ class Basis:
         :math:`\ket{\phi}`, and :math:`c` is the normalization constant.
         (This modification is restarted until :math:`\ket{\phi'}` is not
         the all-zero vector.)
+
+        Parameters
+        ----------
+        rng: :obj:`numpy.random.Generator`, int or None
+            Source of randomness, see :func:`~stabranksearcher.rng.get_rng`.
         """
+        rng = get_rng(rng)
         accepted = False
 
+        while self._real and not accepted:
+            x_masks, z_masks, phases = get_random_pauli_masks(number_of_qubits=self.number_of_qubits, size=1,
+                                                              rng=rng, real=True)
+            accepted = self._modify(qstate_index=rng.integers(low=0, high=self.size),
+                                    x_mask=x_masks[0], z_mask=z_masks[0], phase=phases[0])
         while not accepted:
-            random_index = np.random.randint(low=0, high=self.size)
+            random_index = rng.integers(low=0, high=self.size)
             random_pauli = qiskit.quantum_info.random_pauli(
                 num_qubits=self.number_of_qubits,
-                group_phase=True)
+                group_phase=True,
+                seed=rng)
             accepted = self.deterministically_modify(
                 qstate_index=random_index,
                 pauli=random_pauli)
@@ -157,43 +457,141 @@ class Basis:
         -------
         bool
             Whether the replacement was performed.
+
+        Raises
+        ------
+        ValueError
+            If this basis is real and `pauli` is not, see the parameter
+            `real`.
         """
-        ket = self._qstates[qstate_index].ket
-        outcome = Basis._deterministically_modify(ket=ket,
-                                                  pauli_matrix=pauli.to_matrix())
-        if outcome is None:
+        x_mask, z_mask, phase = get_pauli_masks(pauli)
+        return self._modify(qstate_index=qstate_index, x_mask=x_mask, z_mask=z_mask, phase=phase)
+
+    def _modify(self, qstate_index, x_mask, z_mask, phase):
+        candidate_kets, is_nonzero, candidate_tableaux = self.get_candidates(qstate_indices=[qstate_index],
+                                                                             x_masks=[x_mask],
+                                                                             z_masks=[z_mask],
+                                                                             phases=[phase])
+        if not is_nonzero[0]:
             return False
         else:
-            new_qstate = ket_to_qstate(outcome)
-            self._last_modification = Basis._Modification(index=qstate_index,
-                                                          qstate=self._qstates[qstate_index])
-            self._qstates[qstate_index] = new_qstate
+            self._replace_ket(qstate_index=qstate_index, ket=candidate_kets[:, 0], tableau=candidate_tableaux[0])
             return True
 
-    @staticmethod
-    def _deterministically_modify(ket, pauli_matrix):
+    def get_candidate_kets(self, qstate_indices, x_masks, z_masks, phases):
+        r"""The states :math:`c(I + P)\ket{\phi}` for several choices of
+        state :math:`\ket{\phi}` in this basis and Pauli :math:`P` at once,
+        without modifying this basis.
+
+        Parameters
+        ----------
+        qstate_indices: numpy array of int
+            Index of the state :math:`\ket{\phi}` in this basis, per candidate.
+        x_masks: numpy array of int
+        z_masks: numpy array of int
+        phases: numpy array of int
+            The Paulis, see :func:`~stabranksearcher.quantum_state_tools.get_pauli_masks`.
+
+        Returns
+        -------
+        tuple (numpy array, numpy array of bool)
+            Matrix with the normalized candidates as columns, and whether
+            each candidate is nonzero (zero candidates are left unnormalized).
         """
+        candidate_kets, is_nonzero, _ = self.get_candidates(qstate_indices=qstate_indices,
+                                                            x_masks=x_masks,
+                                                            z_masks=z_masks,
+                                                            phases=phases)
+        return candidate_kets, is_nonzero
+
+    def get_candidates(self, qstate_indices, x_masks, z_masks, phases):
+        """As :meth:`get_candidate_kets`, but also returns the tableaux of
+        the candidates. For states whose tableau is known, the tableau of
+        the candidate follows from a closed-form update (see
+        :meth:`~stabranksearcher.tableau.StabilizerTableau.apply_identity_plus_pauli`),
+        which also tells whether the candidate is zero before its ket is
+        computed.
+
         Returns
         -------
-        ket or None
+        tuple (numpy array, numpy array of bool, list)
+            The candidate kets and whether they are nonzero, as for
+            :meth:`get_candidate_kets`, and per candidate its tableau
+            (None if zero or unknown).
         """
-        unnormalized_new_stabilizer_ket = ket + pauli_matrix.dot(ket)
-        norm = np.linalg.norm(unnormalized_new_stabilizer_ket)
-        if np.isclose(norm, 0.):
-            return None
-        else:
-            return unnormalized_new_stabilizer_ket / norm
+        qstate_indices = np.asarray(qstate_indices)
+        x_masks, z_masks, phases = np.asarray(x_masks), np.asarray(z_masks), np.asarray(phases)
+        if self._real and np.any(phases % 2):
+            raise ValueError("A real basis only takes Paulis with real matrices, i.e. even phases")
+        candidate_tableaux = [None] * len(qstate_indices)
+        is_nonzero = np.ones(len(qstate_indices), dtype=bool)
+        has_tableau = np.zeros(len(qstate_indices), dtype=bool)
+        for column, qstate_index in enumerate(qstate_indices):
+            tableau = self.get_tableau(qstate_index=qstate_index)
+            if tableau is not None:
+                has_tableau[column] = True
+                candidate_tableaux[column] = tableau.apply_identity_plus_pauli(x_mask=x_masks[column],
+                                                                               z_mask=z_masks[column],
+                                                                               phase=phases[column])
+                is_nonzero[column] = candidate_tableaux[column] is not None
+        candidate_kets = np.zeros((self._kets.shape[0], len(qstate_indices)), dtype=self._kets.dtype)
+        columns = np.flatnonzero(is_nonzero)
+        kets = self._kets[:, qstate_indices[columns]]
+        candidate_kets[:, columns] = kets + apply_paulis(kets=kets, x_masks=x_masks[columns],
+                                                         z_masks=z_masks[columns], phases=phases[columns])
+        norms = np.linalg.norm(candidate_kets, axis=0)
+        # only states without tableau can still turn out to be zero
+        is_nonzero[~has_tableau] = ~np.isclose(norms[~has_tableau], 0.)
+        candidate_kets[:, is_nonzero] /= norms[is_nonzero]
+        return candidate_kets, is_nonzero, candidate_tableaux
+
+    def scores_with_replacements(self, ket, qstate_indices, candidate_kets):
+        """Scores of `ket` with respect to the bases obtained by replacing
+        the state at `qstate_indices[j]` by column `j` of `candidate_kets`,
+        for all `j` in one batched computation.
+
+        Parameters
+        ----------
+        ket: numpy array
+        qstate_indices: numpy array of int
+        candidate_kets: numpy array
+            Matrix whose columns are normalized kets.
+
+        Returns
+        -------
+        numpy array of float
+
+        Notes
+        -----
+        Per distinct replaced index i, the span of the other states is
+        factorized once as an orthonormal Q. The score after adding a
+        candidate v then follows from ||Q^dagger ket||^2 plus the
+        squared overlap of the residual ket - QQ^dagger ket with the
+        normalized component of v orthogonal to Q.
+        """
+        ket = np.ravel(ket)
+        qstate_indices = np.asarray(qstate_indices)
+        scores = np.empty(len(qstate_indices))
+        for qstate_index in np.unique(qstate_indices):
+            columns = np.flatnonzero(qstate_indices == qstate_index)
+            other_kets = np.delete(self._kets, qstate_index, axis=1)
+            if other_kets.shape[1] > 0:
+                q = scipy.linalg.orth(other_kets)
+            else:
+                q = np.zeros((ket.size, 0), dtype=self._kets.dtype)
+            overlaps = q.conj().T.dot(ket)
+            residual = ket - q.dot(overlaps)
+            orthogonal_parts = candidate_kets[:, columns] - q.dot(q.conj().T.dot(candidate_kets[:, columns]))
+            orthogonal_norms = np.linalg.norm(orthogonal_parts, axis=0)
+            is_independent = orthogonal_norms > Basis._INDEPENDENCE_TOLERANCE
+            gains = np.zeros(len(columns))
+            gains[is_independent] = \
+                np.abs(orthogonal_parts[:, is_independent].conj().T.dot(residual)) ** 2 / \
+                orthogonal_norms[is_independent] ** 2
+            scores[columns] = np.sqrt(np.vdot(overlaps, overlaps).real + gains)
+        return scores
 
 
 def get_basis_copy(basis):
-    qstate_copies = []
-    for qstate in basis._qstates:
-        if isinstance(qstate.qrepr, StabRepr):
-            qrepr = StabRepr(qstate.stab)  # TODO don't know if this is correct
-        else:
-            qrepr = ns.qubits.kettools.KetRepr(qstate.ket)
-        qubits = qapi.create_qubits(num_qubits=qstate.num_qubits)
-        qapi.assign_qstate(qubits, qrepr)
-        qstate_copy = qubits[0].qstate
-        qstate_copies.append(qstate_copy)
-    return Basis(qstates=qstate_copies)
+    """Copy of `basis`, see :meth:`~stabranksearcher.basis.Basis.clone`."""
+    return basis.clone()
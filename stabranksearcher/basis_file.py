@@ -0,0 +1,126 @@
+import io
+import json
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.tableau import StabilizerTableau
+from stabranksearcher.ket_cache import get_tableau_ket
+
+FORMAT_VERSION = 1
+
+
+def _save_arrays(file, arrays):
+    if isinstance(file, str):
+        # numpy would append ".npz" to a path without that extension
+        with open(file, "wb") as opened_file:
+            np.savez_compressed(opened_file, **arrays)
+    else:
+        np.savez_compressed(file, **arrays)
+
+
+def save_basis(file, basis, target_ket=None, metadata=None):
+    """Write a basis to a compressed binary file. States with a known
+    stabilizer tableau (or one that can be computed from the ket) are
+    stored as their tableau: the check matrices and signs as packed bits,
+    i.e. 2n^2 + n bits per state on n qubits. Only the other states are
+    stored as complex128 kets. Whether the basis is real is stored too.
+
+    Parameters
+    ----------
+    file: str or file-like object
+    basis: :obj:`~stabranksearcher.basis.Basis`
+    target_ket: numpy array or None
+        The target the basis was searched for.
+    metadata: dict or None
+        E.g. the stabilizer rank and the parameters and counters of the
+        search; should be JSON-serializable.
+    """
+    number_of_qubits = basis.number_of_qubits
+    tableaux = [basis.get_tableau(qstate_index=index) for index in range(basis.size)]
+    tableau_columns = [index for index, tableau in enumerate(tableaux) if tableau is not None]
+    ket_columns = [index for index, tableau in enumerate(tableaux) if tableau is None]
+    check_matrices = np.array([tableaux[index].check_matrix for index in tableau_columns], dtype=np.uint8)
+    signs = np.array([tableaux[index].phases == -1 for index in tableau_columns], dtype=np.uint8)
+    arrays = {"format_version": np.array(FORMAT_VERSION),
+              "number_of_qubits": np.array(number_of_qubits),
+              "size": np.array(basis.size),
+              "tableau_columns": np.array(tableau_columns, dtype=np.int64),
+              "check_matrix_bits": np.packbits(check_matrices),
+              "sign_bits": np.packbits(signs),
+              "ket_columns": np.array(ket_columns, dtype=np.int64),
+              "kets": np.asarray(basis.kets[:, ket_columns], dtype=np.complex128),
+              "real": np.array(basis.is_real),
+              "metadata": np.array(json.dumps({} if metadata is None else metadata, sort_keys=True))}
+    if target_ket is not None:
+        arrays["target_ket"] = np.ravel(np.asarray(target_ket, dtype=np.complex128))
+    _save_arrays(file=file, arrays=arrays)
+
+
+def load_basis(file):
+    """Read a basis written by :func:`save_basis`. The tableaux are
+    passed on to the basis, so they are not computed again from the kets;
+    the dense kets of those states are regenerated from their tableaux
+    (through the ket cache). A real basis is loaded as a real basis.
+
+    Parameters
+    ----------
+    file: str or file-like object
+
+    Returns
+    -------
+    tuple (:obj:`~stabranksearcher.basis.Basis`, numpy array or None, dict)
+        The basis, the target ket (if saved) and the metadata.
+
+    Raises
+    ------
+    ValueError
+        If the file has a format version that is not supported.
+    """
+    with np.load(file, allow_pickle=False) as arrays:
+        basis = _arrays_to_basis(arrays=arrays)
+        target_ket = arrays["target_ket"] if "target_ket" in arrays else None
+        metadata = json.loads(str(arrays["metadata"]))
+    return basis, target_ket, metadata
+
+
+def _arrays_to_basis(arrays):
+    if int(arrays["format_version"]) != FORMAT_VERSION:
+        raise ValueError("Unsupported basis file format version {}".format(int(arrays["format_version"])))
+    number_of_qubits = int(arrays["number_of_qubits"])
+    size = int(arrays["size"])
+    tableau_columns = arrays["tableau_columns"]
+    check_matrices = np.unpackbits(arrays["check_matrix_bits"],
+                                   count=len(tableau_columns) * 2 * number_of_qubits ** 2)
+    check_matrices = check_matrices.reshape(len(tableau_columns), number_of_qubits, 2 * number_of_qubits)
+    signs = np.unpackbits(arrays["sign_bits"], count=len(tableau_columns) * number_of_qubits)
+    signs = signs.reshape(len(tableau_columns), number_of_qubits)
+    kets = Basis._allocate_kets(number_of_qubits=number_of_qubits, number_of_kets=size)
+    tableaux = [None] * size
+    for index, check_matrix, column_signs in zip(tableau_columns, check_matrices, signs):
+        tableaux[index] = StabilizerTableau(check_matrix=check_matrix, phases=1 - 2 * column_signs.astype(np.int8))
+        kets[:, index] = get_tableau_ket(tableau=tableaux[index])
+    kets[:, arrays["ket_columns"]] = arrays["kets"]
+    # files written before the flag was stored hold complex bases
+    real = bool(arrays["real"]) if "real" in arrays else False
+    return Basis(kets=kets, tableaux=tableaux, real=real)
+
+
+def basis_to_bytes(basis):
+    """The file contents of :func:`save_basis`, without target or metadata."""
+    buffer = io.BytesIO()
+    save_basis(file=buffer, basis=basis)
+    return buffer.getvalue()
+
+
+def bytes_to_basis(data):
+    """Inverse of :func:`basis_to_bytes`. Also reads a ket matrix in the
+    ".npy" format.
+
+    Returns
+    -------
+    :obj:`~stabranksearcher.basis.Basis`
+    """
+    loaded = np.load(io.BytesIO(data), allow_pickle=False)
+    if isinstance(loaded, np.ndarray):
+        return Basis(kets=loaded, real=not np.iscomplexobj(loaded))
+    with loaded:
+        return _arrays_to_basis(arrays=loaded)
@@ -0,0 +1,168 @@
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.quantum_state_tools import get_number_of_qubits_from_ket
+from stabranksearcher.stab_basis_provider.random import RandomStabBasisProvider
+from stabranksearcher.ket_cache import get_qstate_ket
+from stabranksearcher.shared_arrays import SharedArray, SHARED_MEMORY
+from stabranksearcher.rng import get_rng
+
+
+class StabilizerStatePool:
+    """Fixed pool of stabilizer states, with their kets stored as the
+    columns of a single matrix, so that the overlaps of all of them with
+    a target are one matrix-vector product.
+
+    Parameters
+    ----------
+    kets: numpy array
+        Matrix whose columns are the normalized kets of the states.
+    """
+
+    def __init__(self, kets):
+        self._kets = np.asfortranarray(kets, dtype=np.complex128)
+        self._kets.setflags(write=False)
+        self._target_ket = None
+        self._target_overlaps = None
+
+    @classmethod
+    def sample(cls, number_of_qubits, size, rng=None):
+        """Pool of `size` random stabilizer states.
+
+        Parameters
+        ----------
+        number_of_qubits: int
+        size: int
+        rng: :obj:`numpy.random.Generator`, int or None
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.candidate_pool.StabilizerStatePool`
+        """
+        rng = get_rng(rng)
+        kets = np.empty((2 ** number_of_qubits, size), dtype=np.complex128, order="F")
+        for index in range(size):
+            qstate = RandomStabBasisProvider.get_random_stabilizer_state(number_of_qubits=number_of_qubits,
+                                                                          rng=rng)
+            kets[:, index] = get_qstate_ket(qstate=qstate)
+        return cls(kets=kets)
+
+    def share(self, backend=SHARED_MEMORY, directory=None):
+        """Copy the kets of the pool into a block shared with other
+        processes, which get a pool on the same memory with :meth:`attach`.
+
+        Parameters
+        ----------
+        backend: str
+        directory: str or None
+            See :class:`~stabranksearcher.shared_arrays.SharedArray`.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.shared_arrays.SharedArray`
+            The owner of the block; the pool's kets are freed when it is
+            closed.
+        """
+        return SharedArray(array=self._kets, backend=backend, directory=directory)
+
+    @classmethod
+    def attach(cls, handle):
+        """Pool whose kets are a read-only view of a block shared with
+        :meth:`share`, without copying.
+
+        Parameters
+        ----------
+        handle: :obj:`~stabranksearcher.shared_arrays.SharedArrayHandle`
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.candidate_pool.StabilizerStatePool`
+        """
+        return cls(kets=handle.attach())
+
+    @property
+    def kets(self):
+        return self._kets
+
+    @property
+    def size(self):
+        return self._kets.shape[1]
+
+    @property
+    def number_of_qubits(self):
+        return get_number_of_qubits_from_ket(ket=self._kets[:, 0])
+
+    def get_overlaps(self, ket):
+        """Inner products of all states in the pool with `ket`. The result
+        for the last `ket` is cached.
+
+        Parameters
+        ----------
+        ket: numpy array
+
+        Returns
+        -------
+        numpy array
+        """
+        ket = np.ravel(ket)
+        if self._target_ket is None or not np.array_equal(ket, self._target_ket):
+            self._target_ket = ket.copy()
+            self._target_overlaps = self._kets.conj().T.dot(ket)
+        return self._target_overlaps
+
+    def get_greedy_basis(self, ket, stabrank):
+        """Basis of `stabrank` states from the pool, chosen one by one in
+        the manner of orthogonal matching pursuit: each time, the state
+        that increases the score of `ket` most is added.
+
+        Parameters
+        ----------
+        ket: numpy array
+            Normalized target ket.
+        stabrank: int
+
+        Returns
+        -------
+        tuple (:obj:`~stabranksearcher.basis.Basis` or None, float)
+            The basis and its score. The basis is smaller than `stabrank`
+            if the pool does not contain enough linearly independent states,
+            and None if the pool is empty.
+
+        Notes
+        -----
+        With Q the orthonormalized chosen states and a_j a state from the
+        pool, adding a_j raises the squared score by
+        |a_j^dagger r|^2 / ||a_j - QQ^dagger a_j||^2 with r the residual
+        ket - QQ^dagger ket. Both the numerators and the denominators are
+        updated with a single matrix-vector product with the pool per
+        chosen state, starting from the cached overlaps with the target.
+        """
+        ket = np.ravel(ket)
+        residual_overlaps = self.get_overlaps(ket=ket).copy()
+        squared_norms = np.linalg.norm(self._kets, axis=0) ** 2
+        orthonormal_kets = []
+        chosen_indices = []
+        squared_score = 0.
+        for _ in range(stabrank):
+            # the squared norms are updated by subtraction, so are only
+            # accurate up to rounding errors of the order of machine precision
+            is_independent = squared_norms > Basis._INDEPENDENCE_TOLERANCE
+            if not np.any(is_independent):
+                break
+            gains = np.full(self.size, -1.)
+            gains[is_independent] = \
+                np.abs(residual_overlaps[is_independent]) ** 2 / squared_norms[is_independent]
+            index = int(np.argmax(gains))
+            new_ket = self._kets[:, index].copy()
+            for orthonormal_ket in orthonormal_kets:
+                new_ket -= orthonormal_ket * np.vdot(orthonormal_ket, new_ket)
+            new_ket /= np.linalg.norm(new_ket)
+            projections = self._kets.conj().T.dot(new_ket)
+            target_projection = np.vdot(new_ket, ket)
+            residual_overlaps -= projections * target_projection
+            squared_norms -= np.abs(projections) ** 2
+            squared_score += np.abs(target_projection) ** 2
+            orthonormal_kets.append(new_ket)
+            chosen_indices.append(index)
+        if len(chosen_indices) == 0:
+            return None, 0.
+        return Basis(kets=self._kets[:, chosen_indices]), np.sqrt(squared_score)
@@ -0,0 +1,259 @@
+import itertools
+import math
+import warnings
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.quantum_state_tools import get_number_of_qubits_from_ket
+
+
+def _are_equal_up_to_phase(first, second):
+    return np.isclose(np.abs(np.trace(first.conj().T.dot(second))), first.shape[0])
+
+
+def get_single_qubit_cliffords():
+    """The 24 single-qubit Clifford unitaries, up to global phase,
+    starting with the identity.
+
+    Returns
+    -------
+    list of numpy array
+    """
+    hadamard = np.array([[1, 1], [1, -1]], dtype=np.complex128) / np.sqrt(2)
+    phase_gate = np.diag([1, 1j])
+    gates = [np.eye(2, dtype=np.complex128)]
+    index = 0
+    while index < len(gates):
+        for generator in (hadamard, phase_gate):
+            gate = generator.dot(gates[index])
+            if not any(_are_equal_up_to_phase(gate, other) for other in gates):
+                gates.append(gate)
+        index += 1
+    return gates
+
+
+_LOCAL_GATES = {
+    "identity": [np.eye(2, dtype=np.complex128)],
+    "x_flips": [np.eye(2, dtype=np.complex128), np.array([[0, 1], [1, 0]], dtype=np.complex128)],
+    "local_cliffords": get_single_qubit_cliffords()}
+
+
+class SymmetryTransform:
+    """Permutation of the qubits followed by a single-qubit unitary on
+    every qubit. If the unitaries are Cliffords, stabilizer states are
+    mapped to stabilizer states, and a basis spanning a target is
+    mapped to one of the same size spanning the transformed target.
+
+    Parameters
+    ----------
+    permutation: sequence of int
+        Qubit `q` is moved to position `permutation[q]`. As in NetSquid,
+        qubit 0 is the most significant bit of the index of an amplitude.
+    gates: list of numpy array
+        `gates[q]` is the 2 x 2 unitary applied to qubit `q` after the
+        permutation.
+    """
+
+    def __init__(self, permutation, gates):
+        if sorted(permutation) != list(range(len(permutation))):
+            raise ValueError("{} is not a permutation".format(permutation))
+        if len(gates) != len(permutation):
+            raise ValueError("Need a single gate per qubit")
+        self._permutation = tuple(int(position) for position in permutation)
+        self._gates = [np.asarray(gate, dtype=np.complex128) for gate in gates]
+
+    @classmethod
+    def identity(cls, number_of_qubits):
+        return cls(permutation=range(number_of_qubits),
+                   gates=[np.eye(2, dtype=np.complex128)] * number_of_qubits)
+
+    @property
+    def permutation(self):
+        return self._permutation
+
+    @property
+    def gates(self):
+        return self._gates
+
+    @property
+    def number_of_qubits(self):
+        return len(self._permutation)
+
+    def inverse(self):
+        """
+        Returns
+        -------
+        :obj:`~stabranksearcher.canonicalization.SymmetryTransform`
+        """
+        inverse_permutation = np.argsort(self._permutation)
+        # moving the gates in front of the inverse permutation moves the gate
+        # of position permutation[q] to qubit q
+        return SymmetryTransform(permutation=inverse_permutation,
+                                 gates=[self._gates[position].conj().T for position in self._permutation])
+
+    def apply(self, kets):
+        """
+        Parameters
+        ----------
+        kets: numpy array
+            A single ket, or a matrix with kets as columns.
+
+        Returns
+        -------
+        numpy array
+            The transformed ket(s), of the same shape as `kets`.
+        """
+        kets = np.asarray(kets, dtype=np.complex128)
+        number_of_qubits = self.number_of_qubits
+        columns = np.reshape(kets, (2 ** number_of_qubits, -1))
+        tensor = np.reshape(columns, (2,) * number_of_qubits + (columns.shape[1],))
+        tensor = np.transpose(tensor, axes=list(np.argsort(self._permutation)) + [number_of_qubits])
+        for qubit, gate in enumerate(self._gates):
+            tensor = np.moveaxis(np.tensordot(gate, tensor, axes=([1], [qubit])), 0, qubit)
+        return np.reshape(tensor, kets.shape)
+
+    def apply_to_basis(self, basis):
+        """
+        Parameters
+        ----------
+        basis: :obj:`~stabranksearcher.basis.Basis`
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.basis.Basis`
+        """
+        return Basis(kets=self.apply(kets=basis.kets))
+
+
+class TargetCanonicalizer:
+    """Maps a target state to a representative of its equivalence class
+    under qubit permutations and single-qubit gates, so that equivalent
+    targets, which have the same stabilizer rank, can share search
+    results (see :class:`~stabranksearcher.result_store.ResultStore`).
+
+    The representative is the transformed target (normalized, with its
+    first nonzero amplitude real and positive) whose amplitudes, rounded
+    to `decimals` digits, are lexicographically smallest among all
+    transforms. All transforms are enumerated, so equivalent targets
+    get the same representative.
+
+    Parameters
+    ----------
+    permute_qubits: bool
+        Whether to include qubit permutations.
+    local_gates: str
+        The single-qubit gates that are combined on all qubits: "identity",
+        "x_flips" (identity or X, e.g. relating the Dicke states of
+        Hamming weights k and n - k) or "local_cliffords" (all 24
+        single-qubit Cliffords).
+    max_transforms: int
+        If there are more transforms than this on the number of qubits of
+        a target, only the local gates are enumerated, without permuting
+        the qubits; if there are still more, the target is not
+        canonicalized (it is its own representative) and a warning is
+        issued.
+    decimals: int
+        Number of digits up to which amplitudes are compared.
+    """
+
+    LOCAL_GATES = tuple(_LOCAL_GATES)
+
+    def __init__(self, permute_qubits=True, local_gates="x_flips", max_transforms=10 ** 5, decimals=10):
+        if local_gates not in _LOCAL_GATES:
+            raise ValueError("Unknown local gates {}".format(local_gates))
+        self._permute_qubits = permute_qubits
+        self._local_gates = local_gates
+        self._max_transforms = max_transforms
+        self._decimals = decimals
+        self._last_ket = None
+        self._last_canonicalization = None
+
+    @property
+    def local_gates(self):
+        return self._local_gates
+
+    def get_number_of_transforms(self, number_of_qubits, permute_qubits=None):
+        if permute_qubits is None:
+            permute_qubits = self._permute_qubits
+        number_of_permutations = math.factorial(number_of_qubits) if permute_qubits else 1
+        return number_of_permutations * len(_LOCAL_GATES[self._local_gates]) ** number_of_qubits
+
+    def _normalize(self, kets):
+        """Rows of `kets` normalized, with their first nonzero amplitude
+        real and positive."""
+        kets = kets / np.linalg.norm(kets, axis=1, keepdims=True)
+        first_nonzero_indices = np.argmax(np.abs(kets) > 10 ** (-self._decimals), axis=1)
+        first_nonzero_amplitudes = kets[np.arange(kets.shape[0]), first_nonzero_indices]
+        return kets * (np.abs(first_nonzero_amplitudes) / first_nonzero_amplitudes)[:, np.newaxis]
+
+    def _get_sort_keys(self, kets):
+        # adding zero turns -0. into 0.
+        kets = np.round(kets, decimals=self._decimals) + 0.
+        keys = np.empty((kets.shape[0], 2 * kets.shape[1]))
+        keys[:, 0::2] = kets.real
+        keys[:, 1::2] = kets.imag
+        return keys
+
+    def canonicalize(self, ket):
+        """
+        Parameters
+        ----------
+        ket: numpy array
+
+        Returns
+        -------
+        tuple (numpy array, :obj:`~stabranksearcher.canonicalization.SymmetryTransform`)
+            The normalized representative of `ket`, and a transform that
+            maps `ket` to it (up to norm and global phase). The result for
+            the last `ket` is cached.
+        """
+        ket = np.ravel(np.asarray(ket, dtype=np.complex128))
+        if self._last_ket is not None and np.array_equal(ket, self._last_ket):
+            return self._last_canonicalization
+        number_of_qubits = get_number_of_qubits_from_ket(ket=ket)
+        permute_qubits = self._permute_qubits and \
+            self.get_number_of_transforms(number_of_qubits=number_of_qubits) <= self._max_transforms
+        if self.get_number_of_transforms(number_of_qubits=number_of_qubits,
+                                         permute_qubits=permute_qubits) > self._max_transforms:
+            warnings.warn("Not canonicalizing a target on {} qubits: more than {} transforms".format(
+                number_of_qubits, self._max_transforms))
+            canonicalization = (self._normalize(ket[np.newaxis, :])[0],
+                                SymmetryTransform.identity(number_of_qubits=number_of_qubits))
+        else:
+            canonicalization = self._search_representative(ket=ket, number_of_qubits=number_of_qubits,
+                                                           permute_qubits=permute_qubits)
+        self._last_ket = ket.copy()
+        self._last_canonicalization = canonicalization
+        return canonicalization
+
+    def _search_representative(self, ket, number_of_qubits, permute_qubits):
+        gates = np.array(_LOCAL_GATES[self._local_gates])
+        number_of_gates = len(gates)
+        tensor = np.reshape(ket, (2,) * number_of_qubits)
+        if permute_qubits:
+            permutations = itertools.permutations(range(number_of_qubits))
+        else:
+            permutations = [tuple(range(number_of_qubits))]
+        best = None
+        for permutation in permutations:
+            # all combinations of local gates on the permuted target at once,
+            # the gate on qubit q being digit q (in base number_of_gates) of
+            # the index of the candidate
+            candidates = np.transpose(tensor, axes=np.argsort(permutation))[np.newaxis]
+            if number_of_gates > 1:
+                for qubit in range(number_of_qubits):
+                    candidates = np.tensordot(gates, candidates, axes=([2], [qubit + 1]))
+                    candidates = np.moveaxis(candidates, 1, qubit + 2)
+                    candidates = np.reshape(candidates, (-1,) + (2,) * number_of_qubits)
+            candidates = self._normalize(np.reshape(candidates, (candidates.shape[0], -1)))
+            keys = self._get_sort_keys(candidates)
+            index = np.lexsort(keys.T[::-1])[0]
+            if best is None or self._is_smaller(keys[index], best[0]):
+                digits = [(index // number_of_gates ** qubit) % number_of_gates for qubit in range(number_of_qubits)]
+                best = (keys[index], candidates[index],
+                        SymmetryTransform(permutation=permutation, gates=[gates[digit] for digit in digits]))
+        return best[1], best[2]
+
+    @staticmethod
+    def _is_smaller(keys, other_keys):
+        differences = np.flatnonzero(keys != other_keys)
+        return len(differences) > 0 and keys[differences[0]] < other_keys[differences[0]]
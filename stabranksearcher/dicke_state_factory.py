@@ -1,16 +1,14 @@
+import math
 import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.quantum_state_tools import get_stabilizer_tableau
+from stabranksearcher.tableau import StabilizerTableau
 
 
-def _convert_integer_to_binary_list(integer=1):
-    if integer < 0:
-        raise ValueError
-    bitstring = "{0:b}".format(integer)
-    binary_list = [int(s) for s in bitstring]
-    return binary_list
-
-
-def _hamming_weight_of_binary_list(binary_list):
-    return sum(binary_list)
+def _get_hamming_weights(number_of_qubits):
+    """Hamming weights of all integers 0, ..., 2^n - 1."""
+    indices = np.arange(2 ** number_of_qubits, dtype=np.int64)
+    return sum((indices >> qubit) & 1 for qubit in range(number_of_qubits))
 
 
 def get_dicke_state(number_of_qubits=1, hamming_weight=0):
@@ -19,9 +17,150 @@ def get_dicke_state(number_of_qubits=1, hamming_weight=0):
     -------
     numpy ndarray
     """
-    state_vector = np.array([0] * (2 ** number_of_qubits))
-    for integer in range(2 ** number_of_qubits):
-        binary_list = _convert_integer_to_binary_list(integer=integer)
-        if _hamming_weight_of_binary_list(binary_list=binary_list) == hamming_weight:
-            state_vector[integer] = 1
+    state_vector = (_get_hamming_weights(number_of_qubits=number_of_qubits) == hamming_weight).astype(np.int64)
     return state_vector / np.linalg.norm(state_vector)
+
+
+def save_dicke_state(path, number_of_qubits=1, hamming_weight=0, chunk_size=2 ** 20):
+    """Write the Dicke state to a ".npy" file chunk by chunk, for numbers
+    of qubits at which it does not fit in memory.
+
+    Returns
+    -------
+    numpy memmap
+        Read-only view of the file.
+    """
+    dimension = 2 ** number_of_qubits
+    ket = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(dimension,))
+    amplitude = 1 / np.sqrt(math.comb(number_of_qubits, hamming_weight))
+    for start in range(0, dimension, chunk_size):
+        indices = np.arange(start, min(start + chunk_size, dimension), dtype=np.int64)
+        hamming_weights = sum((indices >> qubit) & 1 for qubit in range(number_of_qubits))
+        ket[start:start + chunk_size] = np.where(hamming_weights == hamming_weight, amplitude, 0.)
+    ket.flush()
+    del ket
+    return np.load(path, mmap_mode="r")
+
+
+def _append_qubit(basis, bit):
+    """Basis of the states of `basis` with an extra last qubit in the
+    state |`bit`>, keeping the known tableaux."""
+    kets = np.zeros((2 * basis.kets.shape[0], basis.size), dtype=basis.kets.dtype, order="F")
+    # the new qubit is the least significant bit of the indices
+    kets[bit::2] = basis.kets
+    tableaux = []
+    for tableau in basis.tableaux:
+        if tableau is None:
+            tableaux.append(None)
+            continue
+        x_masks, z_masks, phases = tableau.get_pauli_masks()
+        # (-1)^bit Z on the new qubit stabilizes |bit>
+        tableaux.append(StabilizerTableau.from_pauli_masks(number_of_qubits=tableau.number_of_qubits + 1,
+                                                           x_masks=np.append(x_masks << 1, 0),
+                                                           z_masks=np.append(z_masks << 1, 1),
+                                                           phases=np.append(phases, 2 * bit)))
+    return Basis(kets=kets, tableaux=tableaux, real=basis.is_real)
+
+
+def _get_constant_basis(number_of_qubits, bit):
+    """Basis of the single state |`bit` ... `bit`>, with its tableau."""
+    z_masks = np.array([1 << qubit for qubit in range(number_of_qubits)], dtype=np.int64)
+    tableau = StabilizerTableau.from_pauli_masks(number_of_qubits=number_of_qubits,
+                                                 x_masks=np.zeros_like(z_masks),
+                                                 z_masks=z_masks,
+                                                 phases=np.full(number_of_qubits, 2 * bit))
+    ket = get_dicke_state(number_of_qubits=number_of_qubits, hamming_weight=bit * number_of_qubits)
+    return Basis(kets=ket[:, np.newaxis], tableaux=[tableau])
+
+
+def get_recursive_dicke_basis(number_of_qubits, hamming_weight, get_known_basis=None, check_stabilizer_state=True):
+    r"""Basis spanning the Dicke state D(n, k), built from bases for
+    Dicke states on fewer qubits with the recursion
+
+    .. math::
+        \ket{D(n, k)} \propto \sqrt{n - k} \ket{D(n - 1, k)} \otimes \ket{0}
+        + \sqrt{k} \ket{D(n - 1, k - 1)} \otimes \ket{1},
+
+    i.e. the states of a basis for D(n - 1, k) with an extra qubit in
+    :math:`\ket{0}`, together with those of a basis for D(n - 1, k - 1)
+    with an extra qubit in :math:`\ket{1}`. Applied all the way down, it
+    ends at D(m, 0) and D(m, m), which are computational basis states.
+    Per Dicke state along the way, the smallest of the known basis (if
+    any) and the one from the recursion is used. The result spans D(n, k),
+    but is in general not of minimal size; it serves to warm-start a
+    search, see e.g. :func:`~stabranksearcher.rank_searcher.run_rank_descent`.
+
+    Parameters
+    ----------
+    number_of_qubits: int
+    hamming_weight: int
+    get_known_basis: callable or None
+        Called as `get_known_basis(number_of_qubits, hamming_weight)`, it
+        returns a basis spanning that Dicke state, e.g. the solution in a
+        :class:`~stabranksearcher.result_store.ResultStore`, or None.
+    check_stabilizer_state: bool
+        Whether to use the Dicke states that are stabilizer states (e.g.
+        D(2, 1)) as bases of size 1.
+
+    Returns
+    -------
+    :obj:`~stabranksearcher.basis.Basis`
+    """
+    if not 0 <= hamming_weight <= number_of_qubits:
+        raise ValueError("Need 0 <= hamming_weight <= number_of_qubits")
+    # first the sizes, so that only the chosen bases are built
+    known_bases = {}
+    sizes = {}
+
+    def get_size(n, k):
+        if (n, k) in sizes:
+            return sizes[(n, k)]
+        known_basis = None if get_known_basis is None else get_known_basis(n, k)
+        if known_basis is None or known_basis.size > 1:
+            if k == 0 or k == n:
+                known_basis = _get_constant_basis(number_of_qubits=n, bit=int(k > 0))
+            elif check_stabilizer_state:
+                dicke_ket = get_dicke_state(number_of_qubits=n, hamming_weight=k)
+                tableau = get_stabilizer_tableau(ket=dicke_ket)
+                if tableau is not None:
+                    known_basis = Basis(kets=dicke_ket[:, np.newaxis], tableaux=[tableau])
+        size = np.inf if known_basis is None else known_basis.size
+        if 0 < k < n:
+            size = min(size, get_size(n - 1, k) + get_size(n - 1, k - 1))
+        if known_basis is not None and known_basis.size == size:
+            known_bases[(n, k)] = known_basis
+        sizes[(n, k)] = size
+        return size
+
+    bases = {}
+
+    def build(n, k):
+        if (n, k) in known_bases:
+            return known_bases[(n, k)]
+        if (n, k) not in bases:
+            first, second = _append_qubit(build(n - 1, k), bit=0), _append_qubit(build(n - 1, k - 1), bit=1)
+            bases[(n, k)] = Basis(kets=np.hstack((first.kets, second.kets)),
+                                  tableaux=first.tableaux + second.tableaux)
+        return bases[(n, k)]
+
+    get_size(number_of_qubits, hamming_weight)
+    return build(number_of_qubits, hamming_weight)
+
+
+def get_stored_dicke_basis_getter(result_store):
+    """`get_known_basis` for :func:`get_recursive_dicke_basis` that takes
+    the smallest solution for each Dicke state from a result store.
+
+    Parameters
+    ----------
+    result_store: :obj:`~stabranksearcher.result_store.ResultStore`
+
+    Returns
+    -------
+    callable
+    """
+    def get_known_basis(number_of_qubits, hamming_weight):
+        return result_store.get_solution(target_ket=get_dicke_state(number_of_qubits=number_of_qubits,
+                                                                    hamming_weight=hamming_weight),
+                                         stabrank=2 ** number_of_qubits)
+    return get_known_basis
@@ -0,0 +1,151 @@
+import collections
+import numpy as np
+from stabranksearcher.quantum_state_tools import stabilizer_tableau_to_ket, qstate_to_stabilizer_tableau
+
+
+class KetCache:
+    """Least-recently-used cache of the kets of stabilizer states, keyed
+    by their reduced tableau (see
+    :meth:`~stabranksearcher.tableau.StabilizerTableau.get_reduced`), so
+    that all generating sets of the same state share an entry.
+
+    Parameters
+    ----------
+    max_bytes: int
+        Maximal total size of the cached kets; the least recently used
+        kets are evicted to stay below it.
+    """
+
+    def __init__(self, max_bytes=2 ** 26):
+        self._max_bytes = max_bytes
+        self._kets = collections.OrderedDict()
+        self._number_of_bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @property
+    def number_of_bytes(self):
+        return self._number_of_bytes
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def __len__(self):
+        return len(self._kets)
+
+    def get_statistics(self):
+        """
+        Returns
+        -------
+        dict
+            Numbers of hits, misses, entries and bytes, and the hit rate.
+        """
+        lookups = self._hits + self._misses
+        return {"hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups > 0 else 0.,
+                "entries": len(self._kets),
+                "bytes": self._number_of_bytes}
+
+    def clear(self):
+        """Remove all kets and reset the statistics."""
+        self._kets.clear()
+        self._number_of_bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get_ket(self, tableau):
+        """The normalized ket of `tableau` (with its first nonzero amplitude
+        real and positive), from the cache or computed with
+        :func:`~stabranksearcher.quantum_state_tools.stabilizer_tableau_to_ket`.
+
+        Parameters
+        ----------
+        tableau: :obj:`~stabranksearcher.tableau.StabilizerTableau`
+
+        Returns
+        -------
+        numpy array
+            Read-only.
+        """
+        key = tableau.get_reduced()
+        ket = self._kets.get(key)
+        if ket is not None:
+            self._hits += 1
+            self._kets.move_to_end(key)
+            return ket
+        self._misses += 1
+        ket = stabilizer_tableau_to_ket(tableau=key)
+        ket.setflags(write=False)
+        if ket.nbytes <= self._max_bytes:
+            while self._number_of_bytes + ket.nbytes > self._max_bytes:
+                _, evicted_ket = self._kets.popitem(last=False)
+                self._number_of_bytes -= evicted_ket.nbytes
+            self._kets[key] = ket
+            self._number_of_bytes += ket.nbytes
+        return ket
+
+
+_ket_cache = KetCache()
+
+
+def get_ket_cache():
+    """The cache shared by :class:`~stabranksearcher.basis.Basis`, the
+    stabilizer-basis providers and the candidate pools, or None if
+    caching is switched off.
+
+    Returns
+    -------
+    :obj:`~stabranksearcher.ket_cache.KetCache` or None
+    """
+    return _ket_cache
+
+
+def set_ket_cache(ket_cache):
+    """Replace the shared cache, e.g. by one with another memory cap, or
+    switch caching off with None.
+
+    Parameters
+    ----------
+    ket_cache: :obj:`~stabranksearcher.ket_cache.KetCache` or None
+    """
+    global _ket_cache
+    _ket_cache = ket_cache
+
+
+def get_tableau_ket(tableau):
+    """The ket of `tableau`, taken from the shared cache (if any), see
+    :meth:`KetCache.get_ket`."""
+    if _ket_cache is None:
+        return stabilizer_tableau_to_ket(tableau=tableau)
+    return _ket_cache.get_ket(tableau=tableau)
+
+
+def get_qstate_ket(qstate, tableau=None):
+    """The ket of `qstate` as a vector, taken from the shared cache if the
+    qstate is in the stabilizer representation.
+
+    Parameters
+    ----------
+    qstate: QState
+    tableau: :obj:`~stabranksearcher.tableau.StabilizerTableau` or None
+        The tableau of `qstate`, if already known.
+
+    Returns
+    -------
+    numpy array
+    """
+    if tableau is None:
+        tableau = qstate_to_stabilizer_tableau(qstate)
+    if tableau is None or _ket_cache is None:
+        return np.ravel(qstate.ket)
+    return get_tableau_ket(tableau=tableau)
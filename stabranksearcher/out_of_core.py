@@ -0,0 +1,447 @@
+"""Bases whose kets do not fit in memory, e.g. on 26 to 30 qubits, where a
+single complex ket takes 1 to 16 GiB.
+
+The kets of an :class:`OutOfCoreBasis` (and, typically, the target) live
+in memory-mapped ".npy" files on local disk, and every computation streams
+over chunks of rows, so that only a few chunks are in memory at any time.
+Instead of an orthonormal basis of the span, scores follow from the Gram
+matrix of the kets and their overlaps with the target, which are small
+and are accumulated chunk by chunk, see :func:`score_from_gram_matrix`.
+
+Chunks have a power-of-2 number of rows, so that the Pauli X-part of a
+move maps every chunk of a ket onto a single (aligned) chunk, see
+:func:`apply_identity_plus_pauli`.
+
+All sums over rows are accumulated in blocks of :data:`BLOCK_SIZE` rows
+in increasing order, whatever the chunk size and whether the kets are
+memory-mapped or in memory, so that the scores do not depend on either.
+"""
+import weakref
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.quantum_state_tools import get_random_pauli_masks, _parity, _get_support_offset
+from stabranksearcher.shared_arrays import create_memmap, _free_file
+from stabranksearcher.tableau import StabilizerTableau
+from stabranksearcher.rng import get_rng
+
+BLOCK_SIZE = 2 ** 12
+DEFAULT_MEMORY_BUDGET = 2 ** 28
+
+
+def get_chunk_size(number_of_qubits, number_of_columns=1, dtype=np.complex128,
+                   memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Largest power-of-2 number of rows such that chunks of
+    `number_of_columns` columns fit in `memory_budget` bytes, but at least
+    :data:`BLOCK_SIZE` and at most 2^n rows.
+
+    Returns
+    -------
+    int
+    """
+    number_of_rows = memory_budget // (number_of_columns * np.dtype(dtype).itemsize)
+    chunk_size = 1 << max(int(number_of_rows).bit_length() - 1, 0)
+    return min(max(chunk_size, BLOCK_SIZE), 2 ** number_of_qubits)
+
+
+def _check_chunk_size(chunk_size, dimension):
+    chunk_size = min(chunk_size, dimension)
+    if chunk_size & (chunk_size - 1) or chunk_size < min(BLOCK_SIZE, dimension):
+        raise ValueError("Chunk size {} is not a power of 2 of at least {}".format(chunk_size, BLOCK_SIZE))
+    return chunk_size
+
+
+def _accumulate_products(total, left, right):
+    """Add left^dagger right to `total`, block by block."""
+    for start in range(0, left.shape[0], BLOCK_SIZE):
+        total += left[start:start + BLOCK_SIZE].conj().T.dot(right[start:start + BLOCK_SIZE])
+
+
+def get_gram_matrix_and_overlaps(kets, ket, chunk_size=BLOCK_SIZE, columns=None):
+    """The Gram matrix K^dagger K of the columns of `kets` and their
+    overlaps K^dagger `ket`, in a single pass over chunks of rows.
+
+    Parameters
+    ----------
+    kets: numpy array
+        Matrix of size 2^n x m, e.g. memory-mapped.
+    ket: numpy array
+    chunk_size: int
+        Number of rows per chunk, a power of 2.
+    columns: list of int or None
+        The columns of `kets` to use, in this order; all if None.
+
+    Returns
+    -------
+    tuple (numpy array, numpy array)
+    """
+    chunk_size = _check_chunk_size(chunk_size=chunk_size, dimension=kets.shape[0])
+    columns = list(range(kets.shape[1])) if columns is None else list(columns)
+    dtype = np.result_type(kets.dtype, ket.dtype)
+    gram_matrix = np.zeros((len(columns), len(columns)), dtype=dtype)
+    overlaps = np.zeros(len(columns), dtype=dtype)
+    for start in range(0, kets.shape[0], chunk_size):
+        chunk = np.asarray(kets[start:start + chunk_size][:, columns])
+        _accumulate_products(total=gram_matrix, left=chunk, right=chunk)
+        _accumulate_products(total=overlaps, left=chunk, right=np.asarray(ket[start:start + chunk_size]))
+    return gram_matrix, overlaps
+
+
+def score_from_gram_matrix(gram_matrix, overlaps, dimension):
+    """Norm of the projection of a normalized ket onto the span of kets,
+    from their Gram matrix G and their overlaps v with the ket: the square
+    root of v^dagger G^+ v, with G^+ the pseudo-inverse of G.
+
+    Parameters
+    ----------
+    gram_matrix: numpy array
+    overlaps: numpy array
+    dimension: int
+        Length of the kets.
+
+    Returns
+    -------
+    float
+
+    Notes
+    -----
+    The eigenvalues of G are the squared singular values of the ket matrix
+    and are only accurate up to about eps times the largest one, so
+    eigenvalues up to max(M, N) eps times the largest one, for M x N kets,
+    count as zero. Linearly dependent states thus count once, as in the
+    in-memory :meth:`~stabranksearcher.basis.Basis.score_ket`; states that
+    are independent only by singular values below about the square root
+    of that cutoff (relative to the largest) count as dependent here.
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(gram_matrix)
+    relative_cutoff = max(dimension, gram_matrix.shape[0]) * np.finfo(eigenvalues.dtype).eps
+    is_kept = eigenvalues > relative_cutoff * eigenvalues[-1]
+    projections = eigenvectors[:, is_kept].conj().T.dot(overlaps)
+    return float(np.sqrt(np.sum(np.abs(projections) ** 2 / eigenvalues[is_kept])))
+
+
+def apply_identity_plus_pauli(source, target, x_mask, z_mask, phase, chunk_size=BLOCK_SIZE):
+    r"""Write :math:`(I + P)\ket{\phi}` to `target` chunk by chunk, with
+    :math:`\ket{\phi}` the ket `source` and P the Pauli given by the masks
+    (see :func:`~stabranksearcher.quantum_state_tools.apply_paulis`).
+    `target` may be `source` itself.
+
+    Parameters
+    ----------
+    source: numpy array
+    target: numpy array
+        Of the same size and type as `source`, e.g. columns of memory-mapped
+        matrices; real only if `phase` is even.
+    x_mask: int
+    z_mask: int
+    phase: int
+    chunk_size: int
+
+    Returns
+    -------
+    numpy array of float
+        The squared norms of the blocks of `target`, in order.
+
+    Notes
+    -----
+    For chunks of C = 2^c rows, the X-part maps row `start + r` of a chunk
+    to row `(start ^ x_high) + (r ^ x_low)`, with `x_low` the lowest c bits
+    of `x_mask` and `x_high` the others, so each chunk of `target` only
+    needs one chunk of `source`. Chunks are processed in pairs
+    `start`, `start ^ x_high`, so that `target` can be `source`.
+    """
+    dimension = source.shape[0]
+    chunk_size = _check_chunk_size(chunk_size=chunk_size, dimension=dimension)
+    x_mask, z_mask, phase = int(x_mask), int(z_mask), int(phase)
+    x_low, x_high = x_mask & (chunk_size - 1), x_mask & ~(chunk_size - 1)
+    rows = np.arange(chunk_size, dtype=np.int64)
+    permutation = rows ^ x_low
+    row_signs = 1 - 2 * _parity(rows & z_mask)
+    if np.isrealobj(source) and phase % 2 == 0:
+        coefficient = 1 - phase % 4
+    else:
+        coefficient = (-1j) ** phase
+    block_size = min(BLOCK_SIZE, dimension)
+    squared_norms = np.empty(dimension // block_size)
+    for start in range(0, dimension, chunk_size):
+        partner = start ^ x_high
+        if partner < start:
+            continue
+        chunks = {start: np.array(source[start:start + chunk_size])}
+        chunks[partner] = chunks[start] if partner == start else np.array(source[partner:partner + chunk_size])
+        for chunk_start, other_start in [(start, partner), (partner, start)][:len(chunks)]:
+            sign = 1 - 2 * (bin(chunk_start & z_mask).count("1") % 2)
+            result = chunks[chunk_start] + (coefficient * sign) * row_signs * chunks[other_start][permutation]
+            target[chunk_start:chunk_start + chunk_size] = result
+            blocks = np.reshape(np.abs(result) ** 2, (-1, block_size))
+            squared_norms[chunk_start // block_size:(chunk_start + chunk_size) // block_size] = \
+                np.sum(blocks, axis=1)
+    return squared_norms
+
+
+class OutOfCoreBasis:
+    """Basis of stabilizer states, all with known tableau, whose kets are
+    the columns of a memory-mapped ".npy" file, together with its target
+    (see the module documentation).
+
+    The Gram matrix of the kets and their overlaps with the target are
+    kept up to date, so that a move (:meth:`modify`) takes a pass over the
+    modified ket and one over all kets and the target, and the score and
+    the weakest state follow without any further pass. The file has a
+    spare column, into which a move writes the new ket, so that moves are
+    undone (:meth:`undo_last_modification`) without copying.
+
+    Parameters
+    ----------
+    target_ket: numpy array
+        Normalized ket of size 2^n, e.g. memory-mapped; real if `real`.
+    tableaux: list of :obj:`~stabranksearcher.tableau.StabilizerTableau`
+    directory: str or None
+        Directory of the file, preferably on a local disk; defaults to the
+        temporary directory.
+    chunk_size: int or None
+        Number of rows per chunk, a power of 2; if None, the largest one
+        for which all chunks of a pass fit in `memory_budget`.
+    memory_budget: int
+        Bytes.
+    real: bool
+        Whether the kets are stored as float64, for real stabilizer states
+        and real Paulis only, see :class:`~stabranksearcher.basis.Basis`.
+    """
+
+    def __init__(self, target_ket, tableaux, directory=None, chunk_size=None,
+                 memory_budget=DEFAULT_MEMORY_BUDGET, real=False):
+        if len(tableaux) == 0:
+            raise ValueError("Need at least one tableau")
+        number_of_qubits = tableaux[0].number_of_qubits
+        if target_ket.shape != (2 ** number_of_qubits,):
+            raise ValueError("Target of shape {} is not a ket on {} qubits".format(target_ket.shape,
+                                                                                   number_of_qubits))
+        if real and not np.isrealobj(target_ket):
+            raise ValueError("A real basis needs a real target")
+        dtype = np.float64 if real else np.complex128
+        if chunk_size is None:
+            # the kets, the target and the two chunks of a move
+            chunk_size = get_chunk_size(number_of_qubits=number_of_qubits, number_of_columns=len(tableaux) + 3,
+                                        dtype=dtype, memory_budget=memory_budget)
+        self._chunk_size = _check_chunk_size(chunk_size=chunk_size, dimension=2 ** number_of_qubits)
+        self._number_of_qubits = number_of_qubits
+        self._real = real
+        self._target_ket = target_ket
+        self._path, self._storage = create_memmap(shape=(2 ** number_of_qubits, len(tableaux) + 1), dtype=dtype,
+                                                  directory=directory, fortran_order=True)
+        self._finalizer = weakref.finalize(self, _free_file, self._path)
+        self._columns = list(range(len(tableaux)))
+        self._spare_column = len(tableaux)
+        for column, tableau in enumerate(tableaux):
+            self._write_tableau_ket(tableau=tableau, column=column)
+        self._tableaux = list(tableaux)
+        self._gram_matrix, self._overlaps = get_gram_matrix_and_overlaps(kets=self._storage, ket=target_ket,
+                                                                         chunk_size=self._chunk_size,
+                                                                         columns=self._columns)
+        self._score = None
+        self._last_modification = None
+
+    def _write_tableau_ket(self, tableau, column):
+        x_masks, z_masks, phases = tableau.get_pauli_masks()
+        if self._real and np.any(phases % 2):
+            raise ValueError("A real basis only takes real stabilizer states")
+        ket = self._storage[:, column]
+        ket[_get_support_offset(tableau=tableau)] = 1
+        for x_mask, z_mask, phase in zip(x_masks, z_masks, phases):
+            squared_norms = apply_identity_plus_pauli(source=ket, target=ket, x_mask=x_mask, z_mask=z_mask,
+                                                      phase=phase, chunk_size=self._chunk_size)
+        norm = np.sqrt(np.sum(squared_norms))
+        for start in range(0, ket.shape[0], self._chunk_size):
+            ket[start:start + self._chunk_size] /= norm
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Remove the file of the kets; the basis can no longer be used."""
+        self._storage = None
+        self._finalizer()
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def number_of_qubits(self):
+        return self._number_of_qubits
+
+    @property
+    def size(self):
+        return len(self._columns)
+
+    @property
+    def is_real(self):
+        return self._real
+
+    @property
+    def chunk_size(self):
+        return self._chunk_size
+
+    @property
+    def tableaux(self):
+        return list(self._tableaux)
+
+    @property
+    def gram_matrix(self):
+        return self._gram_matrix.copy()
+
+    def get_ket(self, qstate_index):
+        """Read-only memory-mapped view of the ket at `qstate_index`."""
+        ket = self._storage[:, self._columns[qstate_index]]
+        ket.flags.writeable = False
+        return ket
+
+    @property
+    def score(self):
+        """Norm of the projection of the target onto the span of this
+        basis."""
+        if self._score is None:
+            self._score = score_from_gram_matrix(gram_matrix=self._gram_matrix, overlaps=self._overlaps,
+                                                 dimension=self._storage.shape[0])
+        return self._score
+
+    def score_ket(self, ket):
+        """As :attr:`score`, for another normalized ket (one pass over all
+        kets).
+
+        Returns
+        -------
+        float
+        """
+        overlaps = np.zeros(self.size, dtype=np.result_type(self._storage.dtype, ket.dtype))
+        for start in range(0, self._storage.shape[0], self._chunk_size):
+            chunk = np.asarray(self._storage[start:start + self._chunk_size][:, self._columns])
+            _accumulate_products(total=overlaps, left=chunk, right=np.asarray(ket[start:start + self._chunk_size]))
+        return score_from_gram_matrix(gram_matrix=self._gram_matrix, overlaps=overlaps,
+                                      dimension=self._storage.shape[0])
+
+    def _get_score_without(self, qstate_index):
+        kept = [index for index in range(self.size) if index != qstate_index]
+        return score_from_gram_matrix(gram_matrix=self._gram_matrix[np.ix_(kept, kept)],
+                                      overlaps=self._overlaps[kept],
+                                      dimension=self._storage.shape[0])
+
+    def get_weakest_qstate_index(self):
+        """Index of the state whose removal reduces the score the least,
+        from the Gram matrix only.
+
+        Returns
+        -------
+        int
+        """
+        if self.size == 1:
+            return 0
+        return int(np.argmax([self._get_score_without(qstate_index=index) for index in range(self.size)]))
+
+    def remove_qstate(self, qstate_index):
+        """Leave out the state at `qstate_index` (without a pass over the
+        kets; its column of the file is no longer used). Cannot be undone."""
+        kept = [index for index in range(self.size) if index != qstate_index]
+        self._gram_matrix = self._gram_matrix[np.ix_(kept, kept)]
+        self._overlaps = self._overlaps[kept]
+        del self._columns[qstate_index]
+        del self._tableaux[qstate_index]
+        self._score = None
+        self._last_modification = None
+
+    def modify(self, qstate_index, x_mask, z_mask, phase):
+        r"""Replace the state :math:`\ket{\phi}` at `qstate_index` by
+        :math:`c(I + P)\ket{\phi}`, see
+        :meth:`~stabranksearcher.basis.Basis.deterministically_modify`.
+
+        Returns
+        -------
+        bool
+            Whether the replacement was performed, i.e. the new state is
+            nonzero, which follows from the tableau without any pass.
+        """
+        if self._real and phase % 2:
+            raise ValueError("A real basis only takes Paulis with real matrices, i.e. even phases")
+        tableau = self._tableaux[qstate_index].apply_identity_plus_pauli(x_mask=x_mask, z_mask=z_mask, phase=phase)
+        if tableau is None:
+            return False
+        new_ket = self._storage[:, self._spare_column]
+        squared_norms = apply_identity_plus_pauli(source=self._storage[:, self._columns[qstate_index]],
+                                                  target=new_ket, x_mask=x_mask, z_mask=z_mask, phase=phase,
+                                                  chunk_size=self._chunk_size)
+        norm = np.sqrt(np.sum(squared_norms))
+        columns = list(self._columns)
+        columns[qstate_index] = self._spare_column
+        gram_column = np.zeros(self.size, dtype=self._gram_matrix.dtype)
+        overlap = np.zeros(1, dtype=self._overlaps.dtype)
+        for start in range(0, self._storage.shape[0], self._chunk_size):
+            rows = slice(start, start + self._chunk_size)
+            new_ket[rows] /= norm
+            chunk = np.asarray(self._storage[rows][:, columns])
+            _accumulate_products(total=gram_column, left=chunk, right=chunk[:, qstate_index])
+            _accumulate_products(total=overlap, left=chunk[:, [qstate_index]], right=np.asarray(self._target_ket[rows]))
+        self._last_modification = (qstate_index, self._columns[qstate_index], self._tableaux[qstate_index],
+                                   self._gram_matrix.copy(), self._overlaps.copy(), self._score)
+        self._spare_column = self._columns[qstate_index]
+        self._columns[qstate_index] = columns[qstate_index]
+        self._tableaux[qstate_index] = tableau
+        self._gram_matrix[:, qstate_index] = gram_column
+        self._gram_matrix[qstate_index, :] = gram_column.conj()
+        self._overlaps[qstate_index] = overlap[0]
+        self._score = None
+        return True
+
+    def randomly_modify(self, rng=None):
+        """Modify a random state by a random Pauli (a real one if this
+        basis is real), redrawn until the new state is nonzero."""
+        rng = get_rng(rng)
+        accepted = False
+        while not accepted:
+            x_masks, z_masks, phases = get_random_pauli_masks(number_of_qubits=self._number_of_qubits, size=1,
+                                                              rng=rng, real=self._real)
+            accepted = self.modify(qstate_index=int(rng.integers(self.size)), x_mask=x_masks[0],
+                                   z_mask=z_masks[0], phase=phases[0])
+
+    def undo_last_modification(self):
+        if self._last_modification is None:
+            raise ValueError("No modification to undo")
+        qstate_index, column, tableau, gram_matrix, overlaps, score = self._last_modification
+        self._spare_column = self._columns[qstate_index]
+        self._columns[qstate_index] = column
+        self._tableaux[qstate_index] = tableau
+        self._gram_matrix, self._overlaps, self._score = gram_matrix, overlaps, score
+        self._last_modification = None
+
+    def to_basis(self):
+        """The same basis in memory (only for few qubits).
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.basis.Basis`
+        """
+        return Basis(kets=self._storage[:, self._columns], tableaux=self._tableaux, real=self._real)
+
+
+def get_random_computational_basis_tableaux(number_of_qubits, size, rng=None):
+    """Tableaux of `size` random computational basis states, e.g. to
+    start an out-of-core random walk from, since drawing uniformly random
+    stabilizer states takes their full kets.
+
+    Returns
+    -------
+    list of :obj:`~stabranksearcher.tableau.StabilizerTableau`
+    """
+    rng = get_rng(rng)
+    z_masks = 1 << np.arange(number_of_qubits, dtype=np.int64)
+    return [StabilizerTableau.from_pauli_masks(number_of_qubits=number_of_qubits,
+                                               x_masks=np.zeros_like(z_masks),
+                                               z_masks=z_masks,
+                                               phases=2 * rng.integers(2, size=number_of_qubits))
+            for _ in range(size)]
@@ -1,6 +1,8 @@
 import numpy as np
 import netsquid as ns
 import netsquid.qubits.qubitapi as qapi
+from netsquid.qubits.stabtools import StabRepr
+from stabranksearcher.tableau import StabilizerTableau
 
 
 def get_number_of_qubits_from_ket(ket):
@@ -14,3 +16,338 @@ def ket_to_qstate(ket):
     qapi.assign_qstate(qubits, krepr)
     return qubits[0].qstate
 
+
+def stabilizer_tableau_to_qstate(tableau):
+    """QState in the stabilizer representation of NetSquid.
+
+    Parameters
+    ----------
+    tableau: :obj:`~stabranksearcher.tableau.StabilizerTableau`
+
+    Returns
+    -------
+    :obj:`netsquid.qubits.qstate.QState`
+    """
+    srepr = StabRepr(check_matrix=np.array(tableau.check_matrix, dtype=int),
+                     phases=[int(phase) for phase in tableau.phases])
+    qubits = qapi.create_qubits(num_qubits=tableau.number_of_qubits)
+    qapi.assign_qstate(qubits, srepr)
+    return qubits[0].qstate
+
+
+def qstate_to_stabilizer_tableau(qstate):
+    """Tableau of `qstate` if it is in the stabilizer representation of
+    NetSquid, without computing its ket.
+
+    Returns
+    -------
+    :obj:`~stabranksearcher.tableau.StabilizerTableau` or None
+        None for a QState in another representation.
+    """
+    qrepr = getattr(qstate, "qrepr", None)
+    if not isinstance(qrepr, StabRepr):
+        return None
+    return StabilizerTableau(check_matrix=qrepr.check_matrix, phases=qrepr.phases)
+
+
+
+def _parity(integers):
+    """Parity of the number of ones in the binary representation
+    of each of the (non-negative) `integers`."""
+    integers = np.array(integers, dtype=np.uint64)
+    shift = 32
+    while shift > 0:
+        integers ^= integers >> np.uint64(shift)
+        shift //= 2
+    return (integers & np.uint64(1)).astype(np.int64)
+
+
+def get_pauli_masks(pauli):
+    """Bitmask representation of a Pauli string.
+
+    Parameters
+    ----------
+    pauli: :obj:`~qiskit.quantum_info.Pauli`
+
+    Returns
+    -------
+    tuple (int, int, int)
+        `(x_mask, z_mask, phase)` such that `pauli.to_matrix()` maps the
+        amplitude at index `j ^ x_mask` to index `j`, multiplied by
+        :math:`(-i)^{phase} (-1)^{|j \\& z_{mask}|}`,
+        see :func:`apply_paulis`.
+    """
+    twos = 1 << np.arange(pauli.num_qubits, dtype=np.int64)
+    x = np.asarray(pauli.x, dtype=bool)
+    z = np.asarray(pauli.z, dtype=bool)
+    x_mask = int(np.dot(x, twos))
+    z_mask = int(np.dot(z, twos))
+    phase = int(pauli.phase + np.sum(x & z)) % 4
+    return x_mask, z_mask, phase
+
+
+def get_random_pauli_masks(number_of_qubits, size, rng, real=False):
+    """Bitmasks of `size` uniformly random Paulis (including phase), see
+    :func:`get_pauli_masks`.
+
+    Parameters
+    ----------
+    number_of_qubits: int
+    size: int
+    rng: :obj:`numpy.random.Generator`
+    real: bool
+        Whether to draw only the Paulis with real matrices, i.e. with
+        phase :math:`\\pm 1` in front of :math:`Z^z X^x`, which map real
+        kets to real kets.
+
+    Returns
+    -------
+    tuple (numpy array of int, numpy array of int, numpy array of int)
+    """
+    dimension = 2 ** number_of_qubits
+    x_masks = rng.integers(dimension, size=size)
+    z_masks = rng.integers(dimension, size=size)
+    phases = 2 * rng.integers(2, size=size) if real else rng.integers(4, size=size)
+    return x_masks, z_masks, phases
+
+
+def get_real_kets(kets, atol=1e-10):
+    """The columns of `kets` as real vectors, each multiplied by the global
+    phase that makes its largest amplitude real and positive.
+
+    Parameters
+    ----------
+    kets: numpy array
+        A single ket, or a matrix with kets as columns.
+    atol: float
+        Absolute tolerance on the imaginary parts after removing the
+        global phases.
+
+    Returns
+    -------
+    numpy array of float or None
+        Of the same shape as `kets`, or None if some ket is not real up to
+        a global phase.
+    """
+    kets = np.asarray(kets)
+    if np.isrealobj(kets):
+        return kets.astype(np.float64)
+    columns = np.reshape(kets, (kets.shape[0], -1))
+    largest_amplitudes = columns[np.argmax(np.abs(columns), axis=0), np.arange(columns.shape[1])]
+    global_phases = np.ones(columns.shape[1], dtype=np.complex128)
+    is_nonzero = largest_amplitudes != 0
+    global_phases[is_nonzero] = np.abs(largest_amplitudes[is_nonzero]) / largest_amplitudes[is_nonzero]
+    columns = columns * global_phases
+    if not np.allclose(columns.imag, 0., atol=atol):
+        return None
+    return np.reshape(columns.real, kets.shape)
+
+
+def apply_paulis(kets, x_masks, z_masks, phases):
+    """Apply a Pauli string to each column of `kets`, without building
+    the Pauli matrices.
+
+    Parameters
+    ----------
+    kets: numpy array
+        Matrix of size `2^{number_of_qubits}` x `m`.
+    x_masks: numpy array of int
+        The X-part of each of the `m` Paulis, see :func:`get_pauli_masks`.
+    z_masks: numpy array of int
+        The Z-part of each of the `m` Paulis.
+    phases: numpy array of int
+        The phase of each of the `m` Paulis, as power of :math:`-i`.
+
+    Returns
+    -------
+    numpy array
+        Matrix of the same size as `kets`; real if `kets` is real and all
+        phases are even.
+    """
+    indices = np.arange(kets.shape[0], dtype=np.int64)[:, np.newaxis]
+    x_masks = np.asarray(x_masks, dtype=np.int64)[np.newaxis, :]
+    z_masks = np.asarray(z_masks, dtype=np.int64)[np.newaxis, :]
+    signs = 1 - 2 * _parity(indices & z_masks)
+    phases = np.asarray(phases)[np.newaxis, :]
+    if np.isrealobj(kets) and not np.any(phases % 2):
+        coefficients = 1 - phases % 4
+    else:
+        coefficients = (-1j) ** phases
+    columns = np.arange(kets.shape[1])[np.newaxis, :]
+    return coefficients * signs * kets[indices ^ x_masks, columns]
+
+
+def _get_echelon_rows(masks, parities=None):
+    """Gaussian elimination over GF(2) of the rows `masks`, each optionally
+    augmented with a parity.
+
+    Returns
+    -------
+    dict or None
+        Maps each pivot (highest) bit to its reduced row `(mask, parity)`,
+        or None if the augmented system is inconsistent.
+    """
+    if parities is None:
+        parities = [0] * len(masks)
+    rows = {}
+    for mask, parity in zip(masks, parities):
+        mask, parity = int(mask), int(parity)
+        while mask:
+            pivot_bit = mask.bit_length() - 1
+            if pivot_bit not in rows:
+                rows[pivot_bit] = (mask, parity)
+                break
+            mask ^= rows[pivot_bit][0]
+            parity ^= rows[pivot_bit][1]
+        if mask == 0 and parity == 1:
+            return None
+    return rows
+
+
+def _solve_parities(masks, parities):
+    """An integer `j` with `parity(masks[k] & j) == parities[k]` for all `k`,
+    or None if there is none."""
+    rows = _get_echelon_rows(masks=masks, parities=parities)
+    if rows is None:
+        return None
+    solution = 0
+    # a row only has bits at or below its pivot bit
+    for pivot_bit in sorted(rows):
+        mask, parity = rows[pivot_bit]
+        if bin(mask & solution).count("1") % 2 != parity:
+            solution ^= 1 << pivot_bit
+    return solution
+
+
+def _get_orthogonal_complement(masks, number_of_qubits):
+    """Basis of the integers z with parity(z & v) = 0 for all v in `masks`."""
+    rows = {pivot_bit: mask for pivot_bit, (mask, _) in _get_echelon_rows(masks=masks).items()}
+    # reduce fully, so that each pivot bit occurs in a single row
+    for pivot_bit in sorted(rows):
+        for other_pivot_bit in rows:
+            if other_pivot_bit != pivot_bit and rows[other_pivot_bit] & (1 << pivot_bit):
+                rows[other_pivot_bit] ^= rows[pivot_bit]
+    complement = []
+    for free_bit in range(number_of_qubits):
+        if free_bit in rows:
+            continue
+        z = 1 << free_bit
+        for pivot_bit, mask in rows.items():
+            if mask & (1 << free_bit):
+                z |= 1 << pivot_bit
+        complement.append(z)
+    return complement
+
+
+def get_stabilizer_tableau(ket, atol=1e-8):
+    """Test whether `ket` is (up to normalization and global phase) a
+    stabilizer state, in time O(n 2^n) for n qubits.
+
+    A state is a stabilizer state if and only if its support is an affine
+    subspace j_0 + V of {0, 1}^n, its nonzero amplitudes have equal
+    magnitude, and for every v in V there is a Pauli of the form
+    :math:`Z^z X^v` (up to phase) that stabilizes it, i.e. the phases of
+    the amplitudes form a quadratic form on the support. This function
+    checks these conditions and reads off the stabilizer generators.
+
+    Parameters
+    ----------
+    ket: numpy array
+    atol: float
+        Absolute tolerance on the (normalized) amplitudes.
+
+    Returns
+    -------
+    :obj:`~stabranksearcher.tableau.StabilizerTableau` or None
+        The stabilizer generators of `ket`, or None if it is not a
+        stabilizer state.
+    """
+    ket = np.ravel(np.asarray(ket, dtype=np.complex128))
+    ket = ket / np.linalg.norm(ket)
+    number_of_qubits = get_number_of_qubits_from_ket(ket=ket)
+    support = np.flatnonzero(np.abs(ket) > atol)
+    if support.size & (support.size - 1) != 0:
+        return None
+    if not np.allclose(np.abs(ket[support]), 1 / np.sqrt(support.size), atol=atol):
+        return None
+
+    # the support shifted by its first element should be a linear
+    # subspace V
+    offset = int(support[0])
+    subspace_basis = [mask for mask, _ in _get_echelon_rows(masks=support ^ offset).values()]
+    if 2 ** len(subspace_basis) != support.size:
+        return None
+
+    x_masks, z_masks, phases = [], [], []
+
+    # Z-type generators: the orthogonal complement of V
+    complement = _get_orthogonal_complement(masks=subspace_basis, number_of_qubits=number_of_qubits)
+    for z_mask in complement:
+        x_masks.append(0)
+        z_masks.append(z_mask)
+        phases.append(2 * _parity([z_mask & offset])[0])
+
+    # X-type generators: one per basis vector v of V, with Z-part fixed
+    # by the ratios of the amplitudes at j ^ v and j
+    for x_mask in subspace_basis:
+        ratios = ket[support ^ x_mask] / ket[support]
+        reference = ratios[0]
+        signs = ratios / reference
+        z_parities = [int(np.real(signs[np.searchsorted(support, offset ^ basis_element)]) < 0)
+                      for basis_element in subspace_basis]
+        z_mask = _solve_parities(masks=subspace_basis, parities=z_parities)
+        expected_signs = 1 - 2 * _parity((support ^ offset) & z_mask)
+        if not np.allclose(signs, expected_signs, atol=atol):
+            return None
+        # (-i)^phase Z^z X^v maps ket[j ^ v] to position j with factor
+        # (-i)^phase (-1)^{z.j}; it stabilizes if that equals ket[j] / ket[j ^ v]
+        power = np.angle(reference * (1 - 2 * _parity([z_mask & offset])[0])) / (np.pi / 2)
+        if not np.isclose(power, np.round(power), atol=atol):
+            return None
+        x_masks.append(x_mask)
+        z_masks.append(z_mask)
+        phases.append(int(np.round(power)) % 4)
+    try:
+        return StabilizerTableau.from_pauli_masks(number_of_qubits=number_of_qubits,
+                                                  x_masks=x_masks, z_masks=z_masks, phases=phases)
+    except ValueError:
+        return None
+
+
+def is_stabilizer_state(ket, atol=1e-8):
+    """Whether `ket` is a stabilizer state, see :func:`get_stabilizer_tableau`."""
+    return get_stabilizer_tableau(ket=ket, atol=atol) is not None
+
+
+def _get_support_offset(tableau):
+    """An index at which the state of `tableau` has a nonzero amplitude;
+    the product of the projectors (I + g) / 2 on the generators g applied
+    to that basis state is a positive multiple of the state."""
+    reduced_x_masks, reduced_z_masks, reduced_phases = tableau.get_reduced().get_pauli_masks()
+    # the generators without X-part fix the parities of the indices in the support
+    is_diagonal = reduced_x_masks == 0
+    return _solve_parities(masks=reduced_z_masks[is_diagonal], parities=reduced_phases[is_diagonal] // 2)
+
+
+def stabilizer_tableau_to_ket(tableau):
+    """The normalized ket stabilized by `tableau`, with its first nonzero
+    amplitude real and positive.
+
+    Parameters
+    ----------
+    tableau: :obj:`~stabranksearcher.tableau.StabilizerTableau`
+
+    Returns
+    -------
+    numpy array
+    """
+    offset = _get_support_offset(tableau=tableau)
+    ket = np.zeros((2 ** tableau.number_of_qubits, 1), dtype=np.complex128)
+    ket[offset] = 1
+    x_masks, z_masks, phases = tableau.get_pauli_masks()
+    for x_mask, z_mask, phase in zip(x_masks, z_masks, phases):
+        ket = (ket + apply_paulis(kets=ket, x_masks=[x_mask], z_masks=[z_mask], phases=[phase])) / 2
+    ket = ket[:, 0]
+    ket /= np.linalg.norm(ket)
+    first_amplitude = ket[np.flatnonzero(np.abs(ket) > 1e-12)[0]]
+    return ket * np.abs(first_amplitude) / first_amplitude
@@ -1,20 +1,202 @@
+import time
 import numpy as np
 import netsquid as ns
 from stabranksearcher.stab_basis_provider.stab_basis_provider import StabBasisProvider
 from stabranksearcher.stab_basis_provider.brute_force import BruteForceStabBasisProvider
 from stabranksearcher.stab_basis_provider.random import RandomStabBasisProvider
 from stabranksearcher.stab_basis_provider.random_walk import RandomWalkStabBasisProvider, SimulatedAnnealingMoveDecider
-from stabranksearcher.quantum_state_tools import ket_to_qstate
+from stabranksearcher.stab_basis_provider.vectorized_random_walk import VectorizedRandomWalkStabBasisProvider
+from stabranksearcher.stab_basis_provider.stagnation import RestartStatistics
+from stabranksearcher.basis import Basis
+from stabranksearcher.candidate_pool import StabilizerStatePool
+from stabranksearcher.out_of_core import (
+    OutOfCoreBasis,
+    DEFAULT_MEMORY_BUDGET,
+    get_random_computational_basis_tableaux)
+from stabranksearcher.quantum_state_tools import ket_to_qstate, get_stabilizer_tableau
+from stabranksearcher.rng import get_rng
+from stabranksearcher.search_result import (
+    SearchResult,
+    FOUND,
+    KNOWN,
+    BUDGET_EXHAUSTED,
+    DEADLINE_REACHED,
+    CANCELLED)
+
+
+def get_betas(beta_init, beta_final, number_of_betas):
+    """The values of beta of an annealing schedule: from `beta_init`
+    up to (but excluding) `beta_final` in steps of
+    (`beta_final` - `beta_init`) / `number_of_betas`.
+
+    Returns
+    -------
+    list of float
+    """
+    beta_step = (beta_final - beta_init) / number_of_betas
+    betas = []
+    beta = beta_init
+    while beta < beta_final:
+        betas.append(beta)
+        beta += beta_step
+    return betas
 
 
 class StabRankSearcher:
+    """
+    Parameters
+    ----------
+    rng: :obj:`numpy.random.Generator`, int or None
+        Source of randomness of the search. Pass a seed for reproducible
+        runs, or one of the generators from
+        :func:`~stabranksearcher.rng.spawn_rngs` per parallel worker.
+    result_store: :obj:`~stabranksearcher.result_store.ResultStore` or None
+        If given, queries for which the store already holds a solution
+        are answered from the store without searching, and the outcome
+        of every search is recorded in it.
+    check_stabilizer_state: bool
+        Whether to first test if the target is a stabilizer state, see
+        :func:`~stabranksearcher.quantum_state_tools.get_stabilizer_tableau`.
+        If it is, the target itself is returned as basis of size 1,
+        without searching.
+    time_limit: float or None
+        Maximal wall-clock time in seconds of a single call to `run`.
+    cancellation_token: :obj:`~stabranksearcher.search_result.CancellationToken` or None
+        Token through which running searches can be cancelled.
 
-    def __init__(self):
+    Both the time limit and the cancellation token are checked before
+    every basis that is tried; a search that is stopped by either of them
+    still returns the best basis seen so far, see
+    :class:`~stabranksearcher.search_result.SearchResult`.
+    """
+
+    def __init__(self, rng=None, result_store=None, check_stabilizer_state=True, time_limit=None,
+                 cancellation_token=None):
         self._stab_basis_provider = None
+        self._rng = get_rng(rng)
+        self._result_store = result_store
+        self._check_stabilizer_state = check_stabilizer_state
+        self._time_limit = time_limit
+        self._cancellation_token = cancellation_token
+        self._deadline = None
+        self._progress_callback = None
 
     def reset(self):
         pass
 
+    @property
+    def progress_callback(self):
+        """Function that is called with this searcher as only argument
+        after every basis that is tried, e.g. for reporting progress.
+        It may raise an exception to abort the search."""
+        return self._progress_callback
+
+    @progress_callback.setter
+    def progress_callback(self, val):
+        if val is not None and not callable(val):
+            raise TypeError("{} is not callable".format(val))
+        self._progress_callback = val
+
+    def _report_progress(self):
+        if self._progress_callback is not None:
+            self._progress_callback(self)
+
+    @property
+    def result_store(self):
+        return self._result_store
+
+    @property
+    def cancellation_token(self):
+        return self._cancellation_token
+
+    def _start_clock(self):
+        """Start the time limit of a call to `run`."""
+        self._deadline = None if self._time_limit is None else time.monotonic() + self._time_limit
+
+    def _get_stop_reason(self):
+        """
+        Returns
+        -------
+        str or None
+            Why the current search should stop before trying the next
+            basis, or None if it should continue.
+        """
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            return DEADLINE_REACHED
+        if self._cancellation_token is not None and self._cancellation_token.is_cancelled:
+            return CANCELLED
+        return None
+
+    def _get_stored_solution(self, target_qstate, stabrank):
+        if self._result_store is None:
+            return None
+        return self._result_store.get_solution(target_ket=target_qstate.ket, stabrank=stabrank)
+
+    def _get_known_result(self, target_qstate, stabrank):
+        """Result with a solution from the result store or, if the target
+        is a stabilizer state, the basis consisting of the target only.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.search_result.SearchResult` or None
+        """
+        start_time = time.perf_counter()
+        basis = self._get_stored_solution(target_qstate=target_qstate, stabrank=stabrank)
+        if basis is None and self._check_stabilizer_state:
+            if get_stabilizer_tableau(ket=target_qstate.ket) is not None:
+                target_ket = target_qstate.ket / np.linalg.norm(target_qstate.ket)
+                basis = Basis(kets=target_ket)
+                self._store_result(target_qstate=target_qstate,
+                                   stabrank=1,
+                                   success=True,
+                                   basis=basis,
+                                   score=1.,
+                                   counter=0,
+                                   elapsed=time.perf_counter() - start_time,
+                                   number_of_bases=None)
+        if basis is None:
+            return None
+        return SearchResult(basis=basis,
+                            score=basis.score(qstate=target_qstate),
+                            stop_reason=KNOWN,
+                            elapsed=time.perf_counter() - start_time)
+
+    def _get_parameters(self):
+        """
+        Returns
+        -------
+        dict
+            The parameters of this searcher, as recorded in the result store.
+        """
+        return {}
+
+    def _store_result(self, target_qstate, stabrank, success, basis, score, counter, elapsed,
+                      number_of_bases):
+        if self._result_store is None:
+            return
+        parameters = self._get_parameters()
+        parameters["number_of_bases"] = number_of_bases
+        self._result_store.record(target_ket=target_qstate.ket,
+                                  stabrank=stabrank,
+                                  success=success,
+                                  basis=basis,
+                                  score=score,
+                                  counter=counter,
+                                  elapsed=elapsed,
+                                  searcher=type(self).__name__,
+                                  parameters=parameters)
+
+    @staticmethod
+    def _stack_target_kets(target_qstates):
+        """Matrix with the kets of `target_qstates` (all on the same number
+        of qubits) as columns."""
+        for target_qstate in target_qstates:
+            if not isinstance(target_qstate, ns.qubits.qstate.QState):
+                raise TypeError
+        if len({target_qstate.num_qubits for target_qstate in target_qstates}) > 1:
+            raise ValueError("All targets should have the same number of qubits")
+        return np.hstack([np.reshape(target_qstate.ket, (-1, 1)) for target_qstate in target_qstates])
+
     @property
     def stab_basis_provider(self):
         return self._stab_basis_provider
@@ -32,17 +214,138 @@ class StabRankSearcher:
 
 
 class BruteForceStabRankSearcher(StabRankSearcher):
+    """Exhaustive search over all tuples of stabilizer states, of
+    increasing size, for the smallest one that spans the target.
 
-    def run(self, ket):
-        self._stab_basis_provider = \
-            BruteForceStabBasisProvider(number_of_qubits=ket.num_qubits)
-        super().run()
-        basis = self._stab_basis_provider.get_next_basis()
-        while basis is not None:
-            outcome = basis.does_qstate_live_in_subspace(ket)
-            if outcome:
-                return basis
-            basis = self._stab_basis_provider.get_next_basis()
+    The tuples of a given size are enumerated as a depth-first search over
+    sorted indices of the stabilizer states, so that tuples sharing their
+    first states share the orthogonalization of those states: each level
+    of the tree adds a single column to the partial orthonormal basis and
+    to the projection of the target onto it. Branches whose newly added
+    state lies in the span of the states above it are cut off, since
+    every tuple below them is linearly dependent.
+    """
+
+    def __init__(self, rng=None, result_store=None, check_stabilizer_state=True, time_limit=None,
+                 cancellation_token=None):
+        super().__init__(rng=rng, result_store=result_store, check_stabilizer_state=check_stabilizer_state,
+                         time_limit=time_limit, cancellation_token=cancellation_token)
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self._counter = 0
+        self._stop_reason = None
+        self._best_leaf = (None, -1.)
+
+    @property
+    def counter(self):
+        """Number of nodes of the search tree visited (i.e. number of
+        columns orthogonalized) since the last reset."""
+        return self._counter
+
+    def run(self, ket, stabrank=None):
+        """
+        Parameters
+        ----------
+        ket: QState
+            The target state.
+        stabrank: int or None
+            Largest size of the tuples that are tried; defaults to the
+            dimension of the state space.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.search_result.SearchResult`
+            If successful, its basis is a smallest basis of stabilizer
+            states whose span contains the target.
+        """
+        if stabrank is None:
+            stabrank = 2 ** ket.num_qubits
+        known_result = self._get_known_result(target_qstate=ket, stabrank=stabrank)
+        if known_result is not None:
+            return known_result
+        self._start_clock()
+        start_time = time.perf_counter()
+        start_counter = self._counter
+        qstates = list(BruteForceStabBasisProvider.get_all_stabilizer_states(
+            number_of_qubits=ket.num_qubits))
+        state_kets = np.hstack([qstate.ket for qstate in qstates]).astype(np.complex128)
+        target_ket = np.ravel(ket.ket) / np.linalg.norm(ket.ket)
+        self._stop_reason = None
+        self._best_leaf = (None, -1.)
+        for size in range(1, stabrank + 1):
+            self._depth_first_search(
+                state_kets=state_kets,
+                target_ket=target_ket,
+                size=size,
+                orthonormal_kets=np.zeros((target_ket.size, 0), dtype=np.complex128),
+                squared_score=0.,
+                start=0)
+            if self._stop_reason is not None:
+                break
+        best_indices, best_squared_score = self._best_leaf
+        basis = None if best_indices is None else Basis(qstates=[qstates[index] for index in best_indices])
+        score = None if best_indices is None else np.sqrt(best_squared_score)
+        stop_reason = BUDGET_EXHAUSTED if self._stop_reason is None else self._stop_reason
+        elapsed = time.perf_counter() - start_time
+        self._store_result(target_qstate=ket,
+                           stabrank=basis.size if stop_reason == FOUND else stabrank,
+                           success=stop_reason == FOUND,
+                           basis=basis,
+                           score=score,
+                           counter=self._counter - start_counter,
+                           elapsed=elapsed,
+                           number_of_bases=None)
+        return SearchResult(basis=basis,
+                            score=score,
+                            stop_reason=stop_reason,
+                            counter=self._counter - start_counter,
+                            elapsed=elapsed)
+
+    def _depth_first_search(self, state_kets, target_ket, size, orthonormal_kets, squared_score, start,
+                            indices=()):
+        """
+        Returns
+        -------
+        list of int or None
+            Indices of a tuple of `size` states, extending the states
+            `indices` spanning `orthonormal_kets` by states at indices
+            from `start` onwards, whose span contains the target. On
+            success, or when the search should stop, `_stop_reason` is set.
+        """
+        if self._stop_reason is None:
+            self._stop_reason = self._get_stop_reason()
+        if self._stop_reason is not None:
+            return None
+        depth = orthonormal_kets.shape[1]
+        if depth == size:
+            if squared_score > self._best_leaf[1]:
+                self._best_leaf = (list(indices), squared_score)
+            if np.isclose(np.sqrt(squared_score), 1):
+                self._stop_reason = FOUND
+                return []
+            return None
+        stop = state_kets.shape[1] - (size - depth) + 1
+        if start >= stop:
+            return None
+        # orthogonalize all candidates for this level at once
+        candidate_kets = state_kets[:, start:stop]
+        orthogonal_parts = candidate_kets - orthonormal_kets.dot(orthonormal_kets.conj().T.dot(candidate_kets))
+        norms = np.linalg.norm(orthogonal_parts, axis=0)
+        for offset in np.flatnonzero(norms > Basis._INDEPENDENCE_TOLERANCE):
+            self._counter += 1
+            new_ket = orthogonal_parts[:, offset] / norms[offset]
+            found_indices = self._depth_first_search(
+                state_kets=state_kets,
+                target_ket=target_ket,
+                size=size,
+                orthonormal_kets=np.column_stack((orthonormal_kets, new_ket)),
+                squared_score=squared_score + np.abs(np.vdot(new_ket, target_ket)) ** 2,
+                start=start + offset + 1,
+                indices=indices + (start + offset,))
+            if found_indices is not None:
+                return [start + offset] + found_indices
         return None
 
 
@@ -50,8 +353,10 @@ class NRandomStabRankSearcher(StabRankSearcher):
 
     STAB_BASIS_PROVIDER_CLS = RandomStabBasisProvider
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng=None, result_store=None, check_stabilizer_state=True, time_limit=None,
+                 cancellation_token=None):
+        super().__init__(rng=rng, result_store=result_store, check_stabilizer_state=check_stabilizer_state,
+                         time_limit=time_limit, cancellation_token=cancellation_token)
         self.reset()
 
     def reset(self):
@@ -63,56 +368,816 @@ class NRandomStabRankSearcher(StabRankSearcher):
         return self._counter
 
     def run(self, target_qstate, stabrank=1, number_of_bases=1):
+        """
+        Parameters
+        ----------
+        target_qstate: QState
+        stabrank: int
+        number_of_bases: int
+            Maximal number of random bases drawn.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.search_result.SearchResult`
+        """
         if not isinstance(target_qstate, ns.qubits.qstate.QState):
             raise TypeError
+        known_result = self._get_known_result(target_qstate=target_qstate, stabrank=stabrank)
+        if known_result is not None:
+            return known_result
         self._stab_basis_provider = \
             self.STAB_BASIS_PROVIDER_CLS(number_of_qubits=target_qstate.num_qubits,
-                                         stabrank=stabrank)
+                                         stabrank=stabrank,
+                                         rng=self._rng)
         super().run()
+        self._start_clock()
+        start_time = time.perf_counter()
+        start_counter = self._counter
+        best_basis = None
+        best_score = None
+        stop_reason = BUDGET_EXHAUSTED
         while self._counter < number_of_bases:
+            interruption = self._get_stop_reason()
+            if interruption is not None:
+                stop_reason = interruption
+                break
             self._counter += 1
             basis = self._stab_basis_provider.get_next_basis()
-            if basis.does_qstate_live_in_subspace(target_qstate):
-                return basis
-        return None
+            self._report_progress()
+            score = basis.score(qstate=target_qstate)
+            if best_score is None or score > best_score:
+                best_basis, best_score = basis, score
+            if np.isclose(score, 1):
+                stop_reason = FOUND
+                break
+        elapsed = time.perf_counter() - start_time
+        self._store_result(target_qstate=target_qstate,
+                           stabrank=stabrank,
+                           success=stop_reason == FOUND,
+                           basis=best_basis,
+                           score=best_score,
+                           counter=self._counter - start_counter,
+                           elapsed=elapsed,
+                           number_of_bases=number_of_bases)
+        return SearchResult(basis=best_basis,
+                            score=best_score,
+                            stop_reason=stop_reason,
+                            counter=self._counter - start_counter,
+                            elapsed=elapsed)
+
+    def run_multiple(self, target_qstates, stabrank=1, number_of_bases=1):
+        """Search for several targets on the same number of qubits at once,
+        e.g. the Dicke states of all Hamming weights. Every random basis is
+        scored against all targets that are not spanned yet, by projecting
+        the stacked target kets in a single matrix product.
+
+        Parameters
+        ----------
+        target_qstates: list of QState
+        stabrank: int
+        number_of_bases: int
+            Maximal number of random bases drawn.
+
+        Returns
+        -------
+        list of :obj:`~stabranksearcher.search_result.SearchResult`
+            Per target; if successful, with the first basis found that
+            spans it.
+        """
+        target_kets = self._stack_target_kets(target_qstates=target_qstates)
+        results = [self._get_known_result(target_qstate=target_qstate, stabrank=stabrank)
+                   for target_qstate in target_qstates]
+        unsolved_indices = [index for index, result in enumerate(results) if result is None]
+        if not unsolved_indices:
+            return results
+        self._stab_basis_provider = \
+            self.STAB_BASIS_PROVIDER_CLS(number_of_qubits=target_qstates[0].num_qubits,
+                                         stabrank=stabrank,
+                                         rng=self._rng)
+        super().run()
+        self._start_clock()
+        start_time = time.perf_counter()
+        best_bases = {index: None for index in unsolved_indices}
+        best_scores = {index: -1. for index in unsolved_indices}
+        counters = {}
+        number_of_bases_drawn = 0
+        stop_reason = BUDGET_EXHAUSTED
+        while number_of_bases_drawn < number_of_bases and len(counters) < len(unsolved_indices):
+            interruption = self._get_stop_reason()
+            if interruption is not None:
+                stop_reason = interruption
+                break
+            number_of_bases_drawn += 1
+            self._counter += 1
+            basis = self._stab_basis_provider.get_next_basis()
+            self._report_progress()
+            remaining_indices = [index for index in unsolved_indices if index not in counters]
+            scores = basis.score_kets(kets=target_kets[:, remaining_indices])
+            for index, score in zip(remaining_indices, scores):
+                if score > best_scores[index]:
+                    best_bases[index], best_scores[index] = basis, score
+                if np.isclose(score, 1):
+                    counters[index] = number_of_bases_drawn
+        elapsed = time.perf_counter() - start_time
+        for index in unsolved_indices:
+            success = index in counters
+            best_score = None if best_bases[index] is None else best_scores[index]
+            self._store_result(target_qstate=target_qstates[index],
+                               stabrank=stabrank,
+                               success=success,
+                               basis=best_bases[index],
+                               score=best_score,
+                               counter=counters.get(index, number_of_bases_drawn),
+                               elapsed=elapsed,
+                               number_of_bases=number_of_bases)
+            results[index] = SearchResult(basis=best_bases[index],
+                                          score=best_score,
+                                          stop_reason=FOUND if success else stop_reason,
+                                          counter=counters.get(index, number_of_bases_drawn),
+                                          elapsed=elapsed)
+        return results
+
+
+class GreedyPursuitStabRankSearcher(StabRankSearcher):
+    """Builds a basis greedily from a pool of random stabilizer states,
+    see :meth:`~stabranksearcher.candidate_pool.StabilizerStatePool.get_greedy_basis`.
+
+    The pool is sampled once per number of qubits and reused for later
+    targets. If the greedy basis does not span the target, it can still
+    serve as `initial_basis` of :meth:`RandomWalkStabRankSearcher.run`.
+
+    Parameters
+    ----------
+    pool_size: int
+        Number of stabilizer states in the pool.
+    rng: :obj:`numpy.random.Generator`, int or None
+    result_store: :obj:`~stabranksearcher.result_store.ResultStore` or None
+    """
+
+    def __init__(self, pool_size=1000, rng=None, result_store=None, check_stabilizer_state=True,
+                 time_limit=None, cancellation_token=None):
+        super().__init__(rng=rng, result_store=result_store, check_stabilizer_state=check_stabilizer_state,
+                         time_limit=time_limit, cancellation_token=cancellation_token)
+        self._pool_size = pool_size
+        self._pool = None
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self._counter = 0
+        self._best_basis = None
+        self._best_score = None
+
+    @property
+    def counter(self):
+        """Number of pool states scored since the last reset."""
+        return self._counter
+
+    @property
+    def pool(self):
+        """:obj:`~stabranksearcher.candidate_pool.StabilizerStatePool` or None"""
+        return self._pool
+
+    @property
+    def best_basis(self):
+        """The greedy basis of the last call to :meth:`run`."""
+        return self._best_basis
+
+    @property
+    def best_score(self):
+        return self._best_score
+
+    def _get_parameters(self):
+        return {"pool_size": self._pool_size}
+
+    def run(self, target_qstate, stabrank=1, pool=None):
+        """
+        Parameters
+        ----------
+        target_qstate: QState
+        stabrank: int
+        pool: :obj:`~stabranksearcher.candidate_pool.StabilizerStatePool` or None
+            Pool to choose the states from. If None, the pool of this
+            searcher is used, which is sampled first if needed.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.search_result.SearchResult`
+        """
+        if not isinstance(target_qstate, ns.qubits.qstate.QState):
+            raise TypeError
+        known_result = self._get_known_result(target_qstate=target_qstate, stabrank=stabrank)
+        if known_result is not None:
+            return known_result
+        self._start_clock()
+        start_time = time.perf_counter()
+        stop_reason = self._get_stop_reason()
+        if stop_reason is not None:
+            return SearchResult(basis=None, score=None, stop_reason=stop_reason)
+        if pool is None:
+            if self._pool is None or self._pool.number_of_qubits != target_qstate.num_qubits:
+                self._pool = StabilizerStatePool.sample(number_of_qubits=target_qstate.num_qubits,
+                                                        size=self._pool_size,
+                                                        rng=self._rng)
+            pool = self._pool
+        target_ket = np.ravel(target_qstate.ket)
+        self._best_basis, self._best_score = \
+            pool.get_greedy_basis(ket=target_ket / np.linalg.norm(target_ket), stabrank=stabrank)
+        self._counter += pool.size
+        self._report_progress()
+        stop_reason = FOUND if np.isclose(self._best_score, 1) else BUDGET_EXHAUSTED
+        elapsed = time.perf_counter() - start_time
+        self._store_result(target_qstate=target_qstate,
+                           stabrank=stabrank,
+                           success=stop_reason == FOUND,
+                           basis=self._best_basis,
+                           score=self._best_score,
+                           counter=pool.size,
+                           elapsed=elapsed,
+                           number_of_bases=None)
+        return SearchResult(basis=self._best_basis,
+                            score=self._best_score,
+                            stop_reason=stop_reason,
+                            counter=pool.size,
+                            elapsed=elapsed)
 
 
 class RandomWalkStabRankSearcher(StabRankSearcher):
+    """
+    Parameters
+    ----------
+    beta_init: float
+    beta_final: float
+    number_of_betas: int
+    rng: :obj:`numpy.random.Generator`, int or None
+    result_store: :obj:`~stabranksearcher.result_store.ResultStore` or None
+    warm_start: bool
+        Whether to start from the stored basis for the nearest stabilizer
+        rank, see :meth:`run`.
+    stagnation_detector: :obj:`~stabranksearcher.stab_basis_provider.stagnation.StagnationDetector` or None
+    restart_policy: :obj:`~stabranksearcher.stab_basis_provider.stagnation.RestartPolicy` or None
+        Applied whenever `stagnation_detector` detects that the walk has
+        stagnated. Should be given together with `stagnation_detector`.
+        Without them, the walk always spends its full budget of
+        `number_of_bases` steps per value of beta (unless it succeeds).
+    number_of_proposals: int
+        Number of random neighbours scored per step, of which one is
+        proposed to the annealing move decider.
+    proposal_selection: str
+        "best" or "boltzmann", see
+        :meth:`~stabranksearcher.stab_basis_provider.random_walk.BasisWithTargetState.move`.
+    real: bool or None
+        Whether to walk over real stabilizer states only, in real
+        arithmetic; None does so for real targets, see
+        :class:`~stabranksearcher.stab_basis_provider.random_walk.RandomWalkStabBasisProvider`.
+    """
 
     STAB_BASIS_PROVIDER_CLS = RandomWalkStabBasisProvider
 
-    def __init__(self, beta_init, beta_final, number_of_betas):
-        super().__init__()
+    def __init__(self, beta_init, beta_final, number_of_betas, rng=None, result_store=None,
+                 warm_start=False, stagnation_detector=None, restart_policy=None,
+                 number_of_proposals=1, proposal_selection="best", check_stabilizer_state=True,
+                 time_limit=None, cancellation_token=None, real=None):
+        super().__init__(rng=rng, result_store=result_store, check_stabilizer_state=check_stabilizer_state,
+                         time_limit=time_limit, cancellation_token=cancellation_token)
+        if (stagnation_detector is None) != (restart_policy is None):
+            raise ValueError("Either give both stagnation_detector and restart_policy, or neither")
+        self._stagnation_detector = stagnation_detector
+        self._restart_policy = restart_policy
+        self._warm_start = warm_start
+        self._number_of_proposals = number_of_proposals
+        self._proposal_selection = proposal_selection
+        self._real = real
         self._beta_init = beta_init
         self._beta_final = beta_final
         self._number_of_betas = number_of_betas
-        self._beta_step = (self._beta_final - self._beta_init) / number_of_betas
+        self._other_targets = None
         self.reset()
 
     def reset(self):
         self._total_counter = 0
+        self._best_basis = None
+        self._best_score = None
+        self._restart_statistics = RestartStatistics()
+
+    @property
+    def restart_statistics(self):
+        """:obj:`~stabranksearcher.stab_basis_provider.stagnation.RestartStatistics`
+        accumulated over all calls to :meth:`run` since the last reset."""
+        return self._restart_statistics
+
+    def _get_betas(self):
+        return get_betas(beta_init=self._beta_init, beta_final=self._beta_final,
+                         number_of_betas=self._number_of_betas)
+
+    def _is_stagnant(self, score):
+        if self._stagnation_detector is None:
+            return False
+        accepted = self.stab_basis_provider.last_move_accepted
+        return self._stagnation_detector.update(score=score, accepted=accepted is not False)
 
     @property
     def counter(self):
         return self._total_counter
 
-    def run(self, target_qstate, stabrank=1, number_of_bases=1):
+    @property
+    def best_basis(self):
+        """Snapshot of the basis with the highest score seen during
+        the last call to :meth:`run`."""
+        return self._best_basis
+
+    @property
+    def best_score(self):
+        return self._best_score
+
+    def _record_if_best(self, basis, score):
+        if self._best_score is None or score > self._best_score:
+            self._best_basis = basis.snapshot()
+            self._best_score = score
+
+    class _OtherTargets:
+        """Targets that the bases visited by a walk are checked against,
+        see :meth:`RandomWalkStabRankSearcher.run_multiple`."""
+
+        def __init__(self, target_kets):
+            self.target_kets = target_kets
+            self.solutions = [None] * target_kets.shape[1]
+            self.counters = [None] * target_kets.shape[1]
+            self.walked_index = None
+
+        def get_unsolved_indices(self):
+            return [index for index, solution in enumerate(self.solutions)
+                    if solution is None and index != self.walked_index]
+
+    def _check_other_targets(self, basis, counter):
+        if self._other_targets is None:
+            return
+        unsolved_indices = self._other_targets.get_unsolved_indices()
+        if not unsolved_indices:
+            return
+        scores = basis.score_kets(kets=self._other_targets.target_kets[:, unsolved_indices])
+        for index, score in zip(unsolved_indices, scores):
+            if np.isclose(score, 1):
+                self._other_targets.solutions[index] = basis.snapshot()
+                self._other_targets.counters[index] = counter
+
+    def _get_parameters(self):
+        return {"beta_init": self._beta_init,
+                "beta_final": self._beta_final,
+                "number_of_betas": self._number_of_betas,
+                "number_of_proposals": self._number_of_proposals,
+                "proposal_selection": self._proposal_selection,
+                "real": self._real}
+
+    def run(self, target_qstate, stabrank=1, number_of_bases=1, initial_basis=None):
+        """
+        Parameters
+        ----------
+        target_qstate: QState
+        stabrank: int
+        number_of_bases: int
+            Number of steps of the walk per value of beta.
+        initial_basis: :obj:`~stabranksearcher.basis.Basis` or None
+            Basis to start the walk from. If None and this searcher was
+            created with `warm_start=True`, the walk starts from the
+            stored basis for the nearest stabilizer rank (if any).
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.search_result.SearchResult`
+            Its basis is a snapshot of the best basis of the walk, i.e. of
+            the basis that spans the target if one was found.
+        """
         if not isinstance(target_qstate, ns.qubits.qstate.QState):
             raise TypeError
+        known_result = self._get_known_result(target_qstate=target_qstate, stabrank=stabrank)
+        if known_result is not None:
+            return known_result
+        if initial_basis is None and self._warm_start and self._result_store is not None:
+            initial_basis = self._result_store.get_nearest_basis(target_ket=target_qstate.ket,
+                                                                 stabrank=stabrank)
         self.stab_basis_provider = \
             self.STAB_BASIS_PROVIDER_CLS(target_qstate=target_qstate,
-                                         stabrank=stabrank)
+                                         stabrank=stabrank,
+                                         rng=self._rng,
+                                         initial_basis=initial_basis,
+                                         number_of_proposals=self._number_of_proposals,
+                                         proposal_selection=self._proposal_selection,
+                                         real=self._real)
         super().run()
-        beta = self._beta_init
-        while beta < self._beta_final:
+        self._best_basis = None
+        self._best_score = None
+        self._start_clock()
+        start_time = time.perf_counter()
+        start_counter = self._total_counter
+        stop_reason = None
+        betas = self._get_betas()
+        budget = len(betas) * number_of_bases
+        number_of_steps = 0
+        last_restart_policy_name = None
+        if self._stagnation_detector is not None:
+            self._stagnation_detector.reset()
+        beta_index = 0
+        while beta_index < len(betas) and number_of_steps < budget and stop_reason is None:
             counter = 0
-            move_decider = SimulatedAnnealingMoveDecider(beta=beta)
-            while counter < number_of_bases:
+            move_decider = SimulatedAnnealingMoveDecider(beta=betas[beta_index], rng=self._rng)
+            beta_index += 1
+            while counter < number_of_bases and number_of_steps < budget:
+                stop_reason = self._get_stop_reason()
+                if stop_reason is not None:
+                    break
                 basis = self.stab_basis_provider.get_next_basis(move_decider=move_decider)
                 counter += 1
-                if basis.does_qstate_live_in_subspace(target_qstate):
-                    self._total_counter += counter
-                    return basis
-            self._total_counter += counter
-            beta += self._beta_step
-        return None
+                number_of_steps += 1
+                self._total_counter += 1
+                score = basis.score(qstate=target_qstate)
+                self._record_if_best(basis=basis, score=score)
+                self._check_other_targets(basis=basis, counter=self._total_counter - start_counter)
+                self._report_progress()
+                if np.isclose(score, 1):
+                    stop_reason = FOUND
+                    break
+                if self._is_stagnant(score=score):
+                    self._restart_policy.restart(stab_basis_provider=self.stab_basis_provider)
+                    self._stagnation_detector.reset()
+                    last_restart_policy_name = self._restart_policy.NAME
+                    self._restart_statistics.record_restart(policy_name=last_restart_policy_name)
+                    if self._restart_policy.RESETS_BETA:
+                        beta_index = 0
+                        break
+        if stop_reason is None:
+            stop_reason = BUDGET_EXHAUSTED
+        if stop_reason == FOUND and last_restart_policy_name is not None:
+            self._restart_statistics.record_success(policy_name=last_restart_policy_name,
+                                                    budget_saved=budget - number_of_steps)
+        elapsed = time.perf_counter() - start_time
+        self._store_result(target_qstate=target_qstate,
+                           stabrank=stabrank,
+                           success=stop_reason == FOUND,
+                           basis=self._best_basis,
+                           score=self._best_score,
+                           counter=self._total_counter - start_counter,
+                           elapsed=elapsed,
+                           number_of_bases=number_of_bases)
+        return SearchResult(basis=self._best_basis,
+                            score=self._best_score,
+                            stop_reason=stop_reason,
+                            counter=self._total_counter - start_counter,
+                            elapsed=elapsed)
+
+    def run_multiple(self, target_qstates, stabrank=1, number_of_bases=1):
+        """Search for several targets on the same number of qubits, e.g. the
+        Dicke states of all Hamming weights. The targets are walked towards
+        one after the other, but every basis visited is also scored against
+        the stacked kets of all targets that are not spanned yet (a single
+        matrix product), and targets spanned by the walk towards another
+        one are not walked towards anymore.
+
+        Parameters
+        ----------
+        target_qstates: list of QState
+        stabrank: int
+        number_of_bases: int
+            Number of steps of each walk per value of beta.
+
+        Returns
+        -------
+        list of :obj:`~stabranksearcher.search_result.SearchResult`
+            Per target; if successful, with the first basis found that
+            spans it.
+        """
+        other_targets = self._OtherTargets(target_kets=self._stack_target_kets(target_qstates=target_qstates))
+        self._other_targets = other_targets
+        results = []
+        try:
+            for index, target_qstate in enumerate(target_qstates):
+                basis = other_targets.solutions[index]
+                if basis is not None:
+                    score = basis.score(qstate=target_qstate)
+                    self._store_result(target_qstate=target_qstate,
+                                       stabrank=stabrank,
+                                       success=True,
+                                       basis=basis,
+                                       score=score,
+                                       counter=other_targets.counters[index],
+                                       elapsed=0.,
+                                       number_of_bases=number_of_bases)
+                    results.append(SearchResult(basis=basis,
+                                                score=score,
+                                                stop_reason=FOUND,
+                                                counter=other_targets.counters[index]))
+                    continue
+                other_targets.walked_index = index
+                result = self.run(target_qstate=target_qstate,
+                                  stabrank=stabrank,
+                                  number_of_bases=number_of_bases)
+                other_targets.solutions[index] = result.found_basis
+                results.append(result)
+        finally:
+            self._other_targets = None
+        return results
+
+
+class VectorizedRandomWalkStabRankSearcher(StabRankSearcher):
+    """Simulated annealing as :class:`RandomWalkStabRankSearcher`, but with
+    `number_of_walkers` independent walks in lockstep, see
+    :class:`~stabranksearcher.stab_basis_provider.vectorized_random_walk.VectorizedRandomWalkStabBasisProvider`.
+    It is a single-process searcher, so it can itself be run by each
+    worker of a process pool.
+
+    Parameters
+    ----------
+    beta_init: float
+    beta_final: float
+    number_of_betas: int
+    number_of_walkers: int
+    rng: :obj:`numpy.random.Generator`, int or None
+    result_store: :obj:`~stabranksearcher.result_store.ResultStore` or None
+    warm_start: bool
+        Whether to start all walkers from the stored basis for the
+        nearest stabilizer rank, see :meth:`RandomWalkStabRankSearcher.run`.
+    real: bool or None
+        Whether the walkers are restricted to real stabilizer states;
+        None does so for real targets.
+    """
+
+    STAB_BASIS_PROVIDER_CLS = VectorizedRandomWalkStabBasisProvider
+
+    def __init__(self, beta_init, beta_final, number_of_betas, number_of_walkers=16, rng=None,
+                 result_store=None, warm_start=False, check_stabilizer_state=True, time_limit=None,
+                 cancellation_token=None, real=None):
+        super().__init__(rng=rng, result_store=result_store, check_stabilizer_state=check_stabilizer_state,
+                         time_limit=time_limit, cancellation_token=cancellation_token)
+        self._beta_init = beta_init
+        self._beta_final = beta_final
+        self._number_of_betas = number_of_betas
+        self._number_of_walkers = number_of_walkers
+        self._warm_start = warm_start
+        self._real = real
+        self.reset()
+
+    def reset(self):
+        self._counter = 0
+        self._best_basis = None
+        self._best_score = None
+
+    @property
+    def counter(self):
+        """Number of bases visited by all walkers together since the last
+        reset."""
+        return self._counter
+
+    @property
+    def best_basis(self):
+        return self._best_basis
+
+    @property
+    def best_score(self):
+        return self._best_score
+
+    def _get_parameters(self):
+        return {"beta_init": self._beta_init,
+                "beta_final": self._beta_final,
+                "number_of_betas": self._number_of_betas,
+                "number_of_walkers": self._number_of_walkers,
+                "real": self._real}
+
+    def run(self, target_qstate, stabrank=1, number_of_bases=1, initial_basis=None):
+        """
+        Parameters
+        ----------
+        target_qstate: QState
+        stabrank: int
+        number_of_bases: int
+            Number of steps of the walkers per value of beta; every step
+            visits `number_of_walkers` bases.
+        initial_basis: :obj:`~stabranksearcher.basis.Basis` or None
+            Basis to start all walkers from; if it is larger than
+            `stabrank`, its weakest states are dropped first, and if it is
+            smaller, it is padded with random stabilizer states.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.search_result.SearchResult`
+        """
+        if not isinstance(target_qstate, ns.qubits.qstate.QState):
+            raise TypeError
+        known_result = self._get_known_result(target_qstate=target_qstate, stabrank=stabrank)
+        if known_result is not None:
+            return known_result
+        if initial_basis is None and self._warm_start and self._result_store is not None:
+            initial_basis = self._result_store.get_nearest_basis(target_ket=target_qstate.ket,
+                                                                 stabrank=stabrank)
+        if initial_basis is not None:
+            initial_basis = initial_basis.without_weakest_qstates(ket=np.ravel(target_qstate.ket), size=stabrank)
+        self.stab_basis_provider = \
+            self.STAB_BASIS_PROVIDER_CLS(target_qstate=target_qstate,
+                                         stabrank=stabrank,
+                                         number_of_walkers=self._number_of_walkers,
+                                         rng=self._rng,
+                                         initial_basis=initial_basis,
+                                         real=self._real)
+        super().run()
+        self._best_basis = None
+        self._best_score = None
+        self._start_clock()
+        start_time = time.perf_counter()
+        start_counter = self._counter
+        stop_reason = None
+        for beta in get_betas(beta_init=self._beta_init, beta_final=self._beta_final,
+                              number_of_betas=self._number_of_betas):
+            for _ in range(number_of_bases):
+                stop_reason = self._get_stop_reason()
+                if stop_reason is not None:
+                    break
+                scores = self.stab_basis_provider.get_next_scores(beta=beta)
+                self._counter += len(scores)
+                walker_index = int(np.argmax(scores))
+                if self._best_score is None or scores[walker_index] > self._best_score:
+                    self._best_basis = self.stab_basis_provider.get_basis(walker_index=walker_index)
+                    self._best_score = scores[walker_index]
+                self._report_progress()
+                if np.isclose(scores[walker_index], 1):
+                    stop_reason = FOUND
+                    break
+            if stop_reason is not None:
+                break
+        if stop_reason is None:
+            stop_reason = BUDGET_EXHAUSTED
+        elapsed = time.perf_counter() - start_time
+        self._store_result(target_qstate=target_qstate,
+                           stabrank=stabrank,
+                           success=stop_reason == FOUND,
+                           basis=self._best_basis,
+                           score=self._best_score,
+                           counter=self._counter - start_counter,
+                           elapsed=elapsed,
+                           number_of_bases=number_of_bases)
+        return SearchResult(basis=self._best_basis,
+                            score=self._best_score,
+                            stop_reason=stop_reason,
+                            counter=self._counter - start_counter,
+                            elapsed=elapsed)
+
+
+class OutOfCoreRandomWalkStabRankSearcher(StabRankSearcher):
+    """Simulated annealing as :class:`RandomWalkStabRankSearcher`, for
+    targets on so many qubits that neither the target nor the bases fit
+    in memory: the walk is over an
+    :class:`~stabranksearcher.out_of_core.OutOfCoreBasis`, whose kets live
+    in a memory-mapped file and are processed in chunks.
+
+    Since the target is never held in memory as a whole, there is no
+    result store and no check whether the target is a stabilizer state.
+
+    Parameters
+    ----------
+    beta_init: float
+    beta_final: float
+    number_of_betas: int
+    rng: :obj:`numpy.random.Generator`, int or None
+    time_limit: float or None
+    cancellation_token: :obj:`~stabranksearcher.search_result.CancellationToken` or None
+    directory: str or None
+        Directory of the files of the bases, preferably on a local disk.
+    memory_budget: int
+        Bytes of the chunks in memory, see
+        :class:`~stabranksearcher.out_of_core.OutOfCoreBasis`.
+    chunk_size: int or None
+        If given, the number of rows per chunk instead.
+    real: bool or None
+        Whether to walk over real stabilizer states only; None does so
+        for targets with a real dtype.
+    """
+
+    def __init__(self, beta_init, beta_final, number_of_betas, rng=None, time_limit=None,
+                 cancellation_token=None, directory=None, memory_budget=DEFAULT_MEMORY_BUDGET, chunk_size=None,
+                 real=None):
+        super().__init__(rng=rng, check_stabilizer_state=False, time_limit=time_limit,
+                         cancellation_token=cancellation_token)
+        self._beta_init = beta_init
+        self._beta_final = beta_final
+        self._number_of_betas = number_of_betas
+        self._directory = directory
+        self._memory_budget = memory_budget
+        self._chunk_size = chunk_size
+        self._real = real
+        self.reset()
+
+    def reset(self):
+        self._counter = 0
+
+    @property
+    def counter(self):
+        """Number of bases visited since the last reset."""
+        return self._counter
+
+    def _get_basis(self, target_ket, tableaux, real):
+        return OutOfCoreBasis(target_ket=target_ket, tableaux=tableaux, directory=self._directory,
+                              chunk_size=self._chunk_size, memory_budget=self._memory_budget, real=real)
+
+    def run(self, target_ket, stabrank=1, number_of_bases=1, initial_tableaux=None):
+        """
+        Parameters
+        ----------
+        target_ket: numpy array
+            Normalized ket, e.g. memory-mapped with `numpy.load(path,
+            mmap_mode="r")` or from
+            :func:`~stabranksearcher.dicke_state_factory.save_dicke_state`.
+        stabrank: int
+        number_of_bases: int
+            Number of steps of the walk per value of beta.
+        initial_tableaux: list of :obj:`~stabranksearcher.tableau.StabilizerTableau` or None
+            States to start the walk from; the weakest are dropped if there
+            are more than `stabrank`, and random computational basis states
+            are added if there are fewer.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.search_result.SearchResult`
+            Its basis is an
+            :class:`~stabranksearcher.out_of_core.OutOfCoreBasis` with the
+            best states of the walk; close it to remove its file.
+        """
+        number_of_qubits = target_ket.shape[0].bit_length() - 1
+        real = np.isrealobj(target_ket) if self._real is None else self._real
+        tableaux = [] if initial_tableaux is None else list(initial_tableaux)
+        tableaux += get_random_computational_basis_tableaux(number_of_qubits=number_of_qubits,
+                                                            size=max(stabrank - len(tableaux), 0), rng=self._rng)
+        basis = self._get_basis(target_ket=target_ket, tableaux=tableaux, real=real)
+        while basis.size > stabrank:
+            basis.remove_qstate(qstate_index=basis.get_weakest_qstate_index())
+        best_tableaux, best_score = basis.tableaux, basis.score
+        self._start_clock()
+        start_time = time.perf_counter()
+        start_counter = self._counter
+        stop_reason = FOUND if np.isclose(best_score, 1) else None
+        for beta in get_betas(beta_init=self._beta_init, beta_final=self._beta_final,
+                              number_of_betas=self._number_of_betas):
+            if stop_reason is not None:
+                break
+            move_decider = SimulatedAnnealingMoveDecider(beta=beta, rng=self._rng)
+            for _ in range(number_of_bases):
+                stop_reason = self._get_stop_reason()
+                if stop_reason is not None:
+                    break
+                current_score = basis.score
+                basis.randomly_modify(rng=self._rng)
+                self._counter += 1
+                if not move_decider.should_move(current_score=current_score, tentative_next_score=basis.score):
+                    basis.undo_last_modification()
+                if basis.score > best_score:
+                    best_tableaux, best_score = basis.tableaux, basis.score
+                self._report_progress()
+                if np.isclose(basis.score, 1):
+                    stop_reason = FOUND
+                    break
+        if stop_reason is None:
+            stop_reason = BUDGET_EXHAUSTED
+        if best_tableaux != basis.tableaux:
+            basis.close()
+            basis = self._get_basis(target_ket=target_ket, tableaux=best_tableaux, real=real)
+        return SearchResult(basis=basis,
+                            score=best_score,
+                            stop_reason=stop_reason,
+                            counter=self._counter - start_counter,
+                            elapsed=time.perf_counter() - start_time)
+
+
+def run_rank_descent(searcher, target_qstate, initial_basis, number_of_bases=1, min_stabrank=1):
+    """Search for ever smaller bases spanning the target: starting from
+    `initial_basis`, which should span the target (e.g. from
+    :func:`~stabranksearcher.dicke_state_factory.get_recursive_dicke_basis`),
+    every search is for one state fewer than the last basis found and
+    starts from that basis with its weakest state dropped. The descent
+    stops at the first search that fails, or when `min_stabrank` is
+    reached.
+
+    Parameters
+    ----------
+    searcher: :obj:`RandomWalkStabRankSearcher` or :obj:`VectorizedRandomWalkStabRankSearcher`
+    target_qstate: QState
+    initial_basis: :obj:`~stabranksearcher.basis.Basis`
+    number_of_bases: int
+        Passed on to each search.
+    min_stabrank: int
+        Smallest stabilizer rank to search for.
+
+    Returns
+    -------
+    list of :obj:`~stabranksearcher.search_result.SearchResult`
+        One per search, in the order of decreasing stabilizer rank; the
+        last successful one holds the smallest basis found.
+    """
+    target_ket = np.ravel(target_qstate.ket)
+    results = []
+    basis = initial_basis
+    while basis.size > min_stabrank:
+        stabrank = basis.size - 1
+        result = searcher.run(target_qstate=target_qstate, stabrank=stabrank, number_of_bases=number_of_bases,
+                              initial_basis=basis.without_weakest_qstates(ket=target_ket, size=stabrank))
+        results.append(result)
+        if not result.success:
+            break
+        basis = result.basis
+    return results
@@ -0,0 +1,221 @@
+import json
+import time
+import hashlib
+import sqlite3
+import numpy as np
+from stabranksearcher.basis_file import basis_to_bytes, bytes_to_basis
+from stabranksearcher.quantum_state_tools import get_number_of_qubits_from_ket
+
+
+def get_target_hash(ket, decimals=10):
+    """Hash of a target state that does not depend on its norm,
+    global phase or on floating-point noise below `decimals` digits.
+
+    Parameters
+    ----------
+    ket: numpy array
+    decimals: int
+
+    Returns
+    -------
+    str
+    """
+    ket = np.ravel(np.asarray(ket, dtype=np.complex128))
+    ket = ket / np.linalg.norm(ket)
+    first_nonzero_index = np.argmax(np.abs(ket) > 10 ** (-decimals))
+    first_nonzero_amplitude = ket[first_nonzero_index]
+    ket = ket * np.abs(first_nonzero_amplitude) / first_nonzero_amplitude
+    # adding zero turns -0. into 0.
+    ket = np.round(ket, decimals=decimals) + 0.
+    number_of_qubits = get_number_of_qubits_from_ket(ket=ket)
+    digest = hashlib.sha256()
+    digest.update(str(number_of_qubits).encode())
+    digest.update(ket.tobytes())
+    return digest.hexdigest()
+
+
+class ResultStore:
+    """Persistent store of stabilizer-rank search results, kept in an
+    SQLite database. Results are keyed by the hash of the target state
+    (see :func:`get_target_hash`) and the stabilizer rank searched for.
+
+    Both successful and failed searches are recorded, together with the
+    number of bases tried, the wall-clock time spent and the best
+    basis seen (if any), so that later searches can skip solved queries
+    or warm-start from a basis found for a nearby rank.
+
+    Parameters
+    ----------
+    path: str
+        Path to the database file; it is created if it does not exist.
+        Use ":memory:" for a store that is not persisted.
+    canonicalizer: :obj:`~stabranksearcher.canonicalization.TargetCanonicalizer` or None
+        If given, results are keyed by the representative of the target
+        instead of the target itself, and bases are stored for the
+        representative: a basis is mapped to the representative when
+        recorded and back to the queried target when returned. Queries for
+        targets that are equivalent (e.g. up to a permutation of the
+        qubits) are then answered by each other's results. A database
+        should always be opened with the same canonicalizer.
+    """
+
+    _CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target_hash TEXT NOT NULL,
+            number_of_qubits INTEGER NOT NULL,
+            stabrank INTEGER NOT NULL,
+            success INTEGER NOT NULL,
+            basis BLOB,
+            score REAL,
+            counter INTEGER,
+            elapsed REAL,
+            searcher TEXT,
+            parameters TEXT,
+            created REAL NOT NULL)
+        """
+
+    _CREATE_INDEX = """
+        CREATE INDEX IF NOT EXISTS results_by_target
+        ON results (target_hash, stabrank)
+        """
+
+    def __init__(self, path, canonicalizer=None):
+        self._path = path
+        self._canonicalizer = canonicalizer
+        self._connection = sqlite3.connect(path, timeout=60)
+        with self._connection:
+            self._connection.execute(self._CREATE_TABLE)
+            self._connection.execute(self._CREATE_INDEX)
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def canonicalizer(self):
+        return self._canonicalizer
+
+    def _get_key(self, target_ket):
+        """
+        Returns
+        -------
+        tuple (str, :obj:`~stabranksearcher.canonicalization.SymmetryTransform` or None)
+            The hash under which results for the target are stored, and
+            the transform from the target to its representative.
+        """
+        if self._canonicalizer is None:
+            return get_target_hash(target_ket), None
+        representative, transform = self._canonicalizer.canonicalize(ket=target_ket)
+        return get_target_hash(representative), transform
+
+    @staticmethod
+    def _row_to_basis(row, transform):
+        if row is None:
+            return None
+        basis = bytes_to_basis(row[0])
+        return basis if transform is None else transform.inverse().apply_to_basis(basis)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def record(self, target_ket, stabrank, success, basis=None, score=None,
+               counter=None, elapsed=None, searcher=None, parameters=None):
+        """Store the outcome of a single search.
+
+        Parameters
+        ----------
+        target_ket: numpy array
+        stabrank: int
+        success: bool
+            Whether `basis` spans the target.
+        basis: :obj:`~stabranksearcher.basis.Basis` or None
+            The basis found or, for a failed search, the best basis seen.
+        score: float or None
+            Score of `basis` with respect to the target.
+        counter: int or None
+            Number of bases tried.
+        elapsed: float or None
+            Wall-clock time of the search in seconds.
+        searcher: str or None
+            Name of the searcher.
+        parameters: dict or None
+            Parameters of the searcher; should be JSON-serializable.
+        """
+        target_hash, transform = self._get_key(target_ket=target_ket)
+        if basis is not None and transform is not None:
+            basis = transform.apply_to_basis(basis)
+        row = (target_hash,
+               get_number_of_qubits_from_ket(ket=np.ravel(target_ket)),
+               stabrank,
+               int(success),
+               None if basis is None else basis_to_bytes(basis),
+               None if score is None else float(score),
+               counter,
+               elapsed,
+               searcher,
+               None if parameters is None else json.dumps(parameters, sort_keys=True),
+               time.time())
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO results (target_hash, number_of_qubits, stabrank, success, basis, "
+                "score, counter, elapsed, searcher, parameters, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def is_solved(self, target_ket, stabrank):
+        """Whether a basis of size at most `stabrank` spanning the target
+        has been stored."""
+        return self.get_solution(target_ket=target_ket, stabrank=stabrank) is not None
+
+    def get_solution(self, target_ket, stabrank):
+        """The smallest stored basis of size at most `stabrank` that
+        spans the target.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.basis.Basis` or None
+        """
+        target_hash, transform = self._get_key(target_ket=target_ket)
+        row = self._connection.execute(
+            "SELECT basis FROM results "
+            "WHERE target_hash = ? AND stabrank <= ? AND success = 1 AND basis IS NOT NULL "
+            "ORDER BY stabrank ASC, id ASC LIMIT 1",
+            (target_hash, stabrank)).fetchone()
+        return self._row_to_basis(row=row, transform=transform)
+
+    def get_nearest_basis(self, target_ket, stabrank):
+        """The best stored basis for the stabilizer rank closest to
+        `stabrank`, for warm-starting a search. Among bases of the same
+        size, solutions come first, followed by the highest score.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.basis.Basis` or None
+        """
+        target_hash, transform = self._get_key(target_ket=target_ket)
+        row = self._connection.execute(
+            "SELECT basis FROM results "
+            "WHERE target_hash = ? AND basis IS NOT NULL "
+            "ORDER BY ABS(stabrank - ?) ASC, success DESC, score DESC, id ASC LIMIT 1",
+            (target_hash, stabrank)).fetchone()
+        return self._row_to_basis(row=row, transform=transform)
+
+    def get_budget_spent(self, target_ket, stabrank):
+        """Total number of bases tried and time spent by failed searches
+        for exactly this target and stabilizer rank.
+
+        Returns
+        -------
+        tuple (int, float)
+        """
+        counter, elapsed = self._connection.execute(
+            "SELECT COALESCE(SUM(counter), 0), COALESCE(SUM(elapsed), 0.) FROM results "
+            "WHERE target_hash = ? AND stabrank = ? AND success = 0",
+            (self._get_key(target_ket=target_ket)[0], stabrank)).fetchone()
+        return counter, elapsed
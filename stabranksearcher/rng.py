@@ -0,0 +1,41 @@
+import numpy as np
+
+
+def get_rng(seed=None):
+    """Random number generator from a seed.
+
+    Parameters
+    ----------
+    seed: None, int, :obj:`numpy.random.SeedSequence` or :obj:`numpy.random.Generator`
+        If a Generator, it is returned as is, so that the caller's stream
+        is continued. If None, the generator is seeded with fresh entropy.
+
+    Returns
+    -------
+    :obj:`numpy.random.Generator`
+    """
+    return np.random.default_rng(seed)
+
+
+def spawn_rngs(seed=None, number_of_streams=1):
+    """Independent random number generators, e.g. one per worker
+    process or per chain.
+
+    Parameters
+    ----------
+    seed: None, int, :obj:`numpy.random.SeedSequence` or :obj:`numpy.random.Generator`
+        The same seed always yields the same child streams. If a Generator,
+        the child streams are seeded by drawing from it.
+    number_of_streams: int
+
+    Returns
+    -------
+    list of :obj:`numpy.random.Generator`
+    """
+    if isinstance(seed, np.random.Generator):
+        seed_sequence = np.random.SeedSequence(seed.integers(low=0, high=2 ** 63, size=4))
+    elif isinstance(seed, np.random.SeedSequence):
+        seed_sequence = seed
+    else:
+        seed_sequence = np.random.SeedSequence(seed)
+    return [np.random.default_rng(child) for child in seed_sequence.spawn(number_of_streams)]
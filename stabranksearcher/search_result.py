@@ -0,0 +1,147 @@
+import time
+import threading
+import numpy as np
+
+# reasons why a search stopped
+FOUND = "found"
+KNOWN = "known"
+BUDGET_EXHAUSTED = "budget_exhausted"
+DEADLINE_REACHED = "deadline_reached"
+CANCELLED = "cancelled"
+
+STOP_REASONS = (FOUND, KNOWN, BUDGET_EXHAUSTED, DEADLINE_REACHED, CANCELLED)
+
+
+class SearchResult:
+    """Outcome of a single search, whether it succeeded or not.
+
+    Parameters
+    ----------
+    basis: :obj:`~stabranksearcher.basis.Basis` or None
+        The best basis seen during the search: the one that spans the
+        target if the search succeeded, otherwise the one with the highest
+        score (None if no basis was tried).
+    score: float or None
+        The score of `basis` with respect to the target.
+    stop_reason: str
+        One of :data:`STOP_REASONS`: the target is spanned by a basis
+        that was found (`found`) or was already known without searching
+        (`known`, from the result store or because the target is a
+        stabilizer state), or the search gave up because its budget, its
+        wall-clock time limit or its cancellation token said so.
+    counter: int
+        Number of bases tried.
+    elapsed: float
+        Wall-clock time of the search in seconds.
+    """
+
+    def __init__(self, basis, score, stop_reason, counter=0, elapsed=0.):
+        if stop_reason not in STOP_REASONS:
+            raise ValueError("Unknown stop reason {}".format(stop_reason))
+        self._basis = basis
+        self._score = score
+        self._stop_reason = stop_reason
+        self._counter = counter
+        self._elapsed = elapsed
+
+    @property
+    def basis(self):
+        return self._basis
+
+    @property
+    def score(self):
+        return self._score
+
+    @property
+    def stop_reason(self):
+        return self._stop_reason
+
+    @property
+    def counter(self):
+        return self._counter
+
+    @property
+    def elapsed(self):
+        return self._elapsed
+
+    @property
+    def success(self):
+        """Whether `basis` spans the target."""
+        return self._stop_reason in (FOUND, KNOWN)
+
+    @property
+    def found_basis(self):
+        """`basis` if it spans the target, otherwise None."""
+        return self._basis if self.success else None
+
+    def to_dict(self):
+        """JSON-serializable summary, without the basis itself."""
+        return {"success": self.success,
+                "stop_reason": self._stop_reason,
+                "size": None if self._basis is None else self._basis.size,
+                "score": None if self._score is None else float(self._score),
+                "counter": self._counter,
+                "elapsed": self._elapsed}
+
+    def __repr__(self):
+        return "SearchResult(stop_reason={}, score={}, size={}, counter={})".format(
+            self._stop_reason, self._score, None if self._basis is None else self._basis.size, self._counter)
+
+
+def encode_ket(ket):
+    """JSON-serializable form of a ket, see :func:`decode_ket`."""
+    ket = np.ravel(ket)
+    return {"real": np.real(ket).tolist(), "imag": np.imag(ket).tolist()}
+
+
+def decode_ket(data):
+    return np.array(data["real"]) + 1j * np.array(data["imag"])
+
+
+def encode_search_result(result):
+    """JSON-serializable form of a
+    :class:`SearchResult`, including the
+    kets of its basis."""
+    encoded_result = result.to_dict()
+    basis = result.basis
+    encoded_result["basis"] = None if basis is None else [encode_ket(basis.kets[:, index])
+                                                          for index in range(basis.size)]
+    return encoded_result
+
+
+class CancellationToken:
+    """Flag through which a search can be cancelled from another thread
+    or, when wrapping a multiprocessing event, another process.
+
+    Parameters
+    ----------
+    event: :obj:`threading.Event`, :obj:`multiprocessing.Event` or None
+        Event that signals cancellation; a new one if None.
+    poll_interval: float
+        Minimal number of seconds between two reads of `event`. Reading
+        an event shared between processes is slow compared to a step of
+        a search, so searchers may ask :attr:`is_cancelled` at every step
+        while the event is only read every `poll_interval` seconds.
+    """
+
+    def __init__(self, event=None, poll_interval=0.):
+        self._event = threading.Event() if event is None else event
+        self._poll_interval = poll_interval
+        self._last_poll_time = None
+        self._is_cancelled = False
+
+    def cancel(self):
+        self._event.set()
+        self._is_cancelled = True
+
+    @property
+    def is_cancelled(self):
+        if self._is_cancelled:
+            return True
+        if self._poll_interval > 0:
+            now = time.monotonic()
+            if self._last_poll_time is not None and now - self._last_poll_time < self._poll_interval:
+                return False
+            self._last_poll_time = now
+        self._is_cancelled = self._event.is_set()
+        return self._is_cancelled
@@ -0,0 +1,488 @@
+"""Long-lived local service that runs stabilizer-rank searches.
+
+The service keeps a pool of worker processes warm, so that a search does
+not pay for process startup and imports, and accepts jobs through an
+asyncio front end: either directly in-process (:class:`SearchService`) or
+over a Unix socket (:class:`SearchServiceClient`). The socket protocol
+is one JSON object per line in both directions.
+
+A job is a dict with the keys
+
+- `target_ket`: the target state, encoded with
+  :func:`~stabranksearcher.search_result.encode_ket`, or
+  `dicke`: a dict with keys `number_of_qubits` and `hamming_weight`;
+- `searcher`: one of the keys of :data:`SEARCHER_CLASSES`;
+- `stabrank`: the stabilizer rank to search for;
+- `number_of_bases`: the budget passed to the searcher's `run` method;
+- `parameters` (optional): keyword arguments for the searcher, e.g.
+  `beta_init`, `beta_final` and `number_of_betas` for the random walk
+  (and `number_of_walkers` for the vectorized one);
+- `seed` (optional): seed of the searcher;
+- `time_limit` (optional): maximal wall-clock time of the search in
+  seconds.
+
+The result of a job is the summary of its
+:class:`~stabranksearcher.search_result.SearchResult`, together with the
+kets of the best basis found. A job that is cancelled while running
+keeps the result it had at that moment.
+
+The target ket of a job with `target_ket` is decoded once by the service
+and handed to the worker as a read-only view of shared memory (see
+:mod:`stabranksearcher.shared_arrays`), rather than pickled with the job.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import multiprocessing
+import concurrent.futures
+import numpy as np
+from stabranksearcher.rank_searcher import (
+    NRandomStabRankSearcher,
+    RandomWalkStabRankSearcher,
+    VectorizedRandomWalkStabRankSearcher)
+from stabranksearcher.dicke_state_factory import get_dicke_state
+from stabranksearcher.quantum_state_tools import ket_to_qstate
+from stabranksearcher.search_result import CancellationToken, encode_ket, decode_ket, encode_search_result
+from stabranksearcher.search_result import CANCELLED as SEARCH_CANCELLED
+from stabranksearcher.shared_arrays import SharedArray, SHARED_MEMORY
+
+
+SEARCHER_CLASSES = {
+    "n_random": NRandomStabRankSearcher,
+    "random_walk": RandomWalkStabRankSearcher,
+    "vectorized_random_walk": VectorizedRandomWalkStabRankSearcher,
+}
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_FINAL_STATUSES = (DONE, FAILED, CANCELLED)
+
+# maximum length of a single line of the socket protocol
+_STREAM_LIMIT = 2 ** 26
+
+
+def _get_target_ket(job):
+    if "target_ket" in job:
+        return decode_ket(job["target_ket"])
+    elif "dicke" in job:
+        return get_dicke_state(number_of_qubits=job["dicke"]["number_of_qubits"],
+                               hamming_weight=job["dicke"]["hamming_weight"])
+    else:
+        raise ValueError("Job should contain either 'target_ket' or 'dicke'")
+
+
+def _validate_job(job):
+    if "target_ket" not in job and "dicke" not in job:
+        raise ValueError("Job should contain either 'target_ket' or 'dicke'")
+    if job.get("searcher") not in SEARCHER_CLASSES:
+        raise ValueError("Unknown searcher {}, choose from {}".format(
+            job.get("searcher"), sorted(SEARCHER_CLASSES)))
+    for key in ["stabrank", "number_of_bases"]:
+        if not isinstance(job.get(key), int) or job[key] < 1:
+            raise ValueError("Job should contain a positive integer '{}'".format(key))
+
+
+def _initialize_worker():
+    # the imports at the top of this module are what makes the worker warm
+    return os.getpid()
+
+
+def run_search_job(job, job_id, progress_queue, cancel_event, progress_interval=0.5, target_handle=None):
+    """Run a single job; executed in a worker process.
+
+    Every `progress_interval` seconds, a progress event is put on
+    `progress_queue` and `cancel_event` is checked (through the
+    cancellation token of the searcher).
+
+    Parameters
+    ----------
+    target_handle: :obj:`~stabranksearcher.shared_arrays.SharedArrayHandle` or None
+        Shared target ket, used instead of the target in `job`.
+
+    Returns
+    -------
+    dict
+        JSON-serializable description of the outcome.
+    """
+    if target_handle is None:
+        return _run_search_job(job=job, job_id=job_id, target_ket=_get_target_ket(job),
+                               progress_queue=progress_queue, cancel_event=cancel_event,
+                               progress_interval=progress_interval)
+    # the target is only needed for this job, so it is not kept mapped in the worker
+    try:
+        return _run_search_job(job=job, job_id=job_id, target_ket=target_handle.attach(),
+                               progress_queue=progress_queue, cancel_event=cancel_event,
+                               progress_interval=progress_interval)
+    finally:
+        target_handle.detach()
+
+
+def _run_search_job(job, job_id, target_ket, progress_queue, cancel_event, progress_interval):
+    target_qstate = ket_to_qstate(target_ket)
+    searcher_cls = SEARCHER_CLASSES[job["searcher"]]
+    cancellation_token = CancellationToken(event=cancel_event, poll_interval=progress_interval)
+    searcher = searcher_cls(rng=job.get("seed"),
+                            time_limit=job.get("time_limit"),
+                            cancellation_token=cancellation_token,
+                            **job.get("parameters", {}))
+    last_report_time = time.monotonic()
+
+    def report_progress(searcher):
+        nonlocal last_report_time
+        now = time.monotonic()
+        if now - last_report_time < progress_interval:
+            return
+        last_report_time = now
+        progress_queue.put({"job_id": job_id,
+                            "event": "progress",
+                            "counter": searcher.counter,
+                            "best_score": getattr(searcher, "best_score", None)})
+
+    searcher.progress_callback = report_progress
+    progress_queue.put({"job_id": job_id, "event": "started", "pid": os.getpid()})
+    result = searcher.run(target_qstate=target_qstate,
+                          stabrank=job["stabrank"],
+                          number_of_bases=job["number_of_bases"])
+    return encode_search_result(result)
+
+
+class _Job:
+
+    def __init__(self, job_id, job, cancel_event):
+        self.job_id = job_id
+        self.job = job
+        self.cancel_event = cancel_event
+        self.status = QUEUED
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.future = None
+        self.task = None
+        self.target_array = None
+        self.subscribers = []
+
+    def to_dict(self):
+        return {"job_id": self.job_id,
+                "status": self.status,
+                "job": {key: value for key, value in self.job.items() if key != "target_ket"},
+                "progress": self.progress,
+                "result": self.result,
+                "error": self.error,
+                "submitted": self.submitted}
+
+    def notify(self, event):
+        for subscriber in self.subscribers:
+            subscriber.put_nowait(event)
+
+
+class SearchService:
+    """Queue of stabilizer-rank search jobs, run on a warm process pool.
+
+    Use as::
+
+        async with SearchService(socket_path="/tmp/stabranksearcher.sock") as service:
+            await service.serve_forever()
+
+    or submit jobs in-process with :meth:`submit`.
+
+    Parameters
+    ----------
+    socket_path: str or None
+        Unix socket on which to listen for clients. If None, the service
+        can only be used in-process.
+    max_workers: int or None
+        Number of worker processes; defaults to the number of CPUs.
+    progress_interval: float
+        Minimal number of seconds between two progress events of a job.
+    target_backend: str or None
+        How target kets are passed to the workers: "shared_memory" or
+        "memmap" (see :class:`~stabranksearcher.shared_arrays.SharedArray`),
+        or None to pickle them with the job.
+    shared_directory: str or None
+        Directory of the files of the "memmap" backend.
+    """
+
+    def __init__(self, socket_path=None, max_workers=None, progress_interval=0.5, target_backend=SHARED_MEMORY,
+                 shared_directory=None):
+        self._socket_path = socket_path
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._progress_interval = progress_interval
+        self._target_backend = target_backend
+        self._shared_directory = shared_directory
+        self._jobs = {}
+        self._manager = None
+        self._pool = None
+        self._server = None
+        self._progress_queue = None
+        self._progress_task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._progress_queue = self._manager.Queue()
+        self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self._max_workers,
+                                                            mp_context=context,
+                                                            initializer=_initialize_worker)
+        # start all workers up front so that the first jobs do not pay for it
+        await asyncio.gather(*[loop.run_in_executor(self._pool, _initialize_worker)
+                               for __ in range(self._max_workers)])
+        self._progress_task = asyncio.ensure_future(self._dispatch_progress())
+        if self._socket_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection,
+                                                           path=self._socket_path,
+                                                           limit=_STREAM_LIMIT)
+
+    async def serve_forever(self):
+        if self._server is None:
+            raise ValueError("Service was not started with a socket path")
+        await self._server.serve_forever()
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            if os.path.exists(self._socket_path):
+                os.remove(self._socket_path)
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._pool is not None:
+            await loop.run_in_executor(None, self._pool.shutdown)
+            self._pool = None
+        if self._progress_task is not None:
+            self._progress_queue.put(None)
+            await self._progress_task
+            self._progress_task = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def submit(self, job):
+        """Queue a job.
+
+        Returns
+        -------
+        str
+            Identifier of the job.
+        """
+        if self._pool is None:
+            raise ValueError("Service has not been started")
+        _validate_job(job)
+        job_id = uuid.uuid4().hex
+        record = _Job(job_id=job_id, job=job, cancel_event=self._manager.Event())
+        worker_job = job
+        target_handle = None
+        if self._target_backend is not None and "target_ket" in job:
+            record.target_array = SharedArray(array=decode_ket(job["target_ket"]),
+                                              backend=self._target_backend,
+                                              directory=self._shared_directory)
+            worker_job = {key: value for key, value in job.items() if key != "target_ket"}
+            target_handle = record.target_array.handle
+        self._jobs[job_id] = record
+        loop = asyncio.get_running_loop()
+        record.future = loop.run_in_executor(self._pool, run_search_job, worker_job, job_id,
+                                             self._progress_queue, record.cancel_event,
+                                             self._progress_interval, target_handle)
+        record.task = asyncio.ensure_future(self._await_job(record))
+        return job_id
+
+    def _get_job(self, job_id):
+        try:
+            return self._jobs[job_id]
+        except KeyError:
+            raise KeyError("Unknown job {}".format(job_id))
+
+    def get_status(self, job_id):
+        """
+        Returns
+        -------
+        dict
+            Status, latest progress event and (if finished) result of the job.
+        """
+        return self._get_job(job_id).to_dict()
+
+    def list_jobs(self):
+        return [job.to_dict() for job in self._jobs.values()]
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job.
+
+        Returns
+        -------
+        bool
+            False if the job had already finished.
+        """
+        record = self._get_job(job_id)
+        if record.status in _FINAL_STATUSES:
+            return False
+        record.cancel_event.set()
+        record.future.cancel()
+        return True
+
+    async def wait(self, job_id):
+        """Wait until the job has finished and return its status."""
+        record = self._get_job(job_id)
+        await asyncio.shield(record.task)
+        return record.to_dict()
+
+    async def stream(self, job_id):
+        """Asynchronous iterator over the events of a job, ending with
+        an event `finished` that holds the final status."""
+        record = self._get_job(job_id)
+        if record.status in _FINAL_STATUSES:
+            yield {"job_id": job_id, "event": "finished", "status": record.to_dict()}
+            return
+        subscriber = asyncio.Queue()
+        record.subscribers.append(subscriber)
+        try:
+            while True:
+                event = await subscriber.get()
+                yield event
+                if event["event"] == "finished":
+                    return
+        finally:
+            record.subscribers.remove(subscriber)
+
+    async def _await_job(self, record):
+        try:
+            record.result = await record.future
+            record.status = CANCELLED if record.result["stop_reason"] == SEARCH_CANCELLED else DONE
+        except (asyncio.CancelledError, concurrent.futures.CancelledError):
+            record.status = CANCELLED
+        except Exception as error:
+            record.status = FAILED
+            record.error = repr(error)
+        finally:
+            # also after the worker crashed
+            if record.target_array is not None:
+                record.target_array.close()
+        record.notify({"job_id": record.job_id, "event": "finished", "status": record.to_dict()})
+
+    async def _dispatch_progress(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await loop.run_in_executor(None, self._progress_queue.get)
+            if event is None:
+                return
+            record = self._jobs.get(event["job_id"])
+            if record is None or record.status in _FINAL_STATUSES:
+                continue
+            if event["event"] == "started":
+                record.status = RUNNING
+            else:
+                record.progress = event
+            record.notify(event)
+
+    def _handle_request(self, request):
+        command = request.get("command")
+        if command == "submit":
+            return {"job_id": self.submit(request["job"])}
+        elif command == "status":
+            return {"status": self.get_status(request["job_id"])}
+        elif command == "cancel":
+            return {"cancelled": self.cancel(request["job_id"])}
+        elif command == "list":
+            return {"jobs": self.list_jobs()}
+        else:
+            raise ValueError("Unknown command {}".format(command))
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if request.get("command") == "stream":
+                        async for event in self.stream(request["job_id"]):
+                            writer.write(_encode_message(dict(event, ok=True)))
+                            await writer.drain()
+                        continue
+                    response = dict(self._handle_request(request), ok=True)
+                except (ValueError, KeyError, TypeError) as error:
+                    response = {"ok": False, "error": str(error)}
+                writer.write(_encode_message(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _encode_message(message):
+    return (json.dumps(message) + "\n").encode()
+
+
+class SearchServiceClient:
+    """Client for a :class:`SearchService` listening on a Unix socket.
+
+    Parameters
+    ----------
+    socket_path: str
+    """
+
+    def __init__(self, socket_path):
+        self._socket_path = socket_path
+
+    async def _request(self, request):
+        reader, writer = await asyncio.open_unix_connection(self._socket_path, limit=_STREAM_LIMIT)
+        try:
+            writer.write(_encode_message(request))
+            await writer.drain()
+            response = json.loads(await reader.readline())
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        if not response.pop("ok"):
+            raise ValueError(response["error"])
+        return response
+
+    async def submit(self, job):
+        return (await self._request({"command": "submit", "job": job}))["job_id"]
+
+    async def get_status(self, job_id):
+        return (await self._request({"command": "status", "job_id": job_id}))["status"]
+
+    async def cancel(self, job_id):
+        return (await self._request({"command": "cancel", "job_id": job_id}))["cancelled"]
+
+    async def list_jobs(self):
+        return (await self._request({"command": "list"}))["jobs"]
+
+    async def stream(self, job_id):
+        """Asynchronous iterator over the events of a job, see
+        :meth:`SearchService.stream`."""
+        reader, writer = await asyncio.open_unix_connection(self._socket_path, limit=_STREAM_LIMIT)
+        try:
+            writer.write(_encode_message({"command": "stream", "job_id": job_id}))
+            await writer.drain()
+            while True:
+                event = json.loads(await reader.readline())
+                if not event.pop("ok"):
+                    raise ValueError(event["error"])
+                yield event
+                if event["event"] == "finished":
+                    return
+        finally:
+            writer.close()
+            await writer.wait_closed()
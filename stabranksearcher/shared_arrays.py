@@ -0,0 +1,305 @@
+"""Read-only arrays shared between processes without copying, e.g. the
+target ket of a search or a pool of stabilizer states that all workers
+of a process pool need.
+
+The process that owns an array creates a :class:`SharedArray`, which
+copies the data once into a block of shared memory
+(:mod:`multiprocessing.shared_memory`) or into a memory-mapped ".npy"
+file, and passes its small, picklable :attr:`SharedArray.handle` to the
+workers. A worker turns the handle into a read-only NumPy view with
+:meth:`SharedArrayHandle.attach`, which maps the block only once per
+process.
+
+The owner frees the block with :meth:`SharedArray.close` (or by using the
+array as a context manager); otherwise this happens when the owner is
+garbage collected or exits. If the owner crashes, a block of shared
+memory is still freed by the resource tracker of :mod:`multiprocessing`,
+and the files of memory-mapped arrays whose owner is no longer alive are
+removed by :func:`remove_stale_files`, which is called whenever a new
+memory-mapped array is created in the same directory.
+"""
+import os
+import re
+import sys
+import uuid
+import weakref
+import tempfile
+import threading
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+SHARED_MEMORY = "shared_memory"
+MEMMAP = "memmap"
+
+BACKENDS = (SHARED_MEMORY, MEMMAP)
+
+_FILE_PREFIX = "stabranksearcher-"
+_FILE_PATTERN = re.compile(re.escape(_FILE_PREFIX) + r"(?P<pid>\d+)-[0-9a-f]+\.npy$")
+
+# blocks attached by this process, by name, kept open for the lifetime of
+# the process so that the views into them stay valid
+_attached_blocks = {}
+_attach_lock = threading.Lock()
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_stale_files(directory):
+    """Remove the files of memory-mapped arrays in `directory` whose owner
+    process is no longer alive, e.g. because it crashed.
+
+    Parameters
+    ----------
+    directory: str
+
+    Returns
+    -------
+    list of str
+        Paths of the removed files.
+    """
+    removed_paths = []
+    for filename in os.listdir(directory):
+        match = _FILE_PATTERN.match(filename)
+        if match is None or _is_alive(int(match.group("pid"))):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed_paths.append(path)
+    return removed_paths
+
+
+def create_memmap(shape, dtype, directory=None, fortran_order=False):
+    """New writable memory-mapped ".npy" file in `directory` (the
+    temporary directory if None), named after this process so that
+    :func:`remove_stale_files` removes it once this process is gone. Stale
+    files in `directory` are removed first.
+
+    Returns
+    -------
+    tuple (str, numpy memmap)
+        The path of the file and the array, initialized with zeros.
+    """
+    directory = tempfile.gettempdir() if directory is None else directory
+    remove_stale_files(directory=directory)
+    path = os.path.join(directory, "{}{}-{}.npy".format(_FILE_PREFIX, os.getpid(), uuid.uuid4().hex))
+    array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape, fortran_order=fortran_order)
+    return path, array
+
+
+def _attach_shared_memory(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # before Python 3.13, attaching registers the block with the resource
+    # tracker, which the workers share with the owner, so that the block
+    # would be unlinked as soon as any worker exits
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedArrayHandle:
+    """Picklable reference to a :class:`SharedArray`, to be passed to
+    other processes.
+
+    Parameters
+    ----------
+    backend: str
+        One of :data:`BACKENDS`.
+    name: str
+        Name of the block of shared memory, or path of the ".npy" file.
+    shape: tuple of int
+    dtype: str
+    fortran_order: bool
+    """
+
+    def __init__(self, backend, name, shape, dtype, fortran_order):
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend {}, choose from {}".format(backend, BACKENDS))
+        self._backend = backend
+        self._name = name
+        self._shape = tuple(shape)
+        self._dtype = np.dtype(dtype).str
+        self._fortran_order = fortran_order
+
+    def __getstate__(self):
+        return {"backend": self._backend, "name": self._name, "shape": self._shape,
+                "dtype": self._dtype, "fortran_order": self._fortran_order}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return "SharedArrayHandle({})".format(", ".join("{}={!r}".format(key, value)
+                                                        for key, value in self.__getstate__().items()))
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def dtype(self):
+        return np.dtype(self._dtype)
+
+    def attach(self):
+        """Read-only view of the shared array, without copying. The
+        underlying block is mapped once per process and stays mapped until
+        :meth:`detach` is called or the process exits.
+
+        Returns
+        -------
+        numpy array
+
+        Raises
+        ------
+        FileNotFoundError
+            If the array has been freed by its owner.
+        """
+        if self._backend == MEMMAP:
+            # np.load keeps its own reference to the mapped file
+            return np.load(self._name, mmap_mode="r")
+        with _attach_lock:
+            block = _attached_blocks.get(self._name)
+            if block is None:
+                block = _attach_shared_memory(name=self._name)
+                _attached_blocks[self._name] = block
+        array = np.ndarray(self._shape, dtype=self.dtype, buffer=block.buf,
+                           order="F" if self._fortran_order else "C")
+        array.setflags(write=False)
+        return array
+
+    def detach(self):
+        """Unmap the block attached by :meth:`attach` in this process.
+
+        Views that are still alive remain valid; the block is then unmapped
+        together with the last of them. Does nothing if the block is not
+        attached.
+        """
+        if self._backend == MEMMAP:
+            return
+        with _attach_lock:
+            block = _attached_blocks.pop(self._name, None)
+        if block is not None:
+            _close_attached_block(block)
+
+
+def _close_attached_block(block):
+    try:
+        block.close()
+    except BufferError:
+        # views are still exported; drop the references of the block, so
+        # that the mapping goes with the last view instead
+        block._buf = None
+        block._mmap = None
+        block.close()
+
+
+def _free_shared_memory(block):
+    try:
+        block.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        block.close()
+    except BufferError:
+        # views of the owner are still around; the mapping goes with them
+        pass
+
+
+def _free_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class SharedArray:
+    """Owner of an array shared with other processes, see the module
+    documentation.
+
+    Parameters
+    ----------
+    array: numpy array
+        Copied into the shared block, keeping its memory layout (C or
+        Fortran order).
+    backend: str
+        "shared_memory" (in RAM) or "memmap" (a ".npy" file in `directory`,
+        which the operating system pages in and out as needed, e.g. for
+        targets that do not fit in memory alongside their copies).
+    directory: str or None
+        Directory of the files of the "memmap" backend; defaults to the
+        temporary directory.
+    """
+
+    def __init__(self, array, backend=SHARED_MEMORY, directory=None):
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend {}, choose from {}".format(backend, BACKENDS))
+        array = np.asanyarray(array)
+        fortran_order = array.ndim > 1 and np.isfortran(array)
+        order = "F" if fortran_order else "C"
+        if backend == SHARED_MEMORY:
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            name = block.name
+            self._array = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf, order=order)
+            self._finalizer = weakref.finalize(self, _free_shared_memory, block)
+        else:
+            name, self._array = create_memmap(shape=array.shape, dtype=array.dtype, directory=directory,
+                                              fortran_order=fortran_order)
+            self._finalizer = weakref.finalize(self, _free_file, name)
+        self._array[...] = array
+        if backend == MEMMAP:
+            self._array.flush()
+        self._array.setflags(write=False)
+        self._handle = SharedArrayHandle(backend=backend, name=name, shape=array.shape, dtype=array.dtype,
+                                         fortran_order=fortran_order)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def handle(self):
+        """:obj:`SharedArrayHandle` to pass to other processes."""
+        return self._handle
+
+    @property
+    def array(self):
+        """Read-only view of the shared array in the owning process."""
+        if self.closed:
+            raise ValueError("Shared array has been closed")
+        return self._array
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    def close(self):
+        """Free the shared block. Views attached by other processes stay
+        valid until those processes exit (the memory is released once the
+        last mapping is gone), but no new process can attach.
+        Views of the owning process must no longer be used."""
+        self._array = None
+        self._finalizer()
@@ -52,11 +52,11 @@ class BruteForceStabBasisProvider:
             Z_MINUS = StabRepr(check_matrix=[[0, 1]], phases=[-1])
             Y_PLUS = StabRepr(check_matrix=[[1, 1]], phases=[1])
             Y_MINUS = StabRepr(check_matrix=[[1, 1]], phases=[-1])
-            qstates = set()
+            qstates = []
             for srepr in [X_PLUS, X_MINUS, Z_PLUS, Z_MINUS, Y_PLUS, Y_MINUS]:
                 qubits = qapi.create_qubits(num_qubits=1)
                 qapi.assign_qstate(qubits, srepr)
-                qstates.add(qubits[0].qstate)
+                qstates.append(qubits[0].qstate)
             return qstates
         else:
             raise NotImplementedError  # TODO
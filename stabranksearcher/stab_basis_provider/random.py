@@ -3,33 +3,69 @@ from netsquid.qubits.stabtools import StabRepr
 import netsquid.qubits.qubitapi as qapi
 import qiskit
 from stabranksearcher.basis import Basis
+from stabranksearcher.quantum_state_tools import get_real_kets
+from stabranksearcher.rng import get_rng
 from stabranksearcher.stab_basis_provider.stab_basis_provider import StabBasisProvider
 
 
+def can_use_real_arithmetic(target_ket, initial_basis=None):
+    """Whether a search for `target_ket` can be restricted to real
+    stabilizer states (see the parameter `real` of
+    :class:`~stabranksearcher.basis.Basis`): the target, as well as the
+    initial basis (if any), should be real up to global phases.
+
+    Parameters
+    ----------
+    target_ket: numpy array
+    initial_basis: :obj:`~stabranksearcher.basis.Basis` or None
+
+    Returns
+    -------
+    bool
+    """
+    if get_real_kets(kets=np.ravel(target_ket)) is None:
+        return False
+    return initial_basis is None or initial_basis.is_real or get_real_kets(kets=initial_basis.kets) is not None
+
+
 class RandomStabBasisProvider(StabBasisProvider):
 
-    def __init__(self, number_of_qubits=1, stabrank=1):
+    def __init__(self, number_of_qubits=1, stabrank=1, rng=None):
         self._number_of_qubits = number_of_qubits
         self._stabrank = stabrank
+        self._rng = get_rng(rng)
 
     def get_next_basis(self):
         return RandomStabBasisProvider.get_random_stabilizer_state_basis(
                     number_of_qubits=self._number_of_qubits,
-                    size=self._stabrank)
+                    size=self._stabrank,
+                    rng=self._rng)
 
     @classmethod
-    def get_random_stabilizer_state_basis(cls, number_of_qubits=1, size=1):
-        qstates = set()
-        while len(list(qstates)) != size:
-            stabstate = cls.get_random_stabilizer_state(number_of_qubits=number_of_qubits)
-            qstates.add(stabstate)
-        return Basis(qstates=list(qstates))
+    def get_random_stabilizer_state_basis(cls, number_of_qubits=1, size=1, rng=None, real=False):
+        """Basis of `size` random stabilizer states, drawn uniformly from
+        all stabilizer states, or from the real ones if `real` (giving a
+        real basis, see :class:`~stabranksearcher.basis.Basis`)."""
+        rng = get_rng(rng)
+        if real:
+            kets = np.empty((2 ** number_of_qubits, size), order="F")
+            for index in range(size):
+                kets[:, index] = cls.get_random_real_stabilizer_state(number_of_qubits=number_of_qubits, rng=rng)
+            return Basis(kets=kets, real=True)
+        # a list rather than a set, so that the order of the states (and
+        # thereby the rest of a seeded search) is reproducible
+        qstates = []
+        while len(qstates) != size:
+            stabstate = cls.get_random_stabilizer_state(number_of_qubits=number_of_qubits, rng=rng)
+            qstates.append(stabstate)
+        return Basis(qstates=qstates)
 
     @classmethod
-    def get_random_stabilizer_state(cls, number_of_qubits=1):
+    def get_random_stabilizer_state(cls, number_of_qubits=1, rng=None):
 
         # get random clifford
-        cliff = qiskit.quantum_info.random_clifford(num_qubits=number_of_qubits)
+        cliff = qiskit.quantum_info.random_clifford(num_qubits=number_of_qubits,
+                                                    seed=get_rng(rng))
         phases = cliff.stabilizer.phase
         check_matrix_x = cliff.stabilizer.X
         check_matrix_z = cliff.stabilizer.Z
@@ -47,3 +83,67 @@ class RandomStabBasisProvider(StabBasisProvider):
         qubits = qapi.create_qubits(num_qubits=number_of_qubits)
         qapi.assign_qstate(qubits, srepr)
         return qubits[0].qstate
+
+    @classmethod
+    def get_random_real_stabilizer_state(cls, number_of_qubits=1, rng=None):
+        """Uniformly random real stabilizer state.
+
+        Returns
+        -------
+        numpy array of float
+            The normalized ket.
+
+        Notes
+        -----
+        Up to sign, a real stabilizer state is :math:`2^{-k/2}
+        \\sum_{x \\in \\{0, 1\\}^k} (-1)^{q(x)} \\ket{j_0 \\oplus Mx}` for a
+        k-dimensional subspace spanned by the columns of M, an offset
+        :math:`j_0` and a quadratic form q without constant term. There
+        are :math:`\\binom{n}{k}_2 2^{n-k} 2^{k(k+1)/2}` of them for each
+        k, which sum to the :math:`2^n \\prod_{k=1}^n (2^{k-1} + 1)` real
+        stabilizer states on n qubits. The dimension k is drawn with
+        these weights, and the rest uniformly.
+        """
+        rng = get_rng(rng)
+        weights = [cls._get_number_of_subspaces(number_of_qubits=number_of_qubits, dimension=dimension) *
+                   2 ** (number_of_qubits - dimension + dimension * (dimension + 1) // 2)
+                   for dimension in range(number_of_qubits + 1)]
+        dimension = int(rng.choice(number_of_qubits + 1, p=np.array(weights, dtype=float) / sum(weights)))
+        while True:
+            subspace_masks = rng.integers(2 ** number_of_qubits, size=dimension)
+            if cls._get_rank(masks=subspace_masks) == dimension:
+                break
+        coordinates = np.arange(2 ** dimension)
+        coordinate_bits = (coordinates[:, np.newaxis] >> np.arange(dimension)) & 1
+        indices = np.full(2 ** dimension, rng.integers(2 ** number_of_qubits))
+        for bit, subspace_mask in enumerate(subspace_masks):
+            indices ^= coordinate_bits[:, bit] * subspace_mask
+        quadratic_part = np.triu(rng.integers(2, size=(dimension, dimension)), k=1)
+        linear_part = rng.integers(2, size=dimension)
+        exponents = np.einsum("xi,ij,xj->x", coordinate_bits, quadratic_part, coordinate_bits) + \
+            coordinate_bits.dot(linear_part)
+        ket = np.zeros(2 ** number_of_qubits)
+        ket[indices] = (1 - 2 * (exponents % 2)) / np.sqrt(2 ** dimension)
+        return ket
+
+    @staticmethod
+    def _get_number_of_subspaces(number_of_qubits, dimension):
+        """Number of subspaces of dimension `dimension` of {0, 1}^n, i.e.
+        the Gaussian binomial coefficient."""
+        numerator, denominator = 1, 1
+        for index in range(dimension):
+            numerator *= 2 ** (number_of_qubits - index) - 1
+            denominator *= 2 ** (dimension - index) - 1
+        return numerator // denominator
+
+    @staticmethod
+    def _get_rank(masks):
+        """Rank over GF(2) of the bit vectors `masks`."""
+        pivots = {}
+        for mask in masks:
+            mask = int(mask)
+            while mask and mask.bit_length() in pivots:
+                mask ^= pivots[mask.bit_length()]
+            if mask:
+                pivots[mask.bit_length()] = mask
+        return len(pivots)
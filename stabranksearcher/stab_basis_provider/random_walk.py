@@ -1,7 +1,33 @@
+import copy
 import numpy as np
 from stabranksearcher.basis import Basis
+from stabranksearcher.quantum_state_tools import get_random_pauli_masks
 from stabranksearcher.stab_basis_provider.stab_basis_provider import StabBasisProvider
-from stabranksearcher.stab_basis_provider.random import RandomStabBasisProvider
+from stabranksearcher.stab_basis_provider.random import RandomStabBasisProvider, can_use_real_arithmetic
+from stabranksearcher.rng import get_rng, spawn_rngs
+
+
+def get_acceptance_probabilities(current_scores, tentative_scores, beta):
+    """Metropolis probabilities of accepting moves from `current_scores` to
+    `tentative_scores` at inverse temperature `beta`: exp(-beta * decrease)
+    for decreasing scores and 1 otherwise. The exponent is only evaluated
+    for decreasing scores, so that beta = inf rejects those and accepts
+    equal scores, instead of evaluating inf * 0.
+
+    Parameters
+    ----------
+    current_scores: float or numpy array of float
+    tentative_scores: float or numpy array of float
+    beta: float or numpy array of float
+
+    Returns
+    -------
+    float or numpy array of float
+    """
+    decreases = np.asarray(current_scores) - np.asarray(tentative_scores)
+    with np.errstate(invalid="ignore"):
+        probabilities = np.where(decreases > 0, np.exp(-1 * np.asarray(beta) * decreases), 1.)
+    return probabilities[()]
 
 
 class MoveDecider:
@@ -11,8 +37,9 @@ class MoveDecider:
 
 class SimulatedAnnealingMoveDecider:
 
-    def __init__(self, beta):
+    def __init__(self, beta, rng=None):
         self.beta = beta
+        self._rng = get_rng(rng)
 
     @property
     def beta(self):
@@ -28,8 +55,10 @@ class SimulatedAnnealingMoveDecider:
         if tentative_next_score > current_score:
             return True
         else:
-            prob_accept = np.exp(-1 * self.beta * (current_score - tentative_next_score))
-            return np.random.random() < prob_accept
+            prob_accept = get_acceptance_probabilities(current_scores=current_score,
+                                                       tentative_scores=tentative_next_score,
+                                                       beta=self.beta)
+            return self._rng.random() < prob_accept
 
 
 class BasisWithTargetState(Basis):
@@ -41,43 +70,113 @@ class BasisWithTargetState(Basis):
     method is called.
     """
 
-    def __init__(self, qstates, target_qstate):
-        super().__init__(qstates=qstates)
+    PROPOSAL_SELECTIONS = ("best", "boltzmann")
+
+    def __init__(self, qstates=None, target_qstate=None, kets=None, tableaux=None, real=False):
+        super().__init__(qstates=qstates, kets=kets, tableaux=tableaux, real=real)
         self._target_qstate = target_qstate
+        self._target_ket = target_qstate.ket.flatten()
+        if real:
+            self._target_ket = Basis._to_real_kets(kets=self._target_ket)
         self._score = None
 
     def score(self, qstate):
-        if qstate == self._target_qstate and self._score is not None:
+        if qstate == self._target_qstate:
+            if self._score is None:
+                self._score = self.score_ket(ket=self._target_ket)
             return self._score
         else:
             return super().score(qstate=qstate)
 
-    def move(self, move_decider, qstate_index=None, pauli=None):
+    def move(self, move_decider, qstate_index=None, pauli=None, rng=None,
+             number_of_proposals=1, proposal_selection="best"):
+        """
+        Parameters
+        ----------
+        move_decider: :obj:`~stabranksearcher.stab_basis_provider.random_walk.MoveDecider`
+        qstate_index: int or None
+        pauli: :obj:`qiskit.quantum_info.Pauli` or None
+            If both `qstate_index` and `pauli` are given, this move is
+            proposed; otherwise random moves are.
+        rng: :obj:`numpy.random.Generator`, int or None
+        number_of_proposals: int
+            Number of random neighbouring bases that are scored (in a single
+            batched computation) before one of them is passed to the
+            `move_decider`.
+        proposal_selection: str
+            How that one is chosen: "best" for the highest score, or
+            "boltzmann" for a random one with probability proportional to
+            exp(beta * score), where beta is the one of the `move_decider`
+            (1 if it has none).
+
+        Returns
+        -------
+        bool
+            Whether the move was accepted.
+        """
+        if proposal_selection not in self.PROPOSAL_SELECTIONS:
+            raise ValueError("Unknown proposal selection {}".format(proposal_selection))
 
         # store current score (for sake of speed when
         # undoing the move)
         current_score = self.score(qstate=self._target_qstate)
 
         # perform the move
-        if qstate_index is None or pauli is None:
-            self.randomly_modify()
-        else:
+        if qstate_index is not None and pauli is not None:
             self.deterministically_modify(qstate_index=qstate_index, pauli=pauli)
-
-        # store tentative next score (for sake of speed when
-        # keep the move)
-        tentative_next_score = self.score(qstate=self._target_qstate)
+            tentative_next_score = self.score(qstate=self._target_qstate)
+        elif number_of_proposals == 1:
+            self.randomly_modify(rng=rng)
+            tentative_next_score = self.score(qstate=self._target_qstate)
+        else:
+            tentative_next_score = self._move_to_proposal(move_decider=move_decider,
+                                                          rng=get_rng(rng),
+                                                          number_of_proposals=number_of_proposals,
+                                                          proposal_selection=proposal_selection)
 
         # decide whether to keep the move
         if move_decider.should_move(current_score=current_score, tentative_next_score=tentative_next_score):
             self._score = tentative_next_score
+            return True
         else:
             self.undo_last_modification()
             self._score = current_score
+            return False
 
-    def deterministically_modify(self, qstate_index, pauli):
+    def _move_to_proposal(self, move_decider, rng, number_of_proposals, proposal_selection):
+        """Replace a state by one of `number_of_proposals` random (nonzero)
+        neighbours, and return the resulting score."""
+        qstate_indices = np.empty(0, dtype=np.int64)
+        while len(qstate_indices) == 0:
+            new_qstate_indices = rng.integers(self.size, size=number_of_proposals)
+            x_masks, z_masks, phases = get_random_pauli_masks(number_of_qubits=self.number_of_qubits,
+                                                              size=number_of_proposals, rng=rng, real=self._real)
+            new_candidate_kets, is_nonzero, new_candidate_tableaux = \
+                self.get_candidates(qstate_indices=new_qstate_indices, x_masks=x_masks, z_masks=z_masks,
+                                    phases=phases)
+            qstate_indices = new_qstate_indices[is_nonzero]
+            candidate_kets = new_candidate_kets[:, is_nonzero]
+            candidate_tableaux = [tableau for tableau, nonzero in zip(new_candidate_tableaux, is_nonzero) if nonzero]
+        scores = self.scores_with_replacements(ket=self._target_ket,
+                                               qstate_indices=qstate_indices,
+                                               candidate_kets=candidate_kets)
+        if proposal_selection == "best":
+            chosen = np.argmax(scores)
+        else:
+            beta = getattr(move_decider, "beta", 1.)
+            weights = np.exp(beta * (scores - np.max(scores)))
+            chosen = rng.choice(len(scores), p=weights / np.sum(weights))
+        self._replace_ket(qstate_index=qstate_indices[chosen], ket=candidate_kets[:, chosen],
+                          tableau=candidate_tableaux[chosen])
+        return scores[chosen]
+
+    def _modify(self, qstate_index, x_mask, z_mask, phase):
         self._score = None
-        return super().deterministically_modify(qstate_index=qstate_index, pauli=pauli)
+        return super()._modify(qstate_index=qstate_index, x_mask=x_mask, z_mask=z_mask, phase=phase)
+
+    def replace_ket(self, qstate_index, ket, tableau=None):
+        self._score = None
+        return super().replace_ket(qstate_index=qstate_index, ket=ket, tableau=tableau)
 
     def undo_last_modification(self):
         self._score = None
@@ -100,14 +199,69 @@ class RandomWalkStabBasisProvider(RandomStabBasisProvider):
     stabrank: int
         The target stabilizer rank, i.e. the size of the tuples
         of stabilizer states.
+    rng: :obj:`numpy.random.Generator`, int or None
+        Source of randomness for the initial basis and the moves,
+        see :func:`~stabranksearcher.rng.get_rng`.
+    initial_basis: :obj:`~stabranksearcher.basis.Basis` or None
+        Basis to start the walk from (warm start), e.g. one found earlier
+        for a nearby stabilizer rank. If it is larger than `stabrank`,
+        its weakest states are dropped; if it is smaller, it is padded
+        with random stabilizer states. If None, the walk starts from a
+        random basis.
+    number_of_proposals: int
+    proposal_selection: str
+        See :meth:`BasisWithTargetState.move`.
+    real: bool or None
+        Whether to walk over real stabilizer states only, in real
+        arithmetic (see :class:`~stabranksearcher.basis.Basis`). If None,
+        this is done whenever the target (and the initial basis, if any)
+        is real up to a global phase, as e.g. Dicke states are.
     """
 
-    def __init__(self, target_qstate, stabrank=1):
+    def __init__(self, target_qstate, stabrank=1, rng=None, initial_basis=None,
+                 number_of_proposals=1, proposal_selection="best", real=None):
+        self._rng = get_rng(rng)
         self._target_qstate = target_qstate
         self._number_of_qubits = self._target_qstate.num_qubits
         self._stabrank = stabrank
+        if real is None:
+            real = can_use_real_arithmetic(target_ket=target_qstate.ket, initial_basis=initial_basis)
+        self._real = real
+        if real and initial_basis is not None:
+            initial_basis = initial_basis.to_real()
+        self._initial_basis = initial_basis
+        self._number_of_proposals = number_of_proposals
+        self._proposal_selection = proposal_selection
         self._counter = 0
         self._basis_with_target_state = None
+        self._last_move_accepted = None
+
+    @property
+    def real(self):
+        """Whether the walk is restricted to real stabilizer states."""
+        return self._real
+
+    @property
+    def last_move_accepted(self):
+        """Whether the move of the last call to :meth:`get_next_basis`
+        was accepted (None for the initial basis)."""
+        return self._last_move_accepted
+
+    def _get_initial_basis(self):
+        if self._initial_basis is None:
+            return self.get_random_stabilizer_state_basis(number_of_qubits=self._number_of_qubits,
+                                                          size=self._stabrank,
+                                                          rng=self._rng,
+                                                          real=self._real)
+        basis = self._initial_basis.without_weakest_qstates(ket=self._target_qstate.ket, size=self._stabrank)
+        if basis.size == self._stabrank:
+            return basis
+        padding = self.get_random_stabilizer_state_basis(number_of_qubits=self._number_of_qubits,
+                                                         size=self._stabrank - basis.size,
+                                                         rng=self._rng,
+                                                         real=self._real)
+        return Basis(kets=np.hstack((basis.kets, padding.kets)), tableaux=basis.tableaux + padding.tableaux,
+                     real=self._real)
 
     def get_next_basis(self, move_decider=None):
         r"""Modifies the previous_basis and returns the modified basis.
@@ -129,9 +283,58 @@ class RandomWalkStabBasisProvider(RandomStabBasisProvider):
         """
         if self._counter == 0:
             self._counter += 1
-            basis = self.get_random_stabilizer_state_basis(number_of_qubits=self._number_of_qubits, size=self._stabrank)
+            initial_basis = self._get_initial_basis()
             self._basis_with_target_state = \
-                BasisWithTargetState(qstates=basis.qstates, target_qstate=self._target_qstate)
+                BasisWithTargetState(kets=initial_basis.kets, tableaux=initial_basis.tableaux,
+                                     target_qstate=self._target_qstate, real=self._real)
+            self._last_move_accepted = None
         else:
-            self._basis_with_target_state.move(move_decider=move_decider)
+            self._last_move_accepted = \
+                self._basis_with_target_state.move(move_decider=move_decider, rng=self._rng,
+                                                   number_of_proposals=self._number_of_proposals,
+                                                   proposal_selection=self._proposal_selection)
         return self._basis_with_target_state
+
+    def redraw_basis(self):
+        """Continue the walk from a new random basis."""
+        basis = self.get_random_stabilizer_state_basis(number_of_qubits=self._number_of_qubits,
+                                                       size=self._stabrank,
+                                                       rng=self._rng,
+                                                       real=self._real)
+        self._basis_with_target_state = \
+            BasisWithTargetState(kets=basis.kets, tableaux=basis.tableaux, target_qstate=self._target_qstate,
+                                 real=self._real)
+
+    def replace_weakest_qstate(self):
+        """Replace the state of the current basis that contributes least
+        to the score by a random stabilizer state."""
+        basis = self._basis_with_target_state
+        qstate_index = basis.get_weakest_qstate_index(ket=self._target_qstate.ket)
+        if self._real:
+            ket = self.get_random_real_stabilizer_state(number_of_qubits=self._number_of_qubits, rng=self._rng)
+            basis.replace_ket(qstate_index=qstate_index, ket=ket)
+            return
+        qstate = self.get_random_stabilizer_state(number_of_qubits=self._number_of_qubits,
+                                                  rng=self._rng)
+        basis.replace_qstate(qstate_index=qstate_index, qstate=qstate)
+
+    def branch(self, rng=None):
+        """Independent copy of this random walk, continuing from the
+        current basis. The basis is cloned copy-on-write, so branching
+        does not copy any kets.
+
+        Parameters
+        ----------
+        rng: :obj:`numpy.random.Generator`, int or None
+            Source of randomness of the branch. If None, a child stream
+            of this walk's generator is used.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.stab_basis_provider.random_walk.RandomWalkStabBasisProvider`
+        """
+        branch = copy.copy(self)
+        branch._rng = spawn_rngs(seed=self._rng)[0] if rng is None else get_rng(rng)
+        if self._basis_with_target_state is not None:
+            branch._basis_with_target_state = self._basis_with_target_state.clone()
+        return branch
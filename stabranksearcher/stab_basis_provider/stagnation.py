@@ -0,0 +1,142 @@
+import collections
+
+
+class StagnationDetector:
+    """Detects when a random walk has stopped making progress.
+
+    The walk is considered stagnant once the best score has not improved
+    for `plateau_length` consecutive steps, or once the fraction of
+    accepted moves over the last `window` steps has dropped below
+    `min_acceptance_rate`.
+
+    Parameters
+    ----------
+    plateau_length: int or None
+        If None, plateaus are not detected.
+    window: int
+        Number of most recent steps over which the acceptance rate is computed.
+    min_acceptance_rate: float
+        If 0, acceptance collapse is not detected.
+    tolerance: float
+        Minimal increase of the best score that counts as improvement.
+    """
+
+    def __init__(self, plateau_length=None, window=100, min_acceptance_rate=0., tolerance=1e-12):
+        if plateau_length is not None and plateau_length < 1:
+            raise ValueError("plateau_length should be positive")
+        self._plateau_length = plateau_length
+        self._window = window
+        self._min_acceptance_rate = min_acceptance_rate
+        self._tolerance = tolerance
+        self.reset()
+
+    def reset(self):
+        self._best_score = None
+        self._steps_since_improvement = 0
+        self._acceptances = collections.deque(maxlen=self._window)
+
+    @property
+    def steps_since_improvement(self):
+        return self._steps_since_improvement
+
+    @property
+    def acceptance_rate(self):
+        if len(self._acceptances) == 0:
+            return None
+        return sum(self._acceptances) / len(self._acceptances)
+
+    def update(self, score, accepted):
+        """Register a step of the walk.
+
+        Parameters
+        ----------
+        score: float
+            Score after the step.
+        accepted: bool
+            Whether the move of this step was accepted.
+
+        Returns
+        -------
+        bool
+            Whether the walk is stagnant.
+        """
+        if self._best_score is None or score > self._best_score + self._tolerance:
+            self._best_score = score
+            self._steps_since_improvement = 0
+        else:
+            self._steps_since_improvement += 1
+        self._acceptances.append(bool(accepted))
+
+        is_on_plateau = (self._plateau_length is not None and
+                         self._steps_since_improvement >= self._plateau_length)
+        has_collapsed = (len(self._acceptances) == self._window and
+                         self.acceptance_rate < self._min_acceptance_rate)
+        return is_on_plateau or has_collapsed
+
+
+class RestartPolicy:
+    """What to do once a random walk has stagnated."""
+
+    NAME = None
+
+    # whether the annealing schedule restarts at its initial beta
+    RESETS_BETA = False
+
+    def restart(self, stab_basis_provider):
+        """
+        Parameters
+        ----------
+        stab_basis_provider: :obj:`~stabranksearcher.stab_basis_provider.random_walk.RandomWalkStabBasisProvider`
+        """
+        pass
+
+
+class RedrawRestartPolicy(RestartPolicy):
+    """Restart the walk from a new random basis."""
+
+    NAME = "redraw"
+
+    def restart(self, stab_basis_provider):
+        stab_basis_provider.redraw_basis()
+
+
+class ReplaceWeakestRestartPolicy(RestartPolicy):
+    """Replace the state that contributes least to the score by a random
+    stabilizer state."""
+
+    NAME = "replace_weakest"
+
+    def restart(self, stab_basis_provider):
+        stab_basis_provider.replace_weakest_qstate()
+
+
+class ReheatRestartPolicy(RestartPolicy):
+    """Keep the basis, but restart the annealing schedule."""
+
+    NAME = "reheat"
+    RESETS_BETA = True
+
+
+class RestartStatistics:
+    """Per restart policy: the number of restarts, the number of searches
+    that succeeded after a restart by the policy, and the budget (number
+    of steps) those searches left unused.
+    """
+
+    def __init__(self):
+        self.number_of_restarts = collections.Counter()
+        self.number_of_successes = collections.Counter()
+        self.budget_saved = collections.Counter()
+
+    def record_restart(self, policy_name):
+        self.number_of_restarts[policy_name] += 1
+
+    def record_success(self, policy_name, budget_saved):
+        self.number_of_successes[policy_name] += 1
+        self.budget_saved[policy_name] += budget_saved
+
+    def to_dict(self):
+        return {policy_name: {"restarts": self.number_of_restarts[policy_name],
+                              "successes": self.number_of_successes[policy_name],
+                              "budget_saved": self.budget_saved[policy_name]}
+                for policy_name in self.number_of_restarts}
@@ -0,0 +1,188 @@
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.quantum_state_tools import apply_paulis, get_random_pauli_masks
+from stabranksearcher.stab_basis_provider.random import RandomStabBasisProvider, can_use_real_arithmetic
+from stabranksearcher.stab_basis_provider.random_walk import get_acceptance_probabilities
+from stabranksearcher.rng import get_rng
+
+
+def score_stacked_kets(kets, target_ket):
+    """Scores of `target_ket` with respect to a stack of bases, see
+    :meth:`~stabranksearcher.basis.Basis.score_ket`.
+
+    Parameters
+    ----------
+    kets: numpy array
+        Array of shape (number of bases, 2^n, size of the bases).
+    target_ket: numpy array
+
+    Returns
+    -------
+    numpy array of float
+
+    Notes
+    -----
+    The span of each basis is found from a batched singular value
+    decomposition, with the same rank cut-off as :func:`scipy.linalg.orth`
+    (used by :class:`~stabranksearcher.basis.Basis`), so that linearly
+    dependent states do not count twice.
+    """
+    u, singular_values, _ = np.linalg.svd(kets, full_matrices=False)
+    cutoffs = np.finfo(singular_values.dtype).eps * max(kets.shape[1:]) * singular_values[:, :1]
+    overlaps = np.einsum("wdk,d->wk", u.conj(), np.ravel(target_ket))
+    return np.sqrt(np.sum(np.abs(overlaps) ** 2 * (singular_values > cutoffs), axis=1))
+
+
+class VectorizedRandomWalkStabBasisProvider(RandomStabBasisProvider):
+    """Independent random walks over tuples of stabilizer states, as
+    those of :class:`~stabranksearcher.stab_basis_provider.random_walk.RandomWalkStabBasisProvider`,
+    advanced in lockstep: the bases of all walkers are stacked in a single
+    array of shape (`number_of_walkers`, 2^n, `stabrank`), so that the
+    Pauli moves, the scoring and the Metropolis acceptance of a step are
+    a few array operations for all walkers together. This amortizes the
+    interpreter overhead of a step over the walkers, which dominates
+    for small numbers of qubits.
+
+    Parameters
+    ----------
+    target_qstate: QState
+    stabrank: int
+    number_of_walkers: int
+    rng: :obj:`numpy.random.Generator`, int or None
+    initial_basis: :obj:`~stabranksearcher.basis.Basis` or None
+        If given, all walkers start from this basis, without its weakest
+        states if it has more than `stabrank` states and padded with random
+        stabilizer states if it has fewer; otherwise each walker starts
+        from its own random basis.
+    real: bool or None
+        Whether the walkers are restricted to real stabilizer states, with
+        all kets stored as float64. If None, this is done whenever the
+        target (and the initial basis, if any) is real up to a global
+        phase.
+    """
+
+    def __init__(self, target_qstate, stabrank=1, number_of_walkers=16, rng=None, initial_basis=None,
+                 real=None):
+        self._rng = get_rng(rng)
+        if real is None:
+            real = can_use_real_arithmetic(target_ket=target_qstate.ket, initial_basis=initial_basis)
+        self._real = real
+        target_ket = np.ravel(target_qstate.ket) / np.linalg.norm(target_qstate.ket)
+        self._target_ket = Basis._to_real_kets(kets=target_ket) if real else target_ket
+        self._number_of_qubits = target_qstate.num_qubits
+        self._stabrank = stabrank
+        self._number_of_walkers = number_of_walkers
+        if real and initial_basis is not None:
+            initial_basis = initial_basis.to_real()
+        self._initial_basis = initial_basis
+        self._kets = None
+        self._scores = None
+
+    @property
+    def number_of_walkers(self):
+        return self._number_of_walkers
+
+    @property
+    def real(self):
+        return self._real
+
+    @property
+    def scores(self):
+        """Current scores of the walkers (None before the first step)."""
+        return self._scores
+
+    def get_basis(self, walker_index):
+        """Copy of the current basis of a walker.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.basis.Basis`
+        """
+        return Basis(kets=self._kets[walker_index], real=self._real)
+
+    def _initialize(self):
+        dimension = 2 ** self._number_of_qubits
+        self._kets = np.empty((self._number_of_walkers, dimension, self._stabrank),
+                              dtype=np.float64 if self._real else np.complex128)
+        if self._initial_basis is None:
+            for walker_index in range(self._number_of_walkers):
+                self._kets[walker_index] = \
+                    self.get_random_stabilizer_state_basis(number_of_qubits=self._number_of_qubits,
+                                                           size=self._stabrank,
+                                                           rng=self._rng,
+                                                           real=self._real).kets
+        else:
+            self._kets[:] = self._get_initial_kets()
+        self._scores = score_stacked_kets(kets=self._kets, target_ket=self._target_ket)
+
+    def _get_initial_kets(self):
+        """The kets of the initial basis, without its weakest states if it
+        is larger than `stabrank` and padded with random stabilizer states
+        if it is smaller."""
+        basis = self._initial_basis.without_weakest_qstates(ket=self._target_ket, size=self._stabrank)
+        if basis.size == self._stabrank:
+            return basis.kets
+        padding = self.get_random_stabilizer_state_basis(number_of_qubits=self._number_of_qubits,
+                                                         size=self._stabrank - basis.size,
+                                                         rng=self._rng,
+                                                         real=self._real)
+        return np.hstack((basis.kets, padding.kets))
+
+    def _draw_moves(self):
+        """Per walker, the index of a state in its basis and that state
+        replaced by c(I + P) times itself for a random Pauli P, redrawn
+        until the result is nonzero."""
+        number_of_walkers = self._number_of_walkers
+        dimension = 2 ** self._number_of_qubits
+        qstate_indices = np.empty(number_of_walkers, dtype=np.int64)
+        candidate_kets = np.empty((dimension, number_of_walkers), dtype=self._kets.dtype)
+        walker_indices = np.arange(number_of_walkers)
+        while len(walker_indices) > 0:
+            new_qstate_indices = self._rng.integers(self._stabrank, size=len(walker_indices))
+            kets = self._kets[walker_indices, :, new_qstate_indices].T
+            x_masks, z_masks, phases = get_random_pauli_masks(number_of_qubits=self._number_of_qubits,
+                                                              size=len(walker_indices), rng=self._rng,
+                                                              real=self._real)
+            new_candidate_kets = kets + apply_paulis(kets=kets, x_masks=x_masks, z_masks=z_masks, phases=phases)
+            norms = np.linalg.norm(new_candidate_kets, axis=0)
+            is_nonzero = ~np.isclose(norms, 0.)
+            qstate_indices[walker_indices[is_nonzero]] = new_qstate_indices[is_nonzero]
+            candidate_kets[:, walker_indices[is_nonzero]] = new_candidate_kets[:, is_nonzero] / norms[is_nonzero]
+            walker_indices = walker_indices[~is_nonzero]
+        return qstate_indices, candidate_kets
+
+    def get_next_scores(self, beta):
+        """Let every walker propose a move and accept it according to the
+        Metropolis rule of
+        :class:`~stabranksearcher.stab_basis_provider.random_walk.SimulatedAnnealingMoveDecider`.
+        The first call draws the initial bases instead.
+
+        Parameters
+        ----------
+        beta: float or numpy array of float
+            Inverse temperature, for all walkers or per walker.
+
+        Returns
+        -------
+        numpy array of float
+            The scores of the walkers after the step.
+        """
+        if self._kets is None:
+            self._initialize()
+            return self._scores
+        qstate_indices, candidate_kets = self._draw_moves()
+        walker_indices = np.arange(self._number_of_walkers)
+        # the moves are made in place; only the replaced states are kept,
+        # to restore them for the walkers whose move is rejected
+        replaced_kets = self._kets[walker_indices, :, qstate_indices]
+        self._kets[walker_indices, :, qstate_indices] = candidate_kets.T
+        tentative_scores = score_stacked_kets(kets=self._kets, target_ket=self._target_ket)
+        acceptance_probabilities = get_acceptance_probabilities(current_scores=self._scores,
+                                                                tentative_scores=tentative_scores,
+                                                                beta=beta)
+        accepted = (tentative_scores > self._scores) | (self._rng.random(self._number_of_walkers) <
+                                                        acceptance_probabilities)
+        rejected = ~accepted
+        self._kets[walker_indices[rejected], :, qstate_indices[rejected]] = replaced_kets[rejected]
+        self._scores = np.where(accepted, tentative_scores, self._scores)
+        return self._scores
@@ -0,0 +1,260 @@
+import numpy as np
+
+
+def _popcount_parity(integer):
+    return bin(integer).count("1") % 2
+
+
+def multiply_paulis(first, second):
+    """Product of two Pauli strings in bitmask representation.
+
+    Parameters
+    ----------
+    first: tuple (int, int, int)
+    second: tuple (int, int, int)
+        `(x_mask, z_mask, phase)`, representing the operator
+        :math:`(-i)^{phase} Z^{z_{mask}} X^{x_{mask}}` as in
+        :func:`~stabranksearcher.quantum_state_tools.apply_paulis`.
+
+    Returns
+    -------
+    tuple (int, int, int)
+        The product `first` times `second`.
+    """
+    x_first, z_first, phase_first = first
+    x_second, z_second, phase_second = second
+    phase = (phase_first + phase_second + 2 * _popcount_parity(x_first & z_second)) % 4
+    return x_first ^ x_second, z_first ^ z_second, phase
+
+
+def paulis_commute(first, second):
+    """Whether two Pauli strings in bitmask representation (see
+    :func:`multiply_paulis`) commute."""
+    x_first, z_first, _ = first
+    x_second, z_second, _ = second
+    return _popcount_parity(x_first & z_second) == _popcount_parity(z_first & x_second)
+
+
+class StabilizerTableau:
+    """Generators of the stabilizer group of a stabilizer state.
+
+    Row `i` of the check matrix `[X|Z]` together with the sign
+    `phases[i]` is the Hermitian Pauli string :math:`\\pm \\bigotimes_q
+    \\sigma_q` with :math:`\\sigma_q` equal to X, Z or Y if only the
+    X-bit, only the Z-bit or both bits of qubit `q` are set. As in
+    NetSquid, qubit 0 is the most significant bit of the index of an
+    amplitude, and the check matrix and phases have the same meaning as
+    those of :obj:`netsquid.qubits.stabtools.StabRepr`.
+
+    Parameters
+    ----------
+    check_matrix: numpy array
+        Binary matrix of size `number_of_qubits` x `2 * number_of_qubits`.
+    phases: list of int
+        Signs (+1 or -1) of the generators.
+    """
+
+    def __init__(self, check_matrix, phases):
+        check_matrix = np.array(check_matrix, dtype=np.int8) % 2
+        number_of_qubits = check_matrix.shape[0]
+        if check_matrix.shape != (number_of_qubits, 2 * number_of_qubits):
+            raise ValueError("Check matrix of size {} is not n x 2n".format(check_matrix.shape))
+        phases = np.array(phases, dtype=np.int8)
+        if phases.shape != (number_of_qubits,) or not np.all(np.abs(phases) == 1):
+            raise ValueError("Phases {} are not one sign per generator".format(phases))
+        self._check_matrix = check_matrix
+        self._phases = phases
+        self._check_matrix.setflags(write=False)
+        self._phases.setflags(write=False)
+        self._reduced = None
+
+    @property
+    def check_matrix(self):
+        return self._check_matrix
+
+    @property
+    def phases(self):
+        return self._phases
+
+    @property
+    def number_of_qubits(self):
+        return self._check_matrix.shape[0]
+
+    def __eq__(self, other):
+        return isinstance(other, StabilizerTableau) and \
+            np.array_equal(self._check_matrix, other._check_matrix) and \
+            np.array_equal(self._phases, other._phases)
+
+    def __hash__(self):
+        return hash((self._check_matrix.tobytes(), self._phases.tobytes()))
+
+    def __str__(self):
+        letters = {(0, 0): "I", (1, 0): "X", (0, 1): "Z", (1, 1): "Y"}
+        number_of_qubits = self.number_of_qubits
+        return "\n".join(("+" if phase == 1 else "-") +
+                         "".join(letters[(row[qubit], row[number_of_qubits + qubit])]
+                                 for qubit in range(number_of_qubits))
+                         for row, phase in zip(self._check_matrix, self._phases))
+
+    def _get_bit_values(self):
+        return 1 << np.arange(self.number_of_qubits - 1, -1, -1, dtype=np.int64)
+
+    def get_pauli_masks(self):
+        """Bitmask representation of the generators.
+
+        Returns
+        -------
+        tuple (numpy array of int, numpy array of int, numpy array of int)
+            `(x_masks, z_masks, phases)`, see
+            :func:`~stabranksearcher.quantum_state_tools.apply_paulis`.
+        """
+        number_of_qubits = self.number_of_qubits
+        bit_values = self._get_bit_values()
+        x_bits = self._check_matrix[:, :number_of_qubits].astype(np.int64)
+        z_bits = self._check_matrix[:, number_of_qubits:].astype(np.int64)
+        # Y = -iZX, so each Y contributes a factor -i
+        phases = ((1 - self._phases) + np.sum(x_bits & z_bits, axis=1)) % 4
+        return x_bits.dot(bit_values), z_bits.dot(bit_values), phases.astype(np.int64)
+
+    @classmethod
+    def from_pauli_masks(cls, number_of_qubits, x_masks, z_masks, phases):
+        """Inverse of :meth:`get_pauli_masks`.
+
+        Raises
+        ------
+        ValueError
+            If one of the Paulis is not Hermitian.
+        """
+        bit_values = 1 << np.arange(number_of_qubits - 1, -1, -1, dtype=np.int64)
+        x_bits = (np.asarray(x_masks, dtype=np.int64)[:, np.newaxis] & bit_values) > 0
+        z_bits = (np.asarray(z_masks, dtype=np.int64)[:, np.newaxis] & bit_values) > 0
+        hermitian_phases = (np.asarray(phases) - np.sum(x_bits & z_bits, axis=1)) % 4
+        if np.any(hermitian_phases % 2 == 1):
+            raise ValueError("Paulis with phases {} are not Hermitian".format(phases))
+        return cls(check_matrix=np.hstack((x_bits, z_bits)), phases=1 - hermitian_phases)
+
+    def get_reduced(self):
+        """The same stabilizer group, with generators in reduced row
+        echelon form (on the check matrix with the X-part first). Since
+        that form is unique, two tableaus describe the same state if and
+        only if their reduced forms are equal. The reduced form is computed
+        once per tableau.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.tableau.StabilizerTableau`
+        """
+        if self._reduced is None:
+            self._reduced = self._compute_reduced()
+            # the reduced form is its own reduced form
+            self._reduced._reduced = self._reduced
+        return self._reduced
+
+    def _compute_reduced(self):
+        number_of_qubits = self.number_of_qubits
+        rows = self._get_pauli_rows()
+        pivot_row = 0
+        for bit in range(2 * number_of_qubits - 1, -1, -1):
+            def has_bit(row):
+                mask = row[0] if bit >= number_of_qubits else row[1]
+                return (mask >> (bit % number_of_qubits)) & 1
+            candidates = [index for index in range(pivot_row, len(rows)) if has_bit(rows[index])]
+            if not candidates:
+                continue
+            rows[pivot_row], rows[candidates[0]] = rows[candidates[0]], rows[pivot_row]
+            for index in range(len(rows)):
+                if index != pivot_row and has_bit(rows[index]):
+                    rows[index] = multiply_paulis(rows[pivot_row], rows[index])
+            pivot_row += 1
+        x_masks, z_masks, phases = zip(*rows)
+        return StabilizerTableau.from_pauli_masks(number_of_qubits=number_of_qubits,
+                                                  x_masks=x_masks, z_masks=z_masks, phases=phases)
+
+    def _get_pauli_rows(self):
+        x_masks, z_masks, phases = self.get_pauli_masks()
+        return [(int(x_mask), int(z_mask), int(phase)) for x_mask, z_mask, phase in zip(x_masks, z_masks, phases)]
+
+    def get_sign(self, pauli):
+        """The sign s such that `s * pauli` is in the stabilizer group,
+        i.e. the eigenvalue of the state for the Hermitian `pauli`.
+
+        Parameters
+        ----------
+        pauli: tuple (int, int, int)
+            Hermitian Pauli string in bitmask representation, see
+            :func:`multiply_paulis`, that commutes with all generators.
+
+        Returns
+        -------
+        int
+            +1 or -1.
+        """
+        number_of_qubits = self.number_of_qubits
+
+        def get_pivot_bit(row):
+            return ((row[0] << number_of_qubits) | row[1]).bit_length() - 1
+
+        pivot_rows = {}
+        for row in self._get_pauli_rows():
+            while get_pivot_bit(row) in pivot_rows:
+                row = multiply_paulis(pivot_rows[get_pivot_bit(row)], row)
+            pivot_rows[get_pivot_bit(row)] = row
+        # since all factors commute, multiplying `pauli` by the generators
+        # that make up +-pauli yields +-I
+        product = pauli
+        while get_pivot_bit(product) >= 0:
+            product = multiply_paulis(pivot_rows[get_pivot_bit(product)], product)
+        return 1 if product[2] == 0 else -1
+
+    def apply_identity_plus_pauli(self, x_mask, z_mask, phase):
+        r"""Tableau of the state :math:`c(I + P)\ket{\phi}`, with
+        :math:`\ket{\phi}` the state of this tableau and `c` a
+        normalization constant, in time O(n^2) for n qubits.
+
+        Parameters
+        ----------
+        x_mask: int
+        z_mask: int
+        phase: int
+            The Pauli P, see :func:`multiply_paulis`.
+
+        Returns
+        -------
+        :obj:`~stabranksearcher.tableau.StabilizerTableau` or None
+            None if :math:`(I + P)\ket{\phi} = 0`.
+
+        Notes
+        -----
+        Write P = Q or P = iQ with Q a Hermitian Pauli. If Q commutes with
+        all generators, then it is (up to sign s) in the stabilizer group,
+        so :math:`(I + P)\ket{\phi}` is :math:`(1 + s)\ket{\phi}` or
+        :math:`(1 + is)\ket{\phi}`. Otherwise, I + Q projects onto the +1
+        eigenspace of Q: Q replaces one anticommuting generator g, and the
+        other anticommuting generators are multiplied by g (as for a
+        measurement of Q). And I + iQ is proportional to the Clifford
+        :math:`e^{i\pi Q / 4}`, which maps each anticommuting generator h
+        to iQh.
+        """
+        x_mask, z_mask = int(x_mask), int(z_mask)
+        is_rotation = (int(phase) - _popcount_parity(x_mask & z_mask)) % 2 == 1
+        # P = iQ with Q = -iP, i.e. (-i)^{phase + 1} Z^z X^x
+        pauli = (x_mask, z_mask, (int(phase) + is_rotation) % 4)
+        rows = self._get_pauli_rows()
+        anticommuting = [index for index, row in enumerate(rows) if not paulis_commute(row, pauli)]
+        if not anticommuting:
+            if is_rotation or self.get_sign(pauli=pauli) == 1:
+                return self
+            return None
+        if is_rotation:
+            # i = (-i)^3
+            rotation = (x_mask, z_mask, (pauli[2] + 3) % 4)
+            for index in anticommuting:
+                rows[index] = multiply_paulis(rotation, rows[index])
+        else:
+            first = anticommuting[0]
+            for index in anticommuting[1:]:
+                rows[index] = multiply_paulis(rows[first], rows[index])
+            rows[first] = pauli
+        x_masks, z_masks, phases = zip(*rows)
+        return StabilizerTableau.from_pauli_masks(number_of_qubits=self.number_of_qubits,
+                                                  x_masks=x_masks, z_masks=z_masks, phases=phases)
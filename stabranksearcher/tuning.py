@@ -0,0 +1,200 @@
+import math
+import itertools
+import numpy as np
+from stabranksearcher.rank_searcher import RandomWalkStabRankSearcher
+from stabranksearcher.rng import spawn_rngs
+
+CONFIGURATION_KEYS = ("beta_init", "beta_final", "number_of_betas", "number_of_bases")
+
+
+def get_annealing_grid(beta_inits, beta_finals, numbers_of_betas, numbers_of_bases):
+    """All combinations of the given values of the annealing parameters,
+    leaving out those with `beta_final` not above `beta_init`.
+
+    Returns
+    -------
+    list of dict
+        Configurations with the keys :data:`CONFIGURATION_KEYS`.
+    """
+    return [dict(zip(CONFIGURATION_KEYS, values))
+            for values in itertools.product(beta_inits, beta_finals, numbers_of_betas, numbers_of_bases)
+            if values[1] > values[0]]
+
+
+class PilotStatistics:
+    """Outcomes of the pilot runs of a single annealing configuration.
+
+    Parameters
+    ----------
+    configuration: dict
+        Values of :data:`CONFIGURATION_KEYS`.
+    """
+
+    def __init__(self, configuration):
+        self._configuration = dict(configuration)
+        self._number_of_runs = 0
+        self._number_of_successes = 0
+        self._elapsed = 0.
+        self._total_score = 0.
+
+    @property
+    def configuration(self):
+        return self._configuration
+
+    @property
+    def number_of_runs(self):
+        return self._number_of_runs
+
+    @property
+    def number_of_successes(self):
+        return self._number_of_successes
+
+    @property
+    def elapsed(self):
+        """Total wall-clock time of the runs in seconds."""
+        return self._elapsed
+
+    def record(self, result):
+        """
+        Parameters
+        ----------
+        result: :obj:`~stabranksearcher.search_result.SearchResult`
+        """
+        self._number_of_runs += 1
+        self._number_of_successes += int(result.success)
+        self._elapsed += result.elapsed
+        self._total_score += 0. if result.score is None else result.score
+
+    @property
+    def success_probability(self):
+        return self._number_of_successes / self._number_of_runs if self._number_of_runs > 0 else 0.
+
+    @property
+    def success_rate(self):
+        """Estimated success probability per second of searching, i.e. the
+        number of successes per second over all runs."""
+        return self._number_of_successes / self._elapsed if self._elapsed > 0 else 0.
+
+    @property
+    def expected_time_to_solution(self):
+        """Expected wall-clock time until a solution when restarting the
+        search until it succeeds, i.e. the mean time per run divided by
+        the success probability (infinite without successes)."""
+        return 1 / self.success_rate if self.success_rate > 0 else math.inf
+
+    @property
+    def mean_score(self):
+        return self._total_score / self._number_of_runs if self._number_of_runs > 0 else 0.
+
+    def get_sort_key(self):
+        """Key by which configurations are ranked (higher is better): the
+        success rate, with ties (e.g. no successes) broken by the mean
+        score of the best bases."""
+        return self.success_rate, self.mean_score
+
+    def to_dict(self):
+        return {"configuration": self._configuration,
+                "number_of_runs": self._number_of_runs,
+                "number_of_successes": self._number_of_successes,
+                "elapsed": self._elapsed,
+                "success_rate": self.success_rate,
+                "mean_score": self.mean_score}
+
+
+class AnnealingTuner:
+    """Chooses the annealing parameters of a random-walk searcher from
+    short seeded pilot searches, either on the target itself or on a
+    smaller proxy target (e.g. a Dicke state on fewer qubits).
+
+    Parameters
+    ----------
+    configurations: list of dict
+        Candidate configurations, with the keys :data:`CONFIGURATION_KEYS`,
+        e.g. from :func:`get_annealing_grid`.
+    searcher_cls: class
+        Searcher taking `beta_init`, `beta_final` and `number_of_betas` as
+        arguments, e.g.
+        :class:`~stabranksearcher.rank_searcher.RandomWalkStabRankSearcher`.
+    searcher_parameters: dict or None
+        Further keyword arguments of the searcher.
+    seed: int or None
+        Every configuration gets its own stream of seeds for its pilot
+        runs, derived from this one.
+    time_limit: float or None
+        Maximal wall-clock time in seconds of a single pilot run.
+    """
+
+    def __init__(self, configurations, searcher_cls=RandomWalkStabRankSearcher, searcher_parameters=None,
+                 seed=None, time_limit=None):
+        if len(configurations) == 0:
+            raise ValueError("Need at least one configuration")
+        self._statistics = [PilotStatistics(configuration=configuration) for configuration in configurations]
+        self._searcher_cls = searcher_cls
+        self._searcher_parameters = {} if searcher_parameters is None else dict(searcher_parameters)
+        self._seed_sequences = np.random.SeedSequence(seed).spawn(len(configurations))
+        self._time_limit = time_limit
+
+    @property
+    def statistics(self):
+        """:obj:`PilotStatistics` per configuration, in the given order."""
+        return self._statistics
+
+    def _run_pilots(self, configuration_index, target_qstate, stabrank, number_of_runs):
+        statistics = self._statistics[configuration_index]
+        configuration = statistics.configuration
+        for rng in spawn_rngs(seed=self._seed_sequences[configuration_index], number_of_streams=number_of_runs):
+            searcher = self._searcher_cls(beta_init=configuration["beta_init"],
+                                          beta_final=configuration["beta_final"],
+                                          number_of_betas=configuration["number_of_betas"],
+                                          rng=rng,
+                                          time_limit=self._time_limit,
+                                          **self._searcher_parameters)
+            result = searcher.run(target_qstate=target_qstate, stabrank=stabrank,
+                                  number_of_bases=configuration["number_of_bases"])
+            statistics.record(result=result)
+
+    def _sort(self, configuration_indices):
+        return sorted(configuration_indices, key=lambda index: self._statistics[index].get_sort_key(), reverse=True)
+
+    def run_grid(self, target_qstate, stabrank, number_of_runs=5):
+        """Run `number_of_runs` pilot searches for every configuration.
+
+        Returns
+        -------
+        list of :obj:`PilotStatistics`
+            All configurations, best first.
+        """
+        for configuration_index in range(len(self._statistics)):
+            self._run_pilots(configuration_index=configuration_index, target_qstate=target_qstate,
+                             stabrank=stabrank, number_of_runs=number_of_runs)
+        return [self._statistics[index] for index in self._sort(range(len(self._statistics)))]
+
+    def run_successive_halving(self, target_qstate, stabrank, number_of_runs=1, reduction_factor=2):
+        """Successive halving: run `number_of_runs` pilot searches for all
+        configurations, keep the best 1 / `reduction_factor` of them, give
+        those `reduction_factor` times as many further runs, and so on until
+        a single configuration is left. Poor configurations thereby cost
+        few runs, while the good ones are compared on many.
+
+        Returns
+        -------
+        list of :obj:`PilotStatistics`
+            All configurations, the last one left first, followed by the
+            others in reverse order of elimination.
+        """
+        if reduction_factor < 2:
+            raise ValueError("reduction_factor should be at least 2")
+        remaining_indices = list(range(len(self._statistics)))
+        eliminated_indices = []
+        while True:
+            for configuration_index in remaining_indices:
+                self._run_pilots(configuration_index=configuration_index, target_qstate=target_qstate,
+                                 stabrank=stabrank, number_of_runs=number_of_runs)
+            remaining_indices = self._sort(remaining_indices)
+            if len(remaining_indices) == 1:
+                break
+            number_to_keep = math.ceil(len(remaining_indices) / reduction_factor)
+            eliminated_indices = remaining_indices[number_to_keep:] + eliminated_indices
+            remaining_indices = remaining_indices[:number_to_keep]
+            number_of_runs *= reduction_factor
+        return [self._statistics[index] for index in remaining_indices + eliminated_indices]
@@ -0,0 +1,492 @@
+"""Work queue in a shared directory, for running sweeps with any number of
+worker processes on any number of hosts that see the same filesystem.
+
+Tasks are JSON files that move between the subdirectories `pending`,
+`claimed` and `results` by atomic renames, so no locks are needed:
+
+- a worker claims a task by renaming it from `pending` to `claimed`;
+  if several workers try at the same time, exactly one rename succeeds;
+- while a task runs, its worker touches the claimed file (heartbeat);
+- any worker moves claimed tasks whose heartbeat is older than the
+  timeout back to `pending`, e.g. after their worker crashed;
+- results are written to a temporary file and renamed into `results`.
+
+A task that is requeued while its original worker is still alive may be
+run twice; since results are keyed by task, this only costs time.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import hashlib
+import threading
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.dicke_state_factory import (
+    get_dicke_state,
+    get_recursive_dicke_basis,
+    get_stored_dicke_basis_getter)
+from stabranksearcher.rank_searcher import (
+    RandomWalkStabRankSearcher,
+    VectorizedRandomWalkStabRankSearcher,
+    run_rank_descent)
+from stabranksearcher.quantum_state_tools import ket_to_qstate
+from stabranksearcher.result_store import ResultStore
+from stabranksearcher.search_result import SearchResult, KNOWN, encode_search_result, decode_ket
+
+
+def _write_json_atomically(data, path, temporary_directory):
+    temporary_path = os.path.join(temporary_directory, uuid.uuid4().hex)
+    with open(temporary_path, "w") as f:
+        json.dump(data, f)
+    os.rename(temporary_path, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_task_id(task):
+    """Identifier of a task, determined by its content."""
+    return hashlib.sha1(json.dumps(task, sort_keys=True).encode()).hexdigest()
+
+
+class WorkQueue:
+    """
+    Parameters
+    ----------
+    directory: str
+        Shared directory holding the queue; created if it does not exist.
+    heartbeat_timeout: float
+        Number of seconds after which a claimed task without heartbeat
+        is considered abandoned and requeued.
+    """
+
+    PENDING = "pending"
+    CLAIMED = "claimed"
+    RESULTS = "results"
+    TMP = "tmp"
+
+    def __init__(self, directory, heartbeat_timeout=300.):
+        self._directory = directory
+        self._heartbeat_timeout = heartbeat_timeout
+        for subdirectory in [self.PENDING, self.CLAIMED, self.RESULTS, self.TMP]:
+            os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def heartbeat_timeout(self):
+        return self._heartbeat_timeout
+
+    def _path(self, subdirectory, task_id):
+        return os.path.join(self._directory, subdirectory, task_id + ".json")
+
+    def _task_ids(self, subdirectory):
+        return sorted(name[:-len(".json")]
+                      for name in os.listdir(os.path.join(self._directory, subdirectory))
+                      if name.endswith(".json"))
+
+    def add_task(self, task):
+        """Add a task (a JSON-serializable dict) unless the same task is
+        already pending, claimed or finished.
+
+        Returns
+        -------
+        str
+            Identifier of the task.
+        """
+        task_id = get_task_id(task)
+        if not any(os.path.exists(self._path(subdirectory, task_id))
+                   for subdirectory in [self.PENDING, self.CLAIMED, self.RESULTS]):
+            _write_json_atomically(task, self._path(self.PENDING, task_id),
+                                   temporary_directory=os.path.join(self._directory, self.TMP))
+        return task_id
+
+    def claim(self):
+        """Claim a pending task.
+
+        Returns
+        -------
+        tuple (str, dict) or None
+            Identifier and content of the claimed task, or None if no task
+            is pending.
+        """
+        for task_id in self._task_ids(self.PENDING):
+            pending_path = self._path(self.PENDING, task_id)
+            claimed_path = self._path(self.CLAIMED, task_id)
+            try:
+                # the rename keeps the modification time, which would make a
+                # task that was pending for long look stale before its first
+                # heartbeat
+                os.utime(pending_path)
+                os.rename(pending_path, claimed_path)
+            except FileNotFoundError:
+                # claimed by another worker in the meantime
+                continue
+            if os.path.exists(self._path(self.RESULTS, task_id)):
+                # requeued after its first worker finished it after all
+                self._remove(claimed_path)
+                continue
+            self.heartbeat(task_id=task_id)
+            return task_id, _read_json(claimed_path)
+        return None
+
+    def heartbeat(self, task_id):
+        """Mark a claimed task as still being worked on.
+
+        Returns
+        -------
+        bool
+            False if the task is no longer claimed, e.g. because it was
+            requeued.
+        """
+        try:
+            os.utime(self._path(self.CLAIMED, task_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, task_id, result):
+        """Store the result (a JSON-serializable dict) of a claimed task."""
+        _write_json_atomically(result, self._path(self.RESULTS, task_id),
+                               temporary_directory=os.path.join(self._directory, self.TMP))
+        self._remove(self._path(self.CLAIMED, task_id))
+
+    def requeue_stale(self):
+        """Move claimed tasks whose heartbeat has timed out back to pending.
+
+        Returns
+        -------
+        int
+            Number of requeued tasks.
+        """
+        number_requeued = 0
+        now = time.time()
+        for task_id in self._task_ids(self.CLAIMED):
+            claimed_path = self._path(self.CLAIMED, task_id)
+            try:
+                is_stale = now - os.path.getmtime(claimed_path) > self._heartbeat_timeout
+                if is_stale:
+                    os.rename(claimed_path, self._path(self.PENDING, task_id))
+                    number_requeued += 1
+            except FileNotFoundError:
+                continue
+        return number_requeued
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @property
+    def number_pending(self):
+        return len(self._task_ids(self.PENDING))
+
+    @property
+    def number_claimed(self):
+        return len(self._task_ids(self.CLAIMED))
+
+    def is_finished(self):
+        """Whether no task is pending or claimed."""
+        return self.number_pending == 0 and self.number_claimed == 0
+
+    def get_task(self, task_id):
+        for subdirectory in [self.PENDING, self.CLAIMED]:
+            try:
+                return _read_json(self._path(subdirectory, task_id))
+            except FileNotFoundError:
+                continue
+        return None
+
+    def get_results(self):
+        """
+        Returns
+        -------
+        dict
+            Result per task identifier.
+        """
+        return {task_id: _read_json(self._path(self.RESULTS, task_id))
+                for task_id in self._task_ids(self.RESULTS)}
+
+
+class _Heartbeat:
+
+    def __init__(self, work_queue, task_id, interval):
+        self._work_queue = work_queue
+        self._task_id = task_id
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    def _beat(self):
+        while not self._stopped.wait(self._interval):
+            self._work_queue.heartbeat(task_id=self._task_id)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stopped.set()
+        self._thread.join()
+
+
+def get_worker_id():
+    return "{}-{}".format(socket.gethostname(), os.getpid())
+
+
+def run_worker(directory, task_runner=None, heartbeat_timeout=300., heartbeat_interval=None,
+               poll_interval=1., wait_for_claimed=True):
+    """Claim and run tasks from the work queue in `directory` until it
+    is finished.
+
+    Parameters
+    ----------
+    directory: str
+    task_runner: function or None
+        Maps a task (dict) to its result (JSON-serializable dict). An
+        exception is stored as result with key `error`. The task itself,
+        the worker and the wall-clock time are added to the result.
+        Defaults to :func:`run_dicke_task`.
+    heartbeat_timeout: float
+        See :class:`WorkQueue`; should be the same for all workers.
+    heartbeat_interval: float or None
+        Seconds between two heartbeats; defaults to a quarter of the timeout.
+    poll_interval: float
+        Seconds to wait before looking for pending tasks again, while
+        other workers still hold claimed tasks.
+    wait_for_claimed: bool
+        Whether to keep running while no task is pending but other
+        workers still hold claimed tasks (which might be requeued).
+
+    Returns
+    -------
+    int
+        Number of tasks run by this worker.
+    """
+    if task_runner is None:
+        task_runner = run_dicke_task
+    if heartbeat_interval is None:
+        heartbeat_interval = heartbeat_timeout / 4
+    work_queue = WorkQueue(directory=directory, heartbeat_timeout=heartbeat_timeout)
+    worker_id = get_worker_id()
+    number_of_tasks_run = 0
+    while True:
+        work_queue.requeue_stale()
+        claimed = work_queue.claim()
+        if claimed is None:
+            if work_queue.number_pending == 0 and (work_queue.number_claimed == 0 or not wait_for_claimed):
+                return number_of_tasks_run
+            time.sleep(poll_interval)
+            continue
+        task_id, task = claimed
+        start_time = time.perf_counter()
+        with _Heartbeat(work_queue=work_queue, task_id=task_id, interval=heartbeat_interval):
+            try:
+                result = task_runner(task)
+            except Exception as error:
+                result = {"error": repr(error)}
+        result["task"] = task
+        result["worker"] = worker_id
+        result["wall_time"] = time.perf_counter() - start_time
+        work_queue.complete(task_id=task_id, result=result)
+        number_of_tasks_run += 1
+
+
+def populate_dicke_sweep(work_queue, numbers_of_qubits, stabranks, beta_schedules,
+                         number_of_bases, hamming_weights=None, seed=None, time_limit=None,
+                         number_of_walkers=None, result_store=None, recursive_warm_start=False,
+                         rank_descent=False):
+    """Add one task per grid point of a sweep over Dicke states.
+
+    Parameters
+    ----------
+    work_queue: :obj:`WorkQueue`
+    numbers_of_qubits: list of int
+    stabranks: list of int
+    beta_schedules: list of tuple (float, float, int)
+        Values of (beta_init, beta_final, number_of_betas).
+    number_of_bases: int
+        Number of steps per value of beta.
+    hamming_weights: list of int or None
+        If None, all Hamming weights from 0 to the number of qubits.
+    seed: int or None
+        Each task gets its own seed, derived from this one.
+    time_limit: float or None
+        Maximal wall-clock time in seconds of each task.
+    number_of_walkers: int or None
+        If given, each task runs this many walks in lockstep in its worker,
+        see :class:`~stabranksearcher.rank_searcher.VectorizedRandomWalkStabRankSearcher`.
+    result_store: str or None
+        Path of a :class:`~stabranksearcher.result_store.ResultStore`
+        in which every task records its results. This should be on a
+        node-local filesystem, since SQLite relies on file locking, which
+        is unreliable on network filesystems; the placeholder
+        ``{hostname}`` in the path is replaced by the host name of the
+        worker, e.g. ``/tmp/results-{hostname}.sqlite``, giving every node
+        a store of its own.
+    recursive_warm_start: bool
+        Whether each task starts from the basis of
+        :func:`~stabranksearcher.dicke_state_factory.get_recursive_dicke_basis`,
+        built from the solutions for fewer qubits found by the finished
+        tasks of `work_queue` on any host (and those in `result_store`, if
+        any), see :func:`get_queued_dicke_basis_getter`, instead of a
+        random basis.
+    rank_descent: bool
+        Whether each task runs
+        :func:`~stabranksearcher.rank_searcher.run_rank_descent` from that
+        basis down to its stabilizer rank, instead of a single search.
+
+    Returns
+    -------
+    list of str
+        Identifiers of the tasks.
+    """
+    grid = []
+    for number_of_qubits in numbers_of_qubits:
+        weights = range(number_of_qubits + 1) if hamming_weights is None else hamming_weights
+        for hamming_weight in weights:
+            if hamming_weight > number_of_qubits:
+                continue
+            for stabrank in stabranks:
+                for beta_init, beta_final, number_of_betas in beta_schedules:
+                    grid.append({"number_of_qubits": number_of_qubits,
+                                 "hamming_weight": hamming_weight,
+                                 "stabrank": stabrank,
+                                 "beta_init": beta_init,
+                                 "beta_final": beta_final,
+                                 "number_of_betas": number_of_betas,
+                                 "number_of_bases": number_of_bases})
+    child_seeds = np.random.SeedSequence(seed).spawn(len(grid))
+    task_ids = []
+    for task, child_seed in zip(grid, child_seeds):
+        task["seed"] = int(child_seed.generate_state(1)[0])
+        if time_limit is not None:
+            task["time_limit"] = time_limit
+        if number_of_walkers is not None:
+            task["number_of_walkers"] = number_of_walkers
+        if result_store is not None:
+            task["result_store"] = result_store
+        if recursive_warm_start:
+            task["recursive_warm_start"] = True
+        if rank_descent:
+            task["rank_descent"] = True
+        if recursive_warm_start or rank_descent:
+            task["queue"] = work_queue.directory
+        task_ids.append(work_queue.add_task(task))
+    return task_ids
+
+
+def get_queued_dicke_basis_getter(work_queue=None, result_store=None):
+    """`get_known_basis` for
+    :func:`~stabranksearcher.dicke_state_factory.get_recursive_dicke_basis`
+    that takes the smallest basis spanning each Dicke state from the
+    successful results of the Dicke tasks in `work_queue`, which all hosts
+    share, and from `result_store`, which is node-local.
+
+    Parameters
+    ----------
+    work_queue: :obj:`WorkQueue` or None
+    result_store: :obj:`~stabranksearcher.result_store.ResultStore` or None
+
+    Returns
+    -------
+    callable
+    """
+    encoded_bases = {}
+    results = {} if work_queue is None else work_queue.get_results()
+    for result in results.values():
+        task = result.get("task", {})
+        if not result.get("success") or result.get("basis") is None or "hamming_weight" not in task:
+            continue
+        key = (task["number_of_qubits"], task["hamming_weight"])
+        if key not in encoded_bases or len(result["basis"]) < len(encoded_bases[key]):
+            encoded_bases[key] = result["basis"]
+    get_stored_basis = None if result_store is None else get_stored_dicke_basis_getter(result_store)
+
+    def get_known_basis(number_of_qubits, hamming_weight):
+        bases = []
+        encoded_basis = encoded_bases.get((number_of_qubits, hamming_weight))
+        if encoded_basis is not None:
+            bases.append(Basis(kets=np.column_stack([decode_ket(encoded_ket) for encoded_ket in encoded_basis])))
+        if get_stored_basis is not None:
+            stored_basis = get_stored_basis(number_of_qubits, hamming_weight)
+            if stored_basis is not None:
+                bases.append(stored_basis)
+        return min(bases, key=lambda basis: basis.size, default=None)
+    return get_known_basis
+
+
+def run_dicke_task(task):
+    """Run the random-walk searcher on a task created by
+    :func:`populate_dicke_sweep`, within the wall-clock time limit of the
+    task (if any), with several walkers in lockstep and from a recursive
+    warm start (from the solutions for fewer qubits in the queue and the
+    result store) or as a rank descent if the task says so. With a rank
+    descent, the result is that of the smallest basis found, or the
+    recursive basis itself (which is then recorded in the result store) if
+    no smaller one was found. The result store is opened per host, see
+    :func:`populate_dicke_sweep`."""
+    dicke_ket = get_dicke_state(number_of_qubits=task["number_of_qubits"],
+                                hamming_weight=task["hamming_weight"])
+    target_qstate = ket_to_qstate(dicke_ket)
+    result_store = None
+    if "result_store" in task:
+        result_store = ResultStore(task["result_store"].format(hostname=socket.gethostname()))
+    if "number_of_walkers" in task:
+        searcher = VectorizedRandomWalkStabRankSearcher(beta_init=task["beta_init"],
+                                                        beta_final=task["beta_final"],
+                                                        number_of_betas=task["number_of_betas"],
+                                                        number_of_walkers=task["number_of_walkers"],
+                                                        rng=task.get("seed"),
+                                                        result_store=result_store,
+                                                        time_limit=task.get("time_limit"))
+    else:
+        searcher = RandomWalkStabRankSearcher(beta_init=task["beta_init"],
+                                              beta_final=task["beta_final"],
+                                              number_of_betas=task["number_of_betas"],
+                                              rng=task.get("seed"),
+                                              result_store=result_store,
+                                              time_limit=task.get("time_limit"))
+    initial_basis = None
+    if task.get("recursive_warm_start") or task.get("rank_descent"):
+        get_known_basis = get_queued_dicke_basis_getter(
+            work_queue=WorkQueue(directory=task["queue"]) if "queue" in task else None,
+            result_store=result_store)
+        initial_basis = get_recursive_dicke_basis(number_of_qubits=task["number_of_qubits"],
+                                                  hamming_weight=task["hamming_weight"],
+                                                  get_known_basis=get_known_basis)
+    try:
+        if task.get("rank_descent"):
+            results = run_rank_descent(searcher=searcher,
+                                       target_qstate=target_qstate,
+                                       initial_basis=initial_basis,
+                                       number_of_bases=task["number_of_bases"],
+                                       min_stabrank=task["stabrank"])
+            successful_results = [result for result in results if result.success]
+            if len(successful_results) > 0:
+                result = successful_results[-1]
+            else:
+                result = SearchResult(basis=initial_basis, score=initial_basis.score(qstate=target_qstate),
+                                      stop_reason=KNOWN)
+                if result_store is not None:
+                    # so that tasks for more qubits can build on it
+                    result_store.record(target_ket=dicke_ket, stabrank=initial_basis.size, success=True,
+                                        basis=initial_basis, score=result.score,
+                                        searcher="get_recursive_dicke_basis")
+        else:
+            result = searcher.run(target_qstate=target_qstate,
+                                  stabrank=task["stabrank"],
+                                  number_of_bases=task["number_of_bases"],
+                                  initial_basis=initial_basis)
+    finally:
+        if result_store is not None:
+            result_store.close()
+    return encode_search_result(result)
@@ -4,7 +4,8 @@ import qiskit
 import netsquid.qubits.qubitapi as qapi
 from netsquid.qubits.stabtools import StabRepr
 from stabranksearcher.basis import Basis, get_basis_copy
-from stabranksearcher.quantum_state_tools import ket_to_qstate
+from stabranksearcher.quantum_state_tools import ket_to_qstate, stabilizer_tableau_to_ket
+from stabranksearcher.stab_basis_provider.random import RandomStabBasisProvider
 
 
 class TestBasis(unittest.TestCase):
@@ -164,6 +165,172 @@ class TestBasis(unittest.TestCase):
         with self.assertRaises(Exception):
             basis.undo_last_modification()
 
+    def test_kets_storage(self):
+
+        s = 1.0 / np.sqrt(2)
+
+        # create basis directly from a ket matrix
+        kets = np.array([[1, 0], [0, 0], [0, 0], [0, 1]])
+        basis = Basis(kets=kets)
+        self.assertEqual(basis.size, 2)
+        self.assertEqual(basis.number_of_qubits, 2)
+        self.assertTrue(basis.kets.flags.f_contiguous)
+        self.assertIsNone(basis._qstates[0])
+        with self.assertRaises(ValueError):
+            basis.kets[0, 0] = 0
+
+        # modifications are written in place
+        kets_before = basis._kets
+        succeeded = basis.deterministically_modify(
+            qstate_index=0,
+            pauli=qiskit.quantum_info.Pauli('XZ'))
+        self.assertTrue(succeeded)
+        self.assertIs(basis._kets, kets_before)
+        self.assertTrue(np.allclose(basis.kets[:, 0], [s, 0, s, 0]))
+
+        # qstates are created lazily
+        expected_first_ket = np.array([[s], [0], [s], [0]])
+        self.assertTrue(basis.qstates[0].compare(ket_to_qstate(expected_first_ket)))
+
+        # exactly one of qstates and kets should be given
+        with self.assertRaises(ValueError):
+            Basis()
+        with self.assertRaises(ValueError):
+            Basis(qstates=basis.qstates, kets=kets)
+
+    def test_clone_copy_on_write(self):
+
+        kets = np.array([[1, 0], [0, 0], [0, 0], [0, 1]])
+        basis = Basis(kets=kets)
+        clone = basis.clone()
+
+        # the clone shares the ket matrix until one of them is modified
+        self.assertIs(clone._kets, basis._kets)
+        succeeded = clone.deterministically_modify(
+            qstate_index=0,
+            pauli=qiskit.quantum_info.Pauli('XZ'))
+        self.assertTrue(succeeded)
+        self.assertIsNot(clone._kets, basis._kets)
+        self.assertTrue(np.allclose(basis.kets, kets))
+        self.assertFalse(np.allclose(clone.kets, kets))
+
+        # undoing on the clone does not affect the original
+        clone.undo_last_modification()
+        self.assertTrue(np.allclose(clone.kets, kets))
+
+        # a snapshot is unaffected by later modifications of the original
+        snapshot = basis.snapshot()
+        basis.deterministically_modify(
+            qstate_index=1,
+            pauli=qiskit.quantum_info.Pauli('XI'))
+        self.assertTrue(np.allclose(snapshot.kets, kets))
+        self.assertFalse(np.allclose(basis.kets, kets))
+
+    def test_deterministically_modify_matches_pauli_matrix(self):
+
+        rng = np.random.default_rng(7)
+        ket = rng.normal(size=8) + 1j * rng.normal(size=8)
+        ket /= np.linalg.norm(ket)
+        for label in ['XYZ', '-iYIX', 'iZZY', '-XXI']:
+            pauli = qiskit.quantum_info.Pauli(label)
+            basis = Basis(kets=ket.reshape(8, 1))
+            basis.deterministically_modify(qstate_index=0, pauli=pauli)
+            expected = ket + pauli.to_matrix().dot(ket)
+            expected /= np.linalg.norm(expected)
+            self.assertTrue(np.allclose(basis.kets[:, 0], expected))
+
+    def test_moves_keep_tableaux(self):
+
+        rng = np.random.default_rng(8)
+        basis = RandomStabBasisProvider.get_random_stabilizer_state_basis(number_of_qubits=3, size=2, rng=rng)
+        self.assertTrue(all(tableau is not None for tableau in basis.tableaux))
+        for _ in range(20):
+            basis.randomly_modify(rng=rng)
+            for index, tableau in enumerate(basis.tableaux):
+                self.assertIsNotNone(tableau)
+                self.assertAlmostEqual(np.abs(np.vdot(stabilizer_tableau_to_ket(tableau=tableau),
+                                                      basis.kets[:, index])), 1)
+        self.assertIsInstance(basis.qstates[0].qrepr, StabRepr)
+        tableaux = basis.tableaux
+        basis.randomly_modify(rng=rng)
+        basis.undo_last_modification()
+        self.assertEqual(basis.tableaux, tableaux)
+
+        # tableaux of bases given by their kets are computed when needed
+        basis = Basis(kets=np.array([[1, 1], [0, 0.25]]))
+        self.assertEqual(basis.tableaux, [None, None])
+        self.assertFalse(basis.deterministically_modify(qstate_index=0, pauli=qiskit.quantum_info.Pauli('-Z')))
+        self.assertIsNotNone(basis.get_tableau(qstate_index=0))
+        self.assertTrue(basis.deterministically_modify(qstate_index=1, pauli=qiskit.quantum_info.Pauli('iZ')))
+        self.assertIsNone(basis.get_tableau(qstate_index=1))
+
+    def test_real_basis(self):
+
+        rng = np.random.default_rng(3)
+        basis = RandomStabBasisProvider.get_random_stabilizer_state_basis(number_of_qubits=3, size=2, rng=rng,
+                                                                          real=True)
+        self.assertTrue(basis.is_real)
+        self.assertEqual(basis.kets.dtype, np.float64)
+        target_ket = np.array([1, 0, 0, 1, 0, 1, 1, 0]) / 2.
+        complex_basis = Basis(kets=basis.kets * 1j)
+        self.assertAlmostEqual(basis.score_ket(ket=target_ket), complex_basis.score_ket(ket=target_ket))
+        for _ in range(20):
+            basis.randomly_modify(rng=rng)
+            self.assertEqual(basis.kets.dtype, np.float64)
+            self.assertTrue(all(basis.get_tableau(qstate_index=index) is not None for index in range(basis.size)))
+        self.assertEqual(basis.clone().kets.dtype, np.float64)
+        self.assertTrue(basis.without_qstate(qstate_index=0).is_real)
+        with self.assertRaises(ValueError):
+            basis.deterministically_modify(qstate_index=0, pauli=qiskit.quantum_info.Pauli('Y'))
+        with self.assertRaises(ValueError):
+            Basis(kets=np.array([[1, 1], [0, 1j]]), real=True)
+        # the global phase of each state is dropped
+        self.assertTrue(np.allclose(complex_basis.to_real().kets, basis_kets_up_to_sign(complex_basis.kets.imag)))
+
+    def test_score_kets(self):
+
+        basis = Basis(kets=np.array([[1, 0], [0, 0], [0, 0], [0, 1]]))
+        kets = np.array([[1, 0, 1], [0, 1, 0], [0, 0, 0], [0, 0, 1]]) / np.array([1, 1, np.sqrt(2)])
+        self.assertTrue(np.allclose(basis.score_kets(kets=kets), [1, 0, 1]))
+        self.assertTrue(np.allclose(basis.score_kets(kets=kets),
+                                    [basis.score_ket(ket=kets[:, index]) for index in range(3)]))
+
+    def test_scores_with_replacements(self):
+
+        rng = np.random.default_rng(3)
+        kets = rng.normal(size=(16, 3)) + 1j * rng.normal(size=(16, 3))
+        basis = Basis(kets=kets)
+        target_ket = rng.normal(size=16) + 1j * rng.normal(size=16)
+        target_ket /= np.linalg.norm(target_ket)
+        number_of_candidates = 12
+        qstate_indices = rng.integers(3, size=number_of_candidates)
+        candidate_kets, is_nonzero = basis.get_candidate_kets(
+            qstate_indices=qstate_indices,
+            x_masks=rng.integers(16, size=number_of_candidates),
+            z_masks=rng.integers(16, size=number_of_candidates),
+            phases=rng.integers(4, size=number_of_candidates))
+        self.assertTrue(np.all(is_nonzero))
+        scores = basis.scores_with_replacements(ket=target_ket,
+                                                qstate_indices=qstate_indices,
+                                                candidate_kets=candidate_kets)
+        for qstate_index, candidate_ket, score in zip(qstate_indices, candidate_kets.T, scores):
+            replaced_kets = basis.kets.copy()
+            replaced_kets[:, qstate_index] = candidate_ket
+            self.assertAlmostEqual(score, Basis(kets=replaced_kets).score_ket(ket=target_ket))
+
+        # a candidate in the span of the other states
+        scores = basis.scores_with_replacements(ket=target_ket,
+                                                qstate_indices=[0],
+                                                candidate_kets=basis.kets[:, [1]])
+        self.assertAlmostEqual(scores[0], basis.without_qstate(qstate_index=0).score_ket(ket=target_ket))
+
+
+def basis_kets_up_to_sign(kets):
+    """`kets` with the sign of each column such that its largest amplitude
+    is positive."""
+    largest_amplitudes = kets[np.argmax(np.abs(kets), axis=0), np.arange(kets.shape[1])]
+    return kets * np.sign(largest_amplitudes)
+
 
 class TestGetBasisCopy(unittest.TestCase):
 
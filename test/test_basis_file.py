@@ -0,0 +1,71 @@
+import io
+import os
+import tempfile
+import unittest
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.basis_file import save_basis, load_basis, basis_to_bytes, bytes_to_basis
+from stabranksearcher.stab_basis_provider.random import RandomStabBasisProvider
+
+
+class TestBasisFile(unittest.TestCase):
+
+    def setUp(self):
+        stabilizer_basis = RandomStabBasisProvider.get_random_stabilizer_state_basis(number_of_qubits=3, size=3,
+                                                                                     rng=1)
+        non_stabilizer_ket = np.arange(8) + 1j
+        non_stabilizer_ket = non_stabilizer_ket / np.linalg.norm(non_stabilizer_ket)
+        self.basis = Basis(kets=np.column_stack((stabilizer_basis.kets[:, :2], non_stabilizer_ket,
+                                                 stabilizer_basis.kets[:, 2])))
+
+    def _assert_same_states(self, basis, other_basis):
+        self.assertEqual(basis.size, other_basis.size)
+        for index in range(basis.size):
+            self.assertAlmostEqual(np.abs(np.vdot(basis.kets[:, index], other_basis.kets[:, index])), 1)
+
+    def test_save_and_load(self):
+        target_ket = np.ones(8) / np.sqrt(8)
+        metadata = {"stabrank": 4, "counter": 12}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "basis")
+            save_basis(path, basis=self.basis, target_ket=target_ket, metadata=metadata)
+            self.assertTrue(os.path.exists(path))
+            basis, loaded_target_ket, loaded_metadata = load_basis(path)
+        self._assert_same_states(basis, self.basis)
+        self.assertTrue(np.allclose(loaded_target_ket, target_ket))
+        self.assertEqual(loaded_metadata, metadata)
+        # the tableaux are loaded, not recomputed
+        self.assertEqual([tableau is None for tableau in basis.tableaux], [False, False, True, False])
+        self.assertTrue(np.array_equal(basis.kets[:, 2], self.basis.kets[:, 2]))
+
+    def test_bytes(self):
+        buffer = io.BytesIO()
+        save_basis(buffer, basis=self.basis)
+        basis, target_ket, metadata = load_basis(io.BytesIO(buffer.getvalue()))
+        self.assertIsNone(target_ket)
+        self.assertEqual(metadata, {})
+        self._assert_same_states(bytes_to_basis(basis_to_bytes(self.basis)), self.basis)
+
+        # stabilizer states take fewer bytes than their kets
+        stabilizer_basis = RandomStabBasisProvider.get_random_stabilizer_state_basis(number_of_qubits=8, size=4,
+                                                                                     rng=2)
+        self.assertLess(len(basis_to_bytes(stabilizer_basis)), stabilizer_basis.kets.nbytes / 4)
+
+        # ket matrices in the .npy format are still read
+        buffer = io.BytesIO()
+        np.save(buffer, self.basis.kets)
+        self.assertTrue(np.array_equal(bytes_to_basis(buffer.getvalue()).kets, self.basis.kets))
+
+    def test_real_basis(self):
+        real_basis = RandomStabBasisProvider.get_random_stabilizer_state_basis(number_of_qubits=3, size=3,
+                                                                               rng=1, real=True)
+        self.assertTrue(real_basis.is_real)
+        basis = bytes_to_basis(basis_to_bytes(real_basis))
+        self.assertTrue(basis.is_real)
+        self.assertEqual(basis.kets.dtype, np.float64)
+        self._assert_same_states(basis, real_basis)
+        self.assertFalse(bytes_to_basis(basis_to_bytes(self.basis)).is_real)
+
+
+if __name__ == "__main__":
+    unittest.main()
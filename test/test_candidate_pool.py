@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.candidate_pool import StabilizerStatePool
+
+
+class TestStabilizerStatePool(unittest.TestCase):
+
+    def test_sample(self):
+
+        pool = StabilizerStatePool.sample(number_of_qubits=2, size=20, rng=1)
+        self.assertEqual(pool.size, 20)
+        self.assertEqual(pool.number_of_qubits, 2)
+        self.assertTrue(np.allclose(np.linalg.norm(pool.kets, axis=0), 1))
+        same_pool = StabilizerStatePool.sample(number_of_qubits=2, size=20, rng=1)
+        self.assertTrue(np.allclose(pool.kets, same_pool.kets))
+
+    def test_get_overlaps(self):
+
+        pool = StabilizerStatePool.sample(number_of_qubits=2, size=10, rng=2)
+        ket = np.array([1, 0, 0, 1]) / np.sqrt(2)
+        overlaps = pool.get_overlaps(ket=ket)
+        self.assertTrue(np.allclose(overlaps, [np.vdot(pool.kets[:, index], ket) for index in range(10)]))
+        self.assertIs(pool.get_overlaps(ket=ket.copy()), overlaps)
+
+    def test_get_greedy_basis(self):
+
+        rng = np.random.default_rng(4)
+        kets = rng.normal(size=(8, 30)) + 1j * rng.normal(size=(8, 30))
+        kets /= np.linalg.norm(kets, axis=0)
+        pool = StabilizerStatePool(kets=kets)
+        target_ket = kets[:, 3] + 2 * kets[:, 17]
+        target_ket /= np.linalg.norm(target_ket)
+
+        for stabrank in [1, 2, 3]:
+            basis, score = pool.get_greedy_basis(ket=target_ket, stabrank=stabrank)
+            self.assertEqual(basis.size, stabrank)
+            self.assertAlmostEqual(score, basis.score_ket(ket=target_ket))
+        # the first state chosen has the largest overlap with the target
+        basis, _ = pool.get_greedy_basis(ket=target_ket, stabrank=1)
+        self.assertTrue(np.allclose(basis.kets[:, 0], kets[:, np.argmax(np.abs(kets.conj().T.dot(target_ket)))]))
+        # the target lies in the span of two states of the pool
+        basis, score = pool.get_greedy_basis(ket=target_ket, stabrank=2)
+        self.assertAlmostEqual(score, 1)
+
+        # a pool with fewer independent states than asked for
+        pool = StabilizerStatePool(kets=np.hstack((kets[:, :2], kets[:, :2])))
+        basis, score = pool.get_greedy_basis(ket=target_ket, stabrank=3)
+        self.assertEqual(basis.size, 2)
+        self.assertAlmostEqual(score, Basis(kets=kets[:, :2]).score_ket(ket=target_ket))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.canonicalization import SymmetryTransform, TargetCanonicalizer, get_single_qubit_cliffords
+from stabranksearcher.dicke_state_factory import get_dicke_state
+from stabranksearcher.quantum_state_tools import ket_to_qstate, is_stabilizer_state
+from stabranksearcher.rank_searcher import NRandomStabRankSearcher
+from stabranksearcher.result_store import ResultStore
+from stabranksearcher.search_result import KNOWN
+
+
+def _get_random_ket(number_of_qubits, rng):
+    ket = rng.normal(size=2 ** number_of_qubits) + 1j * rng.normal(size=2 ** number_of_qubits)
+    return ket / np.linalg.norm(ket)
+
+
+def _get_random_transform(number_of_qubits, rng):
+    cliffords = get_single_qubit_cliffords()
+    return SymmetryTransform(permutation=rng.permutation(number_of_qubits),
+                             gates=[cliffords[index] for index in rng.integers(24, size=number_of_qubits)])
+
+
+class TestSymmetryTransform(unittest.TestCase):
+
+    def test_single_qubit_cliffords(self):
+        cliffords = get_single_qubit_cliffords()
+        self.assertEqual(len(cliffords), 24)
+        for gate in cliffords:
+            self.assertTrue(np.allclose(gate.conj().T.dot(gate), np.eye(2)))
+
+    def test_permutation(self):
+        # qubit 0 to position 1, qubit 1 to position 2, qubit 2 to position 0
+        transform = SymmetryTransform(permutation=[1, 2, 0], gates=[np.eye(2)] * 3)
+        ket = np.zeros(8)
+        ket[0b100] = 1
+        self.assertEqual(np.argmax(np.abs(transform.apply(kets=ket))), 0b010)
+
+    def test_inverse(self):
+        rng = np.random.default_rng(1)
+        for number_of_qubits in range(1, 5):
+            transform = _get_random_transform(number_of_qubits=number_of_qubits, rng=rng)
+            kets = np.column_stack([_get_random_ket(number_of_qubits=number_of_qubits, rng=rng) for _ in range(3)])
+            self.assertTrue(np.allclose(transform.inverse().apply(kets=transform.apply(kets=kets)), kets))
+            self.assertTrue(np.allclose(transform.apply(kets=kets)[:, 1], transform.apply(kets=kets[:, 1])))
+
+    def test_maps_stabilizer_states_to_stabilizer_states(self):
+        rng = np.random.default_rng(2)
+        transform = _get_random_transform(number_of_qubits=3, rng=rng)
+        ket = np.array([1, 0, 0, 1j, 0, 1, 1j, 0]) / 2
+        self.assertTrue(is_stabilizer_state(ket=transform.apply(kets=ket)))
+
+
+class TestTargetCanonicalizer(unittest.TestCase):
+
+    def _assert_same_representative(self, canonicalizer, ket, other_ket):
+        representative, transform = canonicalizer.canonicalize(ket=ket)
+        other_representative, other_transform = canonicalizer.canonicalize(ket=other_ket)
+        self.assertTrue(np.allclose(representative, other_representative))
+        # the transforms map the targets to the representative
+        self.assertAlmostEqual(np.abs(np.vdot(representative, transform.apply(kets=ket))), 1)
+        self.assertAlmostEqual(np.abs(np.vdot(representative, other_transform.apply(kets=other_ket))), 1)
+
+    def test_dicke_states(self):
+        canonicalizer = TargetCanonicalizer(local_gates="x_flips")
+        for hamming_weight in range(3):
+            self._assert_same_representative(canonicalizer=canonicalizer,
+                                             ket=get_dicke_state(number_of_qubits=5, hamming_weight=hamming_weight),
+                                             other_ket=get_dicke_state(number_of_qubits=5,
+                                                                       hamming_weight=5 - hamming_weight))
+        representative, _ = canonicalizer.canonicalize(ket=get_dicke_state(number_of_qubits=5, hamming_weight=1))
+        other_representative, _ = canonicalizer.canonicalize(ket=get_dicke_state(number_of_qubits=5,
+                                                                                 hamming_weight=2))
+        self.assertFalse(np.allclose(representative, other_representative))
+
+    def test_random_transforms(self):
+        rng = np.random.default_rng(3)
+        canonicalizer = TargetCanonicalizer(local_gates="local_cliffords")
+        for _ in range(3):
+            ket = _get_random_ket(number_of_qubits=3, rng=rng)
+            transform = _get_random_transform(number_of_qubits=3, rng=rng)
+            self._assert_same_representative(canonicalizer=canonicalizer,
+                                             ket=ket,
+                                             other_ket=np.exp(0.3j) * transform.apply(kets=ket))
+
+    def test_too_many_transforms(self):
+        canonicalizer = TargetCanonicalizer(local_gates="local_cliffords", max_transforms=100)
+        ket = get_dicke_state(number_of_qubits=3, hamming_weight=1)
+        with self.assertWarns(UserWarning):
+            representative, transform = canonicalizer.canonicalize(ket=ket)
+        self.assertTrue(np.allclose(representative, ket))
+        self.assertEqual(transform.permutation, (0, 1, 2))
+
+    def test_too_many_permutations(self):
+        # 5! 2^5 transforms, but only 2^5 without permutations
+        canonicalizer = TargetCanonicalizer(local_gates="x_flips", max_transforms=100)
+        for hamming_weight in range(3):
+            self._assert_same_representative(canonicalizer=canonicalizer,
+                                             ket=get_dicke_state(number_of_qubits=5, hamming_weight=hamming_weight),
+                                             other_ket=get_dicke_state(number_of_qubits=5,
+                                                                       hamming_weight=5 - hamming_weight))
+        _, transform = canonicalizer.canonicalize(ket=get_dicke_state(number_of_qubits=5, hamming_weight=1))
+        self.assertEqual(transform.permutation, (0, 1, 2, 3, 4))
+
+
+class TestResultReuse(unittest.TestCase):
+
+    def test_equivalent_targets_share_results(self):
+        store = ResultStore(":memory:", canonicalizer=TargetCanonicalizer(local_gates="x_flips"))
+        # the W state D(3, 1) is spanned by the computational basis states of Hamming weight 1
+        w_ket = get_dicke_state(number_of_qubits=3, hamming_weight=1)
+        store.record(target_ket=w_ket, stabrank=3, success=True, basis=Basis(kets=np.eye(8)[:, [1, 2, 4]]),
+                     score=1.)
+
+        searcher = NRandomStabRankSearcher(rng=4, result_store=store)
+        for ket in [np.exp(0.5j) * w_ket, get_dicke_state(number_of_qubits=3, hamming_weight=2)]:
+            qstate = ket_to_qstate(ket)
+            result = searcher.run(target_qstate=qstate, stabrank=3, number_of_bases=10)
+            self.assertEqual(result.stop_reason, KNOWN)
+            self.assertAlmostEqual(result.basis.score(qstate=qstate), 1)
+            self.assertEqual(result.basis.size, 3)
+        self.assertEqual(searcher.counter, 0)
+        self.assertIsNone(store.get_solution(target_ket=get_dicke_state(number_of_qubits=4, hamming_weight=1),
+                                             stabrank=3))
+        store.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from math import comb
+import numpy as np
+from stabranksearcher.dicke_state_factory import (
+    get_dicke_state,
+    get_recursive_dicke_basis,
+    get_stored_dicke_basis_getter,
+    save_dicke_state)
+from stabranksearcher.ket_cache import get_tableau_ket
+from stabranksearcher.result_store import ResultStore
+
+
+class TestDickeStateFactory(unittest.TestCase):
+
+    def test_get_dicke_state(self):
+        self.assertTrue(np.allclose(get_dicke_state(number_of_qubits=2, hamming_weight=1),
+                                    np.array([0, 1, 1, 0]) / np.sqrt(2)))
+        self.assertTrue(np.allclose(get_dicke_state(number_of_qubits=3, hamming_weight=3), np.eye(8)[7]))
+        self.assertTrue(np.allclose(get_dicke_state(number_of_qubits=3, hamming_weight=1),
+                                    np.array([0, 1, 1, 0, 1, 0, 0, 0]) / np.sqrt(3)))
+
+    def test_save_dicke_state(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ket = save_dicke_state(path=os.path.join(directory, "dicke.npy"), number_of_qubits=5,
+                                   hamming_weight=2, chunk_size=8)
+            self.assertTrue(np.allclose(ket, get_dicke_state(number_of_qubits=5, hamming_weight=2)))
+            del ket
+
+    def test_recursive_basis_spans_dicke_state(self):
+        for number_of_qubits in range(1, 6):
+            for hamming_weight in range(number_of_qubits + 1):
+                dicke_ket = get_dicke_state(number_of_qubits=number_of_qubits, hamming_weight=hamming_weight)
+                basis = get_recursive_dicke_basis(number_of_qubits=number_of_qubits, hamming_weight=hamming_weight)
+                self.assertAlmostEqual(basis.score_ket(ket=dicke_ket), 1.)
+                self.assertLessEqual(basis.size, comb(number_of_qubits, hamming_weight))
+                for qstate_index, tableau in enumerate(basis.tableaux):
+                    overlap = np.vdot(get_tableau_ket(tableau=tableau), basis.kets[:, qstate_index])
+                    self.assertAlmostEqual(abs(overlap), 1.)
+        with self.assertRaises(ValueError):
+            get_recursive_dicke_basis(number_of_qubits=2, hamming_weight=3)
+
+    def test_stabilizer_states_and_known_bases(self):
+        # D(2, 1) is a stabilizer state, so D(3, 1) needs 1 + 1 states
+        self.assertEqual(get_recursive_dicke_basis(number_of_qubits=3, hamming_weight=1).size, 2)
+        self.assertEqual(get_recursive_dicke_basis(number_of_qubits=3, hamming_weight=1,
+                                                   check_stabilizer_state=False).size, 3)
+
+        known_basis = get_recursive_dicke_basis(number_of_qubits=3, hamming_weight=1)
+        with ResultStore(":memory:") as result_store:
+            result_store.record(target_ket=get_dicke_state(number_of_qubits=3, hamming_weight=1), stabrank=2,
+                                success=True, basis=known_basis, score=1.)
+            basis = get_recursive_dicke_basis(number_of_qubits=4, hamming_weight=1,
+                                              get_known_basis=get_stored_dicke_basis_getter(result_store),
+                                              check_stabilizer_state=False)
+        self.assertEqual(basis.size, 3)
+        self.assertAlmostEqual(basis.score_ket(ket=get_dicke_state(number_of_qubits=4, hamming_weight=1)), 1.)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.ket_cache import KetCache, get_ket_cache, set_ket_cache, get_qstate_ket
+from stabranksearcher.quantum_state_tools import ket_to_qstate, stabilizer_tableau_to_qstate
+from stabranksearcher.tableau import StabilizerTableau
+
+
+class TestKetCache(unittest.TestCase):
+
+    def setUp(self):
+        self.shared_cache = get_ket_cache()
+        self.cache = KetCache()
+        set_ket_cache(self.cache)
+        # Bell state, with two generating sets
+        self.bell = StabilizerTableau(check_matrix=[[1, 1, 0, 0], [0, 0, 1, 1]], phases=[1, 1])
+        self.other_bell = StabilizerTableau(check_matrix=[[1, 1, 1, 1], [1, 1, 0, 0]], phases=[-1, 1])
+
+    def tearDown(self):
+        set_ket_cache(self.shared_cache)
+
+    def test_hits_and_misses(self):
+        ket = self.cache.get_ket(tableau=self.bell)
+        self.assertTrue(np.allclose(ket, np.array([1, 0, 0, 1]) / np.sqrt(2)))
+        self.assertIs(self.cache.get_ket(tableau=self.other_bell), ket)
+        self.assertEqual((self.cache.hits, self.cache.misses, len(self.cache)), (1, 1, 1))
+        self.assertEqual(self.cache.get_statistics()["hit_rate"], 0.5)
+        with self.assertRaises(ValueError):
+            ket[0] = 0
+        self.cache.clear()
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.number_of_bytes), (0, 0, 0))
+
+    def test_reduced_tableau_computed_once(self):
+        self.cache.get_ket(tableau=self.other_bell)
+        reduced = self.other_bell.get_reduced()
+        # later lookups reuse the reduced form, which is its own reduced form
+        self.assertIs(self.other_bell.get_reduced(), reduced)
+        self.assertIs(reduced.get_reduced(), reduced)
+        self.assertEqual(reduced, self.bell.get_reduced())
+
+    def test_memory_cap(self):
+        # room for two kets of two qubits
+        cache = KetCache(max_bytes=2 * 4 * 16)
+        zero_zero = StabilizerTableau(check_matrix=[[0, 0, 1, 0], [0, 0, 0, 1]], phases=[1, 1])
+        plus_plus = StabilizerTableau(check_matrix=[[1, 0, 0, 0], [0, 1, 0, 0]], phases=[1, 1])
+        for tableau in [self.bell, zero_zero, self.bell, plus_plus]:
+            cache.get_ket(tableau=tableau)
+        # |00> was used least recently, so it is evicted for |++>
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.number_of_bytes, cache.max_bytes)
+        cache.get_ket(tableau=self.bell)
+        cache.get_ket(tableau=zero_zero)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        # kets larger than the cap are not stored
+        self.assertEqual(len(KetCache(max_bytes=8).get_ket(tableau=self.bell)), 4)
+
+    def test_shared_cache(self):
+        qstate = stabilizer_tableau_to_qstate(self.bell)
+        basis = Basis(qstates=[qstate, stabilizer_tableau_to_qstate(self.other_bell)])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertAlmostEqual(np.abs(np.vdot(basis.kets[:, 0], qstate.ket.flatten())), 1)
+        # qstates in another representation are not cached
+        ket_qstate = ket_to_qstate(np.array([1, 0.25]))
+        self.assertTrue(np.allclose(get_qstate_ket(qstate=ket_qstate), ket_qstate.ket.flatten()))
+        self.assertEqual(len(self.cache), 1)
+        set_ket_cache(None)
+        self.assertAlmostEqual(np.abs(np.vdot(get_qstate_ket(qstate=qstate), qstate.ket.flatten())), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from stabranksearcher.out_of_core import (
+    BLOCK_SIZE,
+    OutOfCoreBasis,
+    apply_identity_plus_pauli,
+    get_chunk_size,
+    get_gram_matrix_and_overlaps,
+    get_random_computational_basis_tableaux,
+    score_from_gram_matrix)
+from stabranksearcher.basis import Basis
+from stabranksearcher.dicke_state_factory import save_dicke_state
+from stabranksearcher.quantum_state_tools import apply_paulis, stabilizer_tableau_to_ket
+from stabranksearcher.rank_searcher import OutOfCoreRandomWalkStabRankSearcher
+from stabranksearcher.search_result import FOUND
+
+
+class TestOutOfCore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(1)
+        # two blocks, so that chunks of one and two blocks can be compared
+        self.number_of_qubits = BLOCK_SIZE.bit_length()
+        self.target_ket = self.rng.normal(size=2 ** self.number_of_qubits)
+        self.target_ket /= np.linalg.norm(self.target_ket)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_chunk_size(self):
+        self.assertEqual(get_chunk_size(number_of_qubits=30, number_of_columns=4, memory_budget=2 ** 20), 2 ** 14)
+        self.assertEqual(get_chunk_size(number_of_qubits=30, number_of_columns=4, memory_budget=1), BLOCK_SIZE)
+        self.assertEqual(get_chunk_size(number_of_qubits=3), 8)
+
+    def test_apply_identity_plus_pauli(self):
+        ket = self.rng.normal(size=2 ** self.number_of_qubits) + 1j * self.rng.normal(size=2 ** self.number_of_qubits)
+        high_bit = BLOCK_SIZE
+        for x_mask, z_mask, phase in [(5, 3, 1), (high_bit + 7, high_bit + 1, 2), (high_bit, 0, 3)]:
+            expected = ket + apply_paulis(kets=ket[:, np.newaxis], x_masks=[x_mask], z_masks=[z_mask],
+                                          phases=[phase])[:, 0]
+            for chunk_size in [BLOCK_SIZE, 2 * BLOCK_SIZE]:
+                target = np.empty_like(ket)
+                squared_norms = apply_identity_plus_pauli(source=ket, target=target, x_mask=x_mask, z_mask=z_mask,
+                                                          phase=phase, chunk_size=chunk_size)
+                self.assertTrue(np.allclose(target, expected))
+                self.assertAlmostEqual(np.sum(squared_norms), np.linalg.norm(expected) ** 2)
+                in_place = ket.copy()
+                apply_identity_plus_pauli(source=in_place, target=in_place, x_mask=x_mask, z_mask=z_mask,
+                                          phase=phase, chunk_size=chunk_size)
+                self.assertTrue(np.allclose(in_place, expected))
+
+    def test_scores_match_in_memory(self):
+        kets = self.rng.normal(size=(2 ** self.number_of_qubits, 3))
+        kets /= np.linalg.norm(kets, axis=0)
+        # linearly dependent on the others
+        kets = np.hstack((kets, kets[:, :2].dot([[1.], [1.]]) / np.sqrt(2)))
+        path = os.path.join(self.directory.name, "kets.npy")
+        np.save(path, np.asfortranarray(kets))
+        memory_mapped_kets = np.load(path, mmap_mode="r")
+        expected = get_gram_matrix_and_overlaps(kets=kets, ket=self.target_ket, chunk_size=BLOCK_SIZE)
+        for chunk_kets, chunk_size in [(memory_mapped_kets, BLOCK_SIZE), (kets, 2 * BLOCK_SIZE),
+                                       (memory_mapped_kets, 2 * BLOCK_SIZE)]:
+            gram_matrix, overlaps = get_gram_matrix_and_overlaps(kets=chunk_kets, ket=self.target_ket,
+                                                                 chunk_size=chunk_size)
+            self.assertTrue(np.array_equal(gram_matrix, expected[0]))
+            self.assertTrue(np.array_equal(overlaps, expected[1]))
+        self.assertAlmostEqual(score_from_gram_matrix(*expected, dimension=kets.shape[0]),
+                               Basis(kets=kets).score_ket(ket=self.target_ket))
+        # nearly dependent on the others
+        nearly_dependent_ket = kets[:, 0] + kets[:, 1] + 1e-5 * self.rng.normal(size=kets.shape[0])
+        kets[:, 3] = nearly_dependent_ket / np.linalg.norm(nearly_dependent_ket)
+        gram_matrix, overlaps = get_gram_matrix_and_overlaps(kets=kets, ket=self.target_ket, chunk_size=BLOCK_SIZE)
+        self.assertAlmostEqual(score_from_gram_matrix(gram_matrix=gram_matrix, overlaps=overlaps,
+                                                      dimension=kets.shape[0]),
+                               Basis(kets=kets).score_ket(ket=self.target_ket))
+        with self.assertRaises(ValueError):
+            get_gram_matrix_and_overlaps(kets=kets, ket=self.target_ket, chunk_size=BLOCK_SIZE + 1)
+
+    def test_dependent_stabilizer_states(self):
+        # all 216 products of single-qubit stabilizer states on three qubits,
+        # spanning the space of dimension 8
+        single_qubit_kets = [np.array([1, 0]), np.array([0, 1]), np.array([1, 1]) / np.sqrt(2),
+                             np.array([1, -1]) / np.sqrt(2), np.array([1, 1j]) / np.sqrt(2),
+                             np.array([1, -1j]) / np.sqrt(2)]
+        kets = np.column_stack([np.kron(np.kron(first, second), third) for first in single_qubit_kets
+                                for second in single_qubit_kets for third in single_qubit_kets])
+        target_ket = self.rng.normal(size=8) + 1j * self.rng.normal(size=8)
+        target_ket /= np.linalg.norm(target_ket)
+        gram_matrix, overlaps = get_gram_matrix_and_overlaps(kets=kets, ket=target_ket, chunk_size=8)
+        self.assertAlmostEqual(score_from_gram_matrix(gram_matrix=gram_matrix, overlaps=overlaps, dimension=8),
+                               Basis(kets=kets).score_ket(ket=target_ket), places=14)
+
+    def test_basis(self):
+        tableaux = get_random_computational_basis_tableaux(number_of_qubits=self.number_of_qubits, size=3, rng=2)
+        bases = [OutOfCoreBasis(target_ket=self.target_ket, tableaux=tableaux, directory=self.directory.name,
+                                chunk_size=chunk_size, real=True)
+                 for chunk_size in [BLOCK_SIZE, 2 * BLOCK_SIZE]]
+        for qstate_index, tableau in enumerate(tableaux):
+            self.assertAlmostEqual(abs(np.vdot(stabilizer_tableau_to_ket(tableau=tableau),
+                                               bases[0].get_ket(qstate_index=qstate_index))), 1.)
+        rngs = [np.random.default_rng(5), np.random.default_rng(5)]
+        for step in range(20):
+            score = bases[0].score
+            for basis, rng in zip(bases, rngs):
+                basis.randomly_modify(rng=rng)
+            self.assertEqual(bases[0].score, bases[1].score)
+            in_memory_basis = bases[0].to_basis()
+            self.assertAlmostEqual(bases[0].score, in_memory_basis.score_ket(ket=self.target_ket))
+            self.assertEqual(bases[0].get_weakest_qstate_index(),
+                             in_memory_basis.get_weakest_qstate_index(ket=self.target_ket))
+            if step % 3 == 0:
+                for basis in bases:
+                    basis.undo_last_modification()
+                self.assertEqual(bases[0].score, score)
+        for qstate_index, tableau in enumerate(bases[0].tableaux):
+            self.assertAlmostEqual(abs(np.vdot(stabilizer_tableau_to_ket(tableau=tableau),
+                                               bases[0].get_ket(qstate_index=qstate_index))), 1.)
+        with self.assertRaises(ValueError):
+            bases[0].modify(qstate_index=0, x_mask=1, z_mask=1, phase=1)
+        for basis in bases:
+            basis.close()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_search(self):
+        target_ket = save_dicke_state(path=os.path.join(self.directory.name, "target.npy"), number_of_qubits=3,
+                                      hamming_weight=1)
+        searcher = OutOfCoreRandomWalkStabRankSearcher(beta_init=1, beta_final=100, number_of_betas=10, rng=1,
+                                                       directory=self.directory.name)
+        result = searcher.run(target_ket=target_ket, stabrank=2, number_of_bases=100)
+        self.assertEqual(result.stop_reason, FOUND)
+        self.assertEqual(result.basis.size, 2)
+        self.assertAlmostEqual(result.basis.to_basis().score_ket(ket=np.asarray(target_ket)), 1.)
+        result.basis.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
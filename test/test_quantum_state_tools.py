@@ -0,0 +1,128 @@
+import unittest
+import numpy as np
+import qiskit
+from stabranksearcher.quantum_state_tools import (
+    get_pauli_masks,
+    get_random_pauli_masks,
+    get_real_kets,
+    apply_paulis,
+    get_stabilizer_tableau,
+    is_stabilizer_state,
+    stabilizer_tableau_to_ket)
+from stabranksearcher.tableau import StabilizerTableau
+
+
+class TestPauliMasks(unittest.TestCase):
+
+    def test_apply_paulis_matches_pauli_matrices(self):
+
+        rng = np.random.default_rng(1)
+        kets = rng.normal(size=(8, 3)) + 1j * rng.normal(size=(8, 3))
+        paulis = [qiskit.quantum_info.Pauli(label) for label in ['XYZ', '-iYIZ', 'iIXY']]
+        x_masks, z_masks, phases = zip(*[get_pauli_masks(pauli) for pauli in paulis])
+        outcome = apply_paulis(kets=kets, x_masks=x_masks, z_masks=z_masks, phases=phases)
+        for column, pauli in enumerate(paulis):
+            self.assertTrue(np.allclose(outcome[:, column], pauli.to_matrix().dot(kets[:, column])))
+
+
+    def test_real_paulis(self):
+        rng = np.random.default_rng(2)
+        kets = rng.normal(size=(8, 10))
+        x_masks, z_masks, phases = get_random_pauli_masks(number_of_qubits=3, size=10, rng=rng, real=True)
+        self.assertTrue(np.all(phases % 2 == 0))
+        outcome = apply_paulis(kets=kets, x_masks=x_masks, z_masks=z_masks, phases=phases)
+        self.assertEqual(outcome.dtype, np.float64)
+        self.assertTrue(np.allclose(outcome, apply_paulis(kets=kets.astype(np.complex128), x_masks=x_masks,
+                                                          z_masks=z_masks, phases=phases)))
+
+    def test_get_real_kets(self):
+        kets = np.array([[1, 2j], [-1, 1j]]) * np.exp(0.3j)
+        self.assertTrue(np.allclose(get_real_kets(kets=kets), [[1, 2], [-1, 1]]))
+        self.assertTrue(np.allclose(get_real_kets(kets=np.array([0, -1j])), [0, 1]))
+        self.assertIsNone(get_real_kets(kets=np.array([1, 1j])))
+
+
+class TestStabilizerTableau(unittest.TestCase):
+
+    def _get_random_stabilizer_state(self, number_of_qubits, rng):
+        clifford = qiskit.quantum_info.random_clifford(num_qubits=number_of_qubits, seed=rng)
+        ket = qiskit.quantum_info.Statevector.from_label('0' * number_of_qubits).evolve(clifford).data
+        # qiskit orders qubits the other way round
+        stabilizer = clifford.stabilizer
+        tableau = StabilizerTableau(check_matrix=np.hstack((stabilizer.X[:, ::-1], stabilizer.Z[:, ::-1])),
+                                    phases=[-1 if phase else 1 for phase in stabilizer.phase])
+        return ket, tableau
+
+    def test_stabilizer_states(self):
+
+        rng = np.random.default_rng(2)
+        for number_of_qubits in range(1, 6):
+            for _ in range(20):
+                ket, expected_tableau = self._get_random_stabilizer_state(number_of_qubits=number_of_qubits,
+                                                                          rng=rng)
+                ket = ket * 2.5 * np.exp(1j * rng.random())
+                tableau = get_stabilizer_tableau(ket=ket)
+                self.assertIsNotNone(tableau)
+                self.assertEqual(tableau.get_reduced(), expected_tableau.get_reduced())
+                ket_from_tableau = stabilizer_tableau_to_ket(tableau=tableau)
+                self.assertAlmostEqual(np.abs(np.vdot(ket_from_tableau, ket)), np.linalg.norm(ket))
+
+    def test_non_stabilizer_states(self):
+
+        s = 1 / np.sqrt(2)
+        for ket in [np.array([1, 0.25]),
+                    np.array([s, np.exp(1j * np.pi / 4) * s]),
+                    np.array([1, 1, 1, 0]),
+                    np.array([1, 1, 1, 1j]),
+                    np.array([0, 1, 1, 0, 1, 0, 0, 0])]:
+            self.assertFalse(is_stabilizer_state(ket=ket))
+        for ket in [np.array([0, 1]), np.array([1, 1j]), np.array([1, 1, 1, -1]), np.array([0, 1, 0, 0, 0, 0, 1j, 0])]:
+            self.assertTrue(is_stabilizer_state(ket=ket))
+
+    def test_tableau(self):
+
+        # Bell state, stabilized by XX and ZZ (and by -YY)
+        tableau = StabilizerTableau(check_matrix=[[1, 1, 0, 0], [0, 0, 1, 1]], phases=[1, 1])
+        self.assertEqual(str(tableau), "+XX\n+ZZ")
+        ket = stabilizer_tableau_to_ket(tableau=tableau)
+        self.assertTrue(np.allclose(ket, np.array([1, 0, 0, 1]) / np.sqrt(2)))
+        other_generators = StabilizerTableau(check_matrix=[[1, 1, 1, 1], [1, 1, 0, 0]], phases=[-1, 1])
+        self.assertEqual(other_generators.get_reduced(), tableau.get_reduced())
+        x_masks, z_masks, phases = tableau.get_pauli_masks()
+        self.assertEqual(StabilizerTableau.from_pauli_masks(number_of_qubits=2, x_masks=x_masks,
+                                                            z_masks=z_masks, phases=phases), tableau)
+        with self.assertRaises(ValueError):
+            StabilizerTableau(check_matrix=[[1, 0]], phases=[1, 1])
+
+    def test_apply_identity_plus_pauli(self):
+
+        rng = np.random.default_rng(3)
+        number_of_zeros = 0
+        for number_of_qubits in range(1, 5):
+            for _ in range(50):
+                ket, tableau = self._get_random_stabilizer_state(number_of_qubits=number_of_qubits, rng=rng)
+                x_mask, z_mask = rng.integers(2 ** number_of_qubits, size=2)
+                phase = rng.integers(4)
+                expected = ket + apply_paulis(kets=ket.reshape(-1, 1), x_masks=[x_mask], z_masks=[z_mask],
+                                              phases=[phase])[:, 0]
+                new_tableau = tableau.apply_identity_plus_pauli(x_mask=x_mask, z_mask=z_mask, phase=phase)
+                if np.isclose(np.linalg.norm(expected), 0):
+                    number_of_zeros += 1
+                    self.assertIsNone(new_tableau)
+                else:
+                    new_ket = stabilizer_tableau_to_ket(tableau=new_tableau)
+                    self.assertAlmostEqual(np.abs(np.vdot(new_ket, expected)), np.linalg.norm(expected))
+        self.assertGreater(number_of_zeros, 0)
+
+        # (I - Z)|0> = 0, (I + Z)|0> = 2|0> and (I + iZ)|0> = (1 + i)|0>
+        zero = StabilizerTableau(check_matrix=[[0, 1]], phases=[1])
+        self.assertIsNone(zero.apply_identity_plus_pauli(x_mask=0, z_mask=1, phase=2))
+        self.assertEqual(zero.apply_identity_plus_pauli(x_mask=0, z_mask=1, phase=0), zero)
+        self.assertEqual(zero.apply_identity_plus_pauli(x_mask=0, z_mask=1, phase=3), zero)
+        # (I + X)|0> = |+> and (I + iX)|0> = |0> + i|1>, stabilized by Y
+        self.assertEqual(str(zero.apply_identity_plus_pauli(x_mask=1, z_mask=0, phase=0)), "+X")
+        self.assertEqual(str(zero.apply_identity_plus_pauli(x_mask=1, z_mask=0, phase=3)), "+Y")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import itertools
 import numpy as np
 import netsquid as ns
 from netsquid.qubits.stabtools import StabRepr
@@ -9,8 +10,26 @@ from stabranksearcher.stab_basis_provider.stab_basis_provider import StabBasisPr
 from stabranksearcher.rank_searcher import (
     BruteForceStabRankSearcher,
     NRandomStabRankSearcher,
-    RandomWalkStabRankSearcher)
+    GreedyPursuitStabRankSearcher,
+    RandomWalkStabRankSearcher,
+    VectorizedRandomWalkStabRankSearcher,
+    run_rank_descent)
 from stabranksearcher.quantum_state_tools import ket_to_qstate
+from stabranksearcher.dicke_state_factory import get_dicke_state, get_recursive_dicke_basis
+from stabranksearcher.rng import spawn_rngs
+from stabranksearcher.result_store import ResultStore
+from stabranksearcher.search_result import (
+    CancellationToken,
+    FOUND,
+    KNOWN,
+    BUDGET_EXHAUSTED,
+    DEADLINE_REACHED,
+    CANCELLED)
+from stabranksearcher.stab_basis_provider.stagnation import (
+    StagnationDetector,
+    RedrawRestartPolicy,
+    ReplaceWeakestRestartPolicy,
+    ReheatRestartPolicy)
 
 
 ## Test BruteForceStabRankSearcher
@@ -56,11 +75,74 @@ from stabranksearcher.quantum_state_tools import ket_to_qstate
 #print("Number of attempts:", searcher.counter)
 
 
+class TestBruteForceStabRankSearcher(unittest.TestCase):
+
+    def test_run(self):
+
+        for ket, expected_size in [(np.array([[1], [0]]), 1),
+                                   (np.array([[1], [1j]]) / np.sqrt(2), 1),
+                                   (np.array([[1], [0.25]]) / np.sqrt(1 + 0.25 ** 2), 2)]:
+            searcher = BruteForceStabRankSearcher()
+            basis = searcher.run(ket=ket_to_qstate(ket)).found_basis
+            self.assertEqual(basis.size, expected_size)
+            self.assertTrue(np.isclose(basis.score_ket(ket=ket), 1))
+
+        # too small a maximal rank
+        searcher = BruteForceStabRankSearcher()
+        ket = np.array([[1], [0.25]]) / np.sqrt(1 + 0.25 ** 2)
+        self.assertIsNone(searcher.run(ket=ket_to_qstate(ket), stabrank=1).found_basis)
+
+    def test_result_store(self):
+        ket = np.array([[1], [0.25]]) / np.sqrt(1 + 0.25 ** 2)
+        with ResultStore(":memory:") as result_store:
+            searcher = BruteForceStabRankSearcher(result_store=result_store)
+            searcher.run(ket=ket_to_qstate(ket), stabrank=1)
+            self.assertIsNone(result_store.get_solution(target_ket=ket, stabrank=2))
+            self.assertEqual(result_store.get_budget_spent(target_ket=ket, stabrank=1)[0], searcher.counter)
+            searcher.run(ket=ket_to_qstate(ket))
+            self.assertEqual(result_store.get_solution(target_ket=ket, stabrank=2).size, 2)
+            # the stored solution is reused
+            self.assertEqual(searcher.run(ket=ket_to_qstate(ket)).stop_reason, KNOWN)
+
+    def test_stabilizer_target_is_not_searched(self):
+        ket = np.array([[1], [1j]]) / np.sqrt(2)
+        result = BruteForceStabRankSearcher().run(ket=ket_to_qstate(ket))
+        self.assertEqual(result.stop_reason, KNOWN)
+        self.assertEqual(result.counter, 0)
+        result = BruteForceStabRankSearcher(check_stabilizer_state=False).run(ket=ket_to_qstate(ket))
+        self.assertEqual(result.stop_reason, FOUND)
+
+    def test_depth_first_search_matches_combinations(self):
+
+        rng = np.random.default_rng(11)
+        # the target lies in the span of the states 1, 4 and 6,
+        # and state 5 is a copy of state 2
+        state_kets = rng.normal(size=(8, 7)) + 1j * rng.normal(size=(8, 7))
+        state_kets[:, 5] = state_kets[:, 2]
+        target_ket = state_kets[:, [1, 4, 6]].dot(rng.normal(size=3))
+        target_ket /= np.linalg.norm(target_ket)
+        searcher = BruteForceStabRankSearcher()
+        for size in [1, 2, 3]:
+            indices = searcher._depth_first_search(
+                state_kets=state_kets,
+                target_ket=target_ket,
+                size=size,
+                orthonormal_kets=np.zeros((8, 0), dtype=np.complex128),
+                squared_score=0.,
+                start=0)
+            expected = None
+            for combination in itertools.combinations(range(7), size):
+                if np.isclose(Basis(kets=state_kets[:, combination]).score_ket(ket=target_ket), 1):
+                    expected = list(combination)
+                    break
+            self.assertEqual(indices, expected)
+
+
 class TestRandomWalkStabRankSearcher(unittest.TestCase):
 
     class ConstantStabBasisProvider(StabBasisProvider):
 
-        def __init__(self, target_qstate, stabrank):
+        def __init__(self, target_qstate, stabrank, **kwargs):
             if target_qstate.num_qubits != 1:
                 raise NotImplementedError
             z_plus = StabRepr(check_matrix=[[0, 1]], phases=[1])
@@ -74,7 +156,7 @@ class TestRandomWalkStabRankSearcher(unittest.TestCase):
 
     class ConstantAfterFirstStabBasisProvider(StabBasisProvider):
 
-        def __init__(self, target_qstate, stabrank):
+        def __init__(self, target_qstate, stabrank, **kwargs):
             if target_qstate.num_qubits != 1:
                 raise NotImplementedError
 
@@ -106,18 +188,20 @@ class TestRandomWalkStabRankSearcher(unittest.TestCase):
         # case: returned stabilizer is the correct one
         ket = np.array([[1, 0]])
         qstate = ket_to_qstate(ket=ket)
-        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1)
+        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1,
+                                              check_stabilizer_state=False)
         searcher.STAB_BASIS_PROVIDER_CLS = TestRandomWalkStabRankSearcher.ConstantStabBasisProvider
-        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=10)
+        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=10).found_basis
         self.assertTrue(basis is not None)
         self.assertEqual(searcher.counter, 1)
 
         # case: returned stabilizer is not the correct one
         ket = np.array([[0, 1]])
         qstate = ket_to_qstate(ket=ket)
-        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1)
+        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1,
+                                              check_stabilizer_state=False)
         searcher.STAB_BASIS_PROVIDER_CLS = TestRandomWalkStabRankSearcher.ConstantStabBasisProvider
-        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=42)
+        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=42).found_basis
         self.assertTrue(basis is None)
         self.assertEqual(searcher.counter, 42)
 
@@ -126,20 +210,22 @@ class TestRandomWalkStabRankSearcher(unittest.TestCase):
         # case: first state is correct
         ket = np.array([[0, 1]])
         qstate = ket_to_qstate(ket=ket)
-        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1)
+        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1,
+                                              check_stabilizer_state=False)
         searcher.STAB_BASIS_PROVIDER_CLS = \
             TestRandomWalkStabRankSearcher.ConstantAfterFirstStabBasisProvider
-        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=10)
+        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=10).found_basis
         self.assertTrue(searcher.counter, 1)
         self.assertTrue(basis is not None)
 
         # case: second state is correct
         ket = np.array([[1, 0]])
         qstate = ket_to_qstate(ket=ket)
-        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1)
+        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1,
+                                              check_stabilizer_state=False)
         searcher.STAB_BASIS_PROVIDER_CLS = \
             TestRandomWalkStabRankSearcher.ConstantAfterFirstStabBasisProvider
-        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=10)
+        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=10).found_basis
         self.assertTrue(searcher.counter, 2)
         self.assertTrue(basis is not None)
 
@@ -147,13 +233,272 @@ class TestRandomWalkStabRankSearcher(unittest.TestCase):
         s = 1.0 / np.sqrt(2)
         ket = np.array([[s, s]])
         qstate = ket_to_qstate(ket=ket)
-        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1)
+        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1,
+                                              check_stabilizer_state=False)
         searcher.STAB_BASIS_PROVIDER_CLS = \
             TestRandomWalkStabRankSearcher.ConstantAfterFirstStabBasisProvider
-        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=43)
+        basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=43).found_basis
         self.assertTrue(searcher.counter, 43)
         self.assertTrue(basis is None)
 
+    def test_run_multiple(self):
+
+        # the walk towards |1> spans |0> all the time, which is
+        # then not walked towards anymore
+        qstates = [ket_to_qstate(ket=np.array([[0, 1]])), ket_to_qstate(ket=np.array([[1, 0]]))]
+        searcher = RandomWalkStabRankSearcher(beta_init=0, beta_final=10, number_of_betas=1,
+                                              check_stabilizer_state=False)
+        searcher.STAB_BASIS_PROVIDER_CLS = TestRandomWalkStabRankSearcher.ConstantStabBasisProvider
+        bases = [result.found_basis
+                 for result in searcher.run_multiple(target_qstates=qstates, stabrank=1, number_of_bases=10)]
+        self.assertIsNone(bases[0])
+        self.assertTrue(bases[1].does_qstate_live_in_subspace(qstates[1]))
+        self.assertEqual(searcher.counter, 10)
+
+        # targets on different numbers of qubits
+        with self.assertRaises(ValueError):
+            searcher.run_multiple(target_qstates=[qstates[0], ket_to_qstate(ket=np.array([[1, 0, 0, 0]]))])
+
+
+class TestNRandomStabRankSearcher(unittest.TestCase):
+
+    def test_run_multiple(self):
+
+        qstates = [ket_to_qstate(get_dicke_state(number_of_qubits=2, hamming_weight=hamming_weight))
+                   for hamming_weight in range(3)]
+        searcher = NRandomStabRankSearcher(rng=3, check_stabilizer_state=False)
+        bases = [result.found_basis
+                 for result in searcher.run_multiple(target_qstates=qstates, stabrank=1, number_of_bases=2000)]
+        # all three are stabilizer states
+        for qstate, basis in zip(qstates, bases):
+            self.assertTrue(basis.does_qstate_live_in_subspace(qstate))
+        self.assertLess(searcher.counter, 2000)
+
+
+class TestVectorizedRandomWalkStabRankSearcher(unittest.TestCase):
+
+    def test_run(self):
+        ket = np.array([1, 0, 0, 0.5])
+        qstate = ket_to_qstate(ket / np.linalg.norm(ket))
+        searcher = VectorizedRandomWalkStabRankSearcher(beta_init=1, beta_final=100, number_of_betas=10,
+                                                        number_of_walkers=8, rng=3)
+        result = searcher.run(target_qstate=qstate, stabrank=2, number_of_bases=100)
+        self.assertEqual(result.stop_reason, FOUND)
+        self.assertTrue(result.found_basis.does_qstate_live_in_subspace(qstate=qstate))
+        self.assertEqual(result.counter % 8, 0)
+
+        result = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=5)
+        self.assertEqual(result.stop_reason, BUDGET_EXHAUSTED)
+        self.assertEqual(result.counter, 8 * 5 * 10)
+        self.assertAlmostEqual(result.score, result.basis.score(qstate=qstate))
+
+        scores = [VectorizedRandomWalkStabRankSearcher(beta_init=1, beta_final=2, number_of_betas=1,
+                                                       number_of_walkers=4, rng=5).run(
+            target_qstate=qstate, stabrank=1, number_of_bases=10).score for _ in range(2)]
+        self.assertEqual(scores[0], scores[1])
+
+
+class TestRankDescent(unittest.TestCase):
+
+    def test_descent_from_recursive_basis(self):
+        qstate = ket_to_qstate(get_dicke_state(number_of_qubits=3, hamming_weight=1))
+        initial_basis = get_recursive_dicke_basis(number_of_qubits=3, hamming_weight=1,
+                                                  check_stabilizer_state=False)
+        self.assertEqual(initial_basis.size, 3)
+        for searcher in [RandomWalkStabRankSearcher(beta_init=1, beta_final=100, number_of_betas=10, rng=1),
+                         VectorizedRandomWalkStabRankSearcher(beta_init=1, beta_final=100, number_of_betas=10,
+                                                              number_of_walkers=4, rng=1)]:
+            results = run_rank_descent(searcher=searcher, target_qstate=qstate, initial_basis=initial_basis,
+                                       number_of_bases=100)
+            self.assertEqual(results[0].stop_reason, FOUND)
+            self.assertEqual(results[0].basis.size, 2)
+            self.assertEqual(results[-1].stop_reason, BUDGET_EXHAUSTED)
+            self.assertEqual(len(results), 2)
+
+            results = run_rank_descent(searcher=searcher, target_qstate=qstate, initial_basis=initial_basis,
+                                       number_of_bases=100, min_stabrank=2)
+            self.assertEqual(len(results), 1)
+            self.assertTrue(results[0].success)
+
+
+class TestRestartPolicies(unittest.TestCase):
+
+    def test_restarts_stay_within_budget(self):
+        # a non-stabilizer state with stabilizer rank 1 is never found,
+        # so the walk stagnates
+        ket = np.array([[1, 0.25]])
+        qstate = ket_to_qstate(ket / np.linalg.norm(ket))
+        for restart_policy in [RedrawRestartPolicy(), ReplaceWeakestRestartPolicy(), ReheatRestartPolicy()]:
+            searcher = RandomWalkStabRankSearcher(beta_init=1, beta_final=10, number_of_betas=3, rng=1,
+                                                  stagnation_detector=StagnationDetector(plateau_length=5),
+                                                  restart_policy=restart_policy)
+            basis = searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=20).found_basis
+            self.assertIsNone(basis)
+            self.assertEqual(searcher.counter, 3 * 20)
+            statistics = searcher.restart_statistics.to_dict()
+            self.assertGreater(statistics[restart_policy.NAME]["restarts"], 0)
+            self.assertEqual(statistics[restart_policy.NAME]["successes"], 0)
+
+    def test_success_after_restart(self):
+        # D(3, 1) is not a stabilizer state, so it is searched for
+        qstate = ket_to_qstate(get_dicke_state(number_of_qubits=3, hamming_weight=1))
+        searcher = RandomWalkStabRankSearcher(beta_init=1, beta_final=10, number_of_betas=1, rng=7,
+                                              stagnation_detector=StagnationDetector(plateau_length=1),
+                                              restart_policy=RedrawRestartPolicy())
+        basis = searcher.run(target_qstate=qstate, stabrank=2, number_of_bases=1000).found_basis
+        self.assertIsNotNone(basis)
+        statistics = searcher.restart_statistics.to_dict()
+        self.assertGreater(statistics["redraw"]["restarts"], 0)
+        self.assertEqual(statistics["redraw"]["successes"], 1)
+        self.assertEqual(statistics["redraw"]["budget_saved"], 1000 - searcher.counter)
+        self.assertGreater(statistics["redraw"]["budget_saved"], 0)
+
+    def test_detector_requires_policy(self):
+        with self.assertRaises(ValueError):
+            RandomWalkStabRankSearcher(beta_init=1, beta_final=10, number_of_betas=1,
+                                       stagnation_detector=StagnationDetector(plateau_length=1))
+
+
+class TestStabilizerStateShortcut(unittest.TestCase):
+
+    def test_stabilizer_target_is_not_searched(self):
+
+        bell_qstate = ket_to_qstate(np.array([[1], [0], [0], [1]]) / np.sqrt(2))
+        for searcher in [NRandomStabRankSearcher(rng=1),
+                         GreedyPursuitStabRankSearcher(pool_size=10, rng=1),
+                         RandomWalkStabRankSearcher(beta_init=1, beta_final=2, number_of_betas=1, rng=1)]:
+            for stabrank in [1, 2]:
+                basis = searcher.run(target_qstate=bell_qstate, stabrank=stabrank).found_basis
+                self.assertEqual(basis.size, 1)
+                self.assertTrue(basis.does_qstate_live_in_subspace(bell_qstate))
+                self.assertEqual(searcher.counter, 0)
+
+        # a state with stabilizer rank 2 is searched for
+        qstate = ket_to_qstate(get_dicke_state(number_of_qubits=3, hamming_weight=1))
+        searcher = NRandomStabRankSearcher(rng=1)
+        self.assertIsNone(searcher.run(target_qstate=qstate, stabrank=1, number_of_bases=3).found_basis)
+        self.assertEqual(searcher.counter, 3)
+
+
+class TestGreedyPursuitStabRankSearcher(unittest.TestCase):
+
+    def test_run_and_warm_start(self):
+
+        qstate = ket_to_qstate(get_dicke_state(number_of_qubits=3, hamming_weight=1))
+        searcher = GreedyPursuitStabRankSearcher(pool_size=200, rng=4)
+
+        # |W> is a superposition of three computational basis states
+        basis = searcher.run(target_qstate=qstate, stabrank=3).found_basis
+        self.assertEqual(searcher.pool.size, 200)
+        self.assertAlmostEqual(searcher.best_score, searcher.best_basis.score(qstate=qstate))
+        self.assertIsNotNone(basis)
+        self.assertEqual(basis.size, 3)
+        self.assertTrue(basis.does_qstate_live_in_subspace(qstate))
+
+        # the pool is reused
+        pool = searcher.pool
+        basis = searcher.run(target_qstate=qstate, stabrank=1).found_basis
+        self.assertIsNone(basis)
+        self.assertIs(searcher.pool, pool)
+        self.assertEqual(searcher.counter, 400)
+
+        # the greedy basis as warm start of the random walk
+        walker = RandomWalkStabRankSearcher(beta_init=1, beta_final=2, number_of_betas=1, rng=1)
+        walker.run(target_qstate=qstate, stabrank=1, number_of_bases=1,
+                   initial_basis=searcher.best_basis)
+        self.assertAlmostEqual(walker.best_score, searcher.best_score)
+
+
+class TestDeadlinesAndCancellation(unittest.TestCase):
+
+    def setUp(self):
+        # a non-stabilizer state with stabilizer rank 2
+        ket = np.array([[1, 0.25]])
+        self.qstate = ket_to_qstate(ket / np.linalg.norm(ket))
+
+    def _get_searchers(self, **kwargs):
+        return [NRandomStabRankSearcher(rng=1, **kwargs),
+                RandomWalkStabRankSearcher(beta_init=1, beta_final=2, number_of_betas=1, rng=1, **kwargs)]
+
+    def test_budget_exhausted(self):
+        for searcher in self._get_searchers():
+            result = searcher.run(target_qstate=self.qstate, stabrank=1, number_of_bases=10)
+            self.assertEqual(result.stop_reason, BUDGET_EXHAUSTED)
+            self.assertFalse(result.success)
+            self.assertIsNone(result.found_basis)
+            self.assertEqual(result.counter, 10)
+            # the best basis seen is kept
+            self.assertAlmostEqual(result.score, result.basis.score(qstate=self.qstate))
+            self.assertLess(result.score, 1)
+
+    def test_time_limit(self):
+        for searcher in self._get_searchers(time_limit=0.):
+            result = searcher.run(target_qstate=self.qstate, stabrank=1, number_of_bases=10 ** 9)
+            self.assertEqual(result.stop_reason, DEADLINE_REACHED)
+            self.assertEqual(result.counter, 0)
+            self.assertIsNone(result.basis)
+        for searcher in self._get_searchers(time_limit=0.05):
+            result = searcher.run(target_qstate=self.qstate, stabrank=1, number_of_bases=10 ** 9)
+            self.assertEqual(result.stop_reason, DEADLINE_REACHED)
+            self.assertGreater(result.counter, 0)
+            self.assertIsNotNone(result.basis)
+
+    def test_cancellation(self):
+
+        def cancel_after_five_bases(searcher):
+            if searcher.counter == 5:
+                searcher.cancellation_token.cancel()
+
+        for searcher in [NRandomStabRankSearcher(rng=1, cancellation_token=CancellationToken()),
+                         RandomWalkStabRankSearcher(beta_init=1, beta_final=2, number_of_betas=1, rng=1,
+                                                    cancellation_token=CancellationToken())]:
+            searcher.progress_callback = cancel_after_five_bases
+            result = searcher.run(target_qstate=self.qstate, stabrank=1, number_of_bases=10 ** 9)
+            self.assertEqual(result.stop_reason, CANCELLED)
+            self.assertEqual(result.counter, 5)
+            self.assertIsNotNone(result.basis)
+
+        token = CancellationToken()
+        token.cancel()
+        searcher = BruteForceStabRankSearcher(cancellation_token=token)
+        result = searcher.run(ket=self.qstate)
+        self.assertEqual(result.stop_reason, CANCELLED)
+        self.assertIsNone(result.basis)
+
+    def test_known_and_found(self):
+        searcher = NRandomStabRankSearcher(rng=1)
+        result = searcher.run(target_qstate=ket_to_qstate(np.array([[1, 0]])), stabrank=1)
+        self.assertEqual(result.stop_reason, KNOWN)
+        self.assertTrue(result.success)
+        result = BruteForceStabRankSearcher().run(ket=self.qstate)
+        self.assertEqual(result.stop_reason, FOUND)
+        self.assertAlmostEqual(result.score, 1)
+        self.assertEqual(result.to_dict()["size"], 2)
+
+
+class TestReproducibility(unittest.TestCase):
+
+    def _run_random_walk(self, rng):
+        qstate = ket_to_qstate(get_dicke_state(number_of_qubits=3, hamming_weight=1))
+        searcher = RandomWalkStabRankSearcher(beta_init=1, beta_final=10, number_of_betas=3, rng=rng)
+        searcher.run(target_qstate=qstate, stabrank=2, number_of_bases=20)
+        return searcher.counter, searcher.best_score, searcher.best_basis.kets
+
+    def test_same_seed_same_run(self):
+        counter_a, score_a, kets_a = self._run_random_walk(rng=42)
+        counter_b, score_b, kets_b = self._run_random_walk(rng=42)
+        self.assertEqual(counter_a, counter_b)
+        self.assertEqual(score_a, score_b)
+        self.assertTrue(np.array_equal(kets_a, kets_b))
+
+    def test_spawned_streams(self):
+        streams_a = spawn_rngs(seed=42, number_of_streams=3)
+        streams_b = spawn_rngs(seed=42, number_of_streams=3)
+        draws_a = [rng.random() for rng in streams_a]
+        draws_b = [rng.random() for rng in streams_b]
+        self.assertEqual(draws_a, draws_b)
+        self.assertEqual(len(set(draws_a)), 3)
+
 
 if __name__ == "__main__":
     unittest.main()
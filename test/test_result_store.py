@@ -0,0 +1,97 @@
+import unittest
+import numpy as np
+from stabranksearcher.basis import Basis
+from stabranksearcher.result_store import ResultStore, get_target_hash
+from stabranksearcher.rank_searcher import NRandomStabRankSearcher, RandomWalkStabRankSearcher
+from stabranksearcher.stab_basis_provider.random_walk import RandomWalkStabBasisProvider
+from stabranksearcher.quantum_state_tools import ket_to_qstate
+
+
+class TestGetTargetHash(unittest.TestCase):
+
+    def test_invariant_under_norm_and_global_phase(self):
+        ket = np.array([1, 0, 0, 1j])
+        self.assertEqual(get_target_hash(ket), get_target_hash(3 * np.exp(0.7j) * ket))
+        self.assertEqual(get_target_hash(ket), get_target_hash(ket.reshape(4, 1)))
+        self.assertNotEqual(get_target_hash(ket), get_target_hash(np.array([1, 0, 0, -1j])))
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ResultStore(":memory:")
+        s = 1.0 / np.sqrt(2)
+        self.target_ket = np.array([s, 0, 0, s])
+        self.spanning_basis = Basis(kets=np.array([[1, 0], [0, 0], [0, 0], [0, 1]]))
+        self.other_basis = Basis(kets=np.array([[1], [0], [0], [0]]))
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_solutions(self):
+        self.assertFalse(self.store.is_solved(target_ket=self.target_ket, stabrank=2))
+        self.store.record(target_ket=self.target_ket, stabrank=1, success=False,
+                          basis=self.other_basis, score=np.sqrt(0.5), counter=10)
+        self.store.record(target_ket=self.target_ket, stabrank=2, success=True,
+                          basis=self.spanning_basis, score=1., counter=3)
+        self.assertFalse(self.store.is_solved(target_ket=self.target_ket, stabrank=1))
+        self.assertTrue(self.store.is_solved(target_ket=self.target_ket, stabrank=2))
+        self.assertTrue(self.store.is_solved(target_ket=self.target_ket, stabrank=3))
+        solution = self.store.get_solution(target_ket=-self.target_ket, stabrank=3)
+        self.assertTrue(np.allclose(solution.kets, self.spanning_basis.kets))
+        self.assertEqual(self.store.get_budget_spent(target_ket=self.target_ket, stabrank=1)[0], 10)
+
+    def test_get_nearest_basis(self):
+        self.assertIsNone(self.store.get_nearest_basis(target_ket=self.target_ket, stabrank=2))
+        self.store.record(target_ket=self.target_ket, stabrank=1, success=False,
+                          basis=self.other_basis, score=np.sqrt(0.5))
+        self.store.record(target_ket=self.target_ket, stabrank=2, success=True,
+                          basis=self.spanning_basis, score=1.)
+        self.assertEqual(self.store.get_nearest_basis(target_ket=self.target_ket, stabrank=1).size, 1)
+        self.assertEqual(self.store.get_nearest_basis(target_ket=self.target_ket, stabrank=3).size, 2)
+
+    def test_searcher_skips_solved_queries(self):
+        target_qstate = ket_to_qstate(self.target_ket)
+        searcher = NRandomStabRankSearcher(rng=1, result_store=self.store)
+        self.store.record(target_ket=self.target_ket, stabrank=2, success=True,
+                          basis=self.spanning_basis, score=1.)
+        basis = searcher.run(target_qstate=target_qstate, stabrank=2, number_of_bases=10).basis
+        self.assertTrue(np.allclose(basis.kets, self.spanning_basis.kets))
+        self.assertEqual(searcher.counter, 0)
+
+    def test_searcher_records_failures(self):
+        target_qstate = ket_to_qstate(self.target_ket)
+        searcher = RandomWalkStabRankSearcher(beta_init=1, beta_final=2, number_of_betas=1,
+                                              rng=1, result_store=self.store,
+                                              check_stabilizer_state=False, real=False)
+        searcher.run(target_qstate=target_qstate, stabrank=1, number_of_bases=5)
+        self.assertEqual(self.store.get_budget_spent(target_ket=self.target_ket, stabrank=1)[0], 5)
+        nearest_basis = self.store.get_nearest_basis(target_ket=self.target_ket, stabrank=1)
+        self.assertTrue(np.isclose(nearest_basis.score_ket(self.target_ket), searcher.best_score))
+
+
+class TestWarmStart(unittest.TestCase):
+
+    def test_initial_basis_is_resized(self):
+        s = 1.0 / np.sqrt(2)
+        target_qstate = ket_to_qstate(np.array([s, 0, 0, s]))
+        kets = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 0], [0, 0, 1]])
+        initial_basis = Basis(kets=kets)
+
+        # the state |01>, which does not contribute to the target, is dropped
+        provider = RandomWalkStabBasisProvider(target_qstate=target_qstate, stabrank=2,
+                                               rng=1, initial_basis=initial_basis)
+        basis = provider.get_next_basis()
+        self.assertEqual(basis.size, 2)
+        self.assertTrue(basis.does_qstate_live_in_subspace(target_qstate))
+
+        # padding with random stabilizer states
+        provider = RandomWalkStabBasisProvider(target_qstate=target_qstate, stabrank=4,
+                                               rng=1, initial_basis=initial_basis)
+        basis = provider.get_next_basis()
+        self.assertEqual(basis.size, 4)
+        self.assertTrue(np.allclose(basis.kets[:, :3], kets))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import queue
+import tempfile
+import threading
+import unittest
+import numpy as np
+from stabranksearcher import shared_arrays
+from stabranksearcher.shared_arrays import SharedArray, SHARED_MEMORY
+from stabranksearcher.search_service import (
+    SearchService,
+    SearchServiceClient,
+    encode_ket,
+    run_search_job,
+    DONE,
+    CANCELLED)
+
+
+class TestSearchService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, "service.sock")
+        self.service = SearchService(socket_path=self.socket_path, max_workers=1,
+                                     progress_interval=0.01)
+        await self.service.start()
+        self.client = SearchServiceClient(socket_path=self.socket_path)
+
+    async def asyncTearDown(self):
+        await self.service.close()
+        self.directory.cleanup()
+
+    async def test_submit_and_stream(self):
+        job = {"target_ket": encode_ket(np.array([1, 0])),
+               "searcher": "random_walk",
+               "stabrank": 1,
+               "number_of_bases": 1000,
+               "parameters": {"beta_init": 1, "beta_final": 2, "number_of_betas": 1},
+               "seed": 1}
+        job_id = await self.client.submit(job)
+        events = [event async for event in self.client.stream(job_id)]
+        self.assertEqual(events[-1]["event"], "finished")
+        status = await self.client.get_status(job_id)
+        self.assertEqual(status["status"], DONE)
+        self.assertTrue(status["result"]["success"])
+        self.assertEqual(status["result"]["size"], 1)
+        self.assertEqual(len(await self.client.list_jobs()), 1)
+        # the target was passed in shared memory, freed after the job
+        self.assertTrue(self.service._jobs[job_id].target_array.closed)
+
+    async def test_cancel(self):
+        # a non-stabilizer state with stabilizer rank 1 is never found
+        job = {"target_ket": encode_ket(np.array([1, 0.25]) / np.linalg.norm([1, 0.25])),
+               "searcher": "n_random",
+               "stabrank": 1,
+               "number_of_bases": 10 ** 9}
+        job_id = self.service.submit(job)
+        async for event in self.service.stream(job_id):
+            if event["event"] == "progress":
+                break
+        self.assertTrue(await self.client.cancel(job_id))
+        status = await self.service.wait(job_id)
+        self.assertEqual(status["status"], CANCELLED)
+        self.assertFalse(self.service.cancel(job_id))
+
+    async def test_invalid_job(self):
+        with self.assertRaises(ValueError):
+            await self.client.submit({"dicke": {"number_of_qubits": 2, "hamming_weight": 1},
+                                      "searcher": "unknown",
+                                      "stabrank": 1,
+                                      "number_of_bases": 1})
+
+
+class TestRunSearchJob(unittest.TestCase):
+
+    def test_shared_target_released_after_job(self):
+        job = {"searcher": "random_walk",
+               "stabrank": 1,
+               "number_of_bases": 1000,
+               "parameters": {"beta_init": 1, "beta_final": 2, "number_of_betas": 1},
+               "seed": 1}
+        shared_array = SharedArray(array=np.array([1, 0], dtype=complex), backend=SHARED_MEMORY)
+        name = shared_array.handle.name
+        result = run_search_job(job=job, job_id="job", progress_queue=queue.Queue(),
+                                cancel_event=threading.Event(), target_handle=shared_array.handle)
+        self.assertTrue(result["success"])
+        self.assertNotIn(name, shared_arrays._attached_blocks)
+        shared_array.close()
+        if os.path.exists("/proc/self/maps"):
+            with open("/proc/self/maps") as maps:
+                self.assertNotIn(name.lstrip("/"), maps.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import pickle
+import tempfile
+import unittest
+import multiprocessing
+import concurrent.futures
+import numpy as np
+from stabranksearcher.candidate_pool import StabilizerStatePool
+from stabranksearcher.shared_arrays import SharedArray, remove_stale_files, SHARED_MEMORY, MEMMAP
+
+
+def _sum_shared_array(handle):
+    array = handle.attach()
+    return complex(np.sum(array * np.arange(array.size).reshape(array.shape, order="F"))), array.flags.writeable
+
+
+def _attach_and_crash(handle):
+    handle.attach()
+    os._exit(1)
+
+
+def _create_and_crash(directory):
+    shared_array = SharedArray(array=np.ones(4), backend=MEMMAP, directory=directory)
+    os._exit(shared_array.array.size)
+
+
+class TestSharedArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.array = np.asfortranarray(np.arange(12).reshape(4, 3) * (1 + 1j))
+        self.context = multiprocessing.get_context("spawn")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_attach(self):
+        for backend in [SHARED_MEMORY, MEMMAP]:
+            with SharedArray(array=self.array, backend=backend, directory=self.directory.name) as shared_array:
+                handle = pickle.loads(pickle.dumps(shared_array.handle))
+                view = handle.attach()
+                self.assertTrue(np.array_equal(view, self.array))
+                self.assertTrue(np.isfortran(view))
+                self.assertFalse(view.flags.writeable)
+                self.assertFalse(shared_array.array.flags.writeable)
+                with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=self.context) as pool:
+                    total, writeable = pool.submit(_sum_shared_array, handle).result()
+                expected_view = np.arange(self.array.size).reshape(self.array.shape, order="F")
+                self.assertAlmostEqual(total, np.sum(self.array * expected_view))
+                self.assertFalse(writeable)
+            self.assertTrue(shared_array.closed)
+            with self.assertRaises(ValueError):
+                shared_array.array
+
+    def test_freed_after_close(self):
+        for backend in [SHARED_MEMORY, MEMMAP]:
+            shared_array = SharedArray(array=self.array, backend=backend, directory=self.directory.name)
+            shared_array.close()
+            with self.assertRaises(FileNotFoundError):
+                shared_array.handle.attach()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_worker_crash(self):
+        for backend in [SHARED_MEMORY, MEMMAP]:
+            with SharedArray(array=self.array, backend=backend, directory=self.directory.name) as shared_array:
+                process = self.context.Process(target=_attach_and_crash, args=(shared_array.handle,))
+                process.start()
+                process.join()
+                self.assertEqual(process.exitcode, 1)
+                # the crashed worker does not take the block with it
+                with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=self.context) as pool:
+                    pool.submit(_sum_shared_array, shared_array.handle).result()
+
+    def test_owner_crash(self):
+        process = self.context.Process(target=_create_and_crash, args=(self.directory.name,))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 4)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+        with SharedArray(array=self.array, backend=MEMMAP, directory=self.directory.name):
+            # creating an array removes the file of the crashed owner
+            self.assertEqual(len(os.listdir(self.directory.name)), 1)
+        self.assertEqual(remove_stale_files(directory=self.directory.name), [])
+
+    def test_stabilizer_state_pool(self):
+        pool = StabilizerStatePool.sample(number_of_qubits=3, size=20, rng=1)
+        target_ket = np.array([1, 0, 0, 1, 0, 1, 1, 0]) / 2.
+        with pool.share() as shared_kets:
+            attached_pool = StabilizerStatePool.attach(shared_kets.handle)
+            self.assertTrue(np.shares_memory(attached_pool.kets, shared_kets.handle.attach()))
+            basis, score = attached_pool.get_greedy_basis(ket=target_ket, stabrank=2)
+            expected_basis, expected_score = pool.get_greedy_basis(ket=target_ket, stabrank=2)
+            self.assertEqual(score, expected_score)
+            self.assertTrue(np.array_equal(basis.kets, expected_basis.kets))
+
+
+if __name__ == "__main__":
+    unittest.main()
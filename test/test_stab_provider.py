@@ -5,14 +5,72 @@ import netsquid.qubits.qubitapi as qapi
 from stabranksearcher.stab_basis_provider.random_walk import (
         BasisWithTargetState,
         RandomWalkStabBasisProvider,
-        MoveDecider)
-from stabranksearcher.quantum_state_tools import ket_to_qstate
+        MoveDecider,
+        SimulatedAnnealingMoveDecider,
+        get_acceptance_probabilities)
+from stabranksearcher.stab_basis_provider.vectorized_random_walk import (
+        VectorizedRandomWalkStabBasisProvider,
+        score_stacked_kets)
+from stabranksearcher.stab_basis_provider.random import RandomStabBasisProvider
+from stabranksearcher.stab_basis_provider.stagnation import StagnationDetector
+from stabranksearcher.basis import Basis
+from stabranksearcher.quantum_state_tools import ket_to_qstate, is_stabilizer_state
 
 
 class TestBasisWithTargetState(unittest.TestCase):
 
-    # TODO
-    pass
+    def test_move_with_proposals(self):
+
+        ket_00 = np.array([[1], [0], [0], [0]])
+        bell_ket = np.array([[1], [0], [0], [1]]) / np.sqrt(2)
+        target_qstate = ket_to_qstate(bell_ket)
+        rng = np.random.default_rng(5)
+        for proposal_selection in ["best", "boltzmann"]:
+            basis = BasisWithTargetState(kets=ket_00, target_qstate=target_qstate)
+            initial_score = basis.score(qstate=target_qstate)
+            accepted = basis.move(move_decider=MoveDecider(), rng=rng,
+                                  number_of_proposals=32,
+                                  proposal_selection=proposal_selection)
+            self.assertTrue(accepted)
+            # the cached score is that of the new basis
+            score = basis.score(qstate=target_qstate)
+            self.assertAlmostEqual(score, basis.score_ket(ket=bell_ket))
+            if proposal_selection == "best":
+                # (I + XX)|00> is the target itself
+                self.assertAlmostEqual(score, 1.)
+            self.assertGreaterEqual(score, 0.)
+            self.assertNotAlmostEqual(score, initial_score)
+
+        # rejection restores the basis and its score
+        class RejectingMoveDecider(MoveDecider):
+            def should_move(self, current_score, tentative_next_score):
+                return False
+
+        basis = BasisWithTargetState(kets=ket_00, target_qstate=target_qstate)
+        initial_score = basis.score(qstate=target_qstate)
+        self.assertFalse(basis.move(move_decider=RejectingMoveDecider(), rng=rng, number_of_proposals=8))
+        self.assertTrue(np.allclose(basis.kets, ket_00))
+        self.assertAlmostEqual(basis.score(qstate=target_qstate), initial_score)
+
+        with self.assertRaises(ValueError):
+            basis.move(move_decider=MoveDecider(), number_of_proposals=8, proposal_selection="worst")
+
+
+class TestSimulatedAnnealingMoveDecider(unittest.TestCase):
+
+    def test_infinite_beta(self):
+        move_decider = SimulatedAnnealingMoveDecider(beta=np.inf, rng=1)
+        with np.errstate(invalid="raise"):
+            self.assertTrue(move_decider.should_move(current_score=0.5, tentative_next_score=0.6))
+            # equal scores are accepted, lower ones rejected
+            self.assertTrue(move_decider.should_move(current_score=0.5, tentative_next_score=0.5))
+            self.assertFalse(move_decider.should_move(current_score=0.5, tentative_next_score=0.4))
+            self.assertTrue(np.array_equal(
+                get_acceptance_probabilities(current_scores=np.array([0.5, 0.5, 0.5]),
+                                             tentative_scores=np.array([0.6, 0.5, 0.4]), beta=np.inf),
+                [1., 1., 0.]))
+        self.assertAlmostEqual(get_acceptance_probabilities(current_scores=0.5, tentative_scores=0.4, beta=2.),
+                               np.exp(-0.2))
 
 
 class TestRandomWalkStabBasisProvider(unittest.TestCase):
@@ -28,7 +86,7 @@ class TestRandomWalkStabBasisProvider(unittest.TestCase):
     class RandomWalkStabBasisProviderWithPlusStateAsInitialState(RandomWalkStabBasisProvider):
 
         @staticmethod
-        def get_random_stabilizer_state(number_of_qubits=1):
+        def get_random_stabilizer_state(number_of_qubits=1, rng=None):
             # mock method to always obtain the |+> state at the start
             srepr = StabRepr(check_matrix=[[1, 0]], phases=[1])
             qubits = qapi.create_qubits(num_qubits=number_of_qubits)
@@ -50,9 +108,9 @@ class TestRandomWalkStabBasisProvider(unittest.TestCase):
             super().__init__(qstates=qstates, target_qstate=target_qstate)
             self.counter = 0
 
-        def randomly_modify(self):
+        def randomly_modify(self, rng=None):
             if self.counter < len(self.QSTATES):
-                self._qstates[0] = self.QSTATES[self.counter]
+                self.replace_qstate(qstate_index=0, qstate=self.QSTATES[self.counter])
                 self.counter += 1
             else:
                 raise Exception
@@ -64,7 +122,8 @@ class TestRandomWalkStabBasisProvider(unittest.TestCase):
         provider = \
             TestRandomWalkStabBasisProvider.RandomWalkStabBasisProviderWithPlusStateAsInitialState(
                 target_qstate=zero_qstate,
-                stabrank=1)
+                stabrank=1,
+                real=False)
 
         move_decider = self.TurnOnOffMoveDecider(on=False)
 
@@ -97,5 +156,124 @@ class TestRandomWalkStabBasisProvider(unittest.TestCase):
             basis = provider.get_next_basis(move_decider=move_decider)
 
 
+class TestVectorizedRandomWalkStabBasisProvider(unittest.TestCase):
+
+    def test_score_stacked_kets(self):
+        rng = np.random.default_rng(1)
+        kets = rng.normal(size=(3, 8, 3)) + 1j * rng.normal(size=(3, 8, 3))
+        # linearly dependent states count once
+        kets[1, :, 2] = kets[1, :, 0] + 2j * kets[1, :, 1]
+        target_ket = rng.normal(size=8) + 1j * rng.normal(size=8)
+        target_ket /= np.linalg.norm(target_ket)
+        self.assertTrue(np.allclose(score_stacked_kets(kets=kets, target_ket=target_ket),
+                                    [Basis(kets=walker_kets).score_ket(ket=target_ket) for walker_kets in kets]))
+
+    def test_get_next_scores(self):
+        target_ket = np.array([1, 0, 0, 0.5, 0, 0, 0, 0.25])
+        target_ket = target_ket / np.linalg.norm(target_ket)
+        provider = VectorizedRandomWalkStabBasisProvider(target_qstate=ket_to_qstate(target_ket), stabrank=2,
+                                                         number_of_walkers=5, rng=2)
+        scores = provider.get_next_scores(beta=1.)
+        self.assertEqual(scores.shape, (5,))
+        for _ in range(20):
+            previous_scores = scores.copy()
+            # at infinite beta, only moves that do not lower the score are accepted
+            with np.errstate(invalid="raise"):
+                scores = provider.get_next_scores(beta=np.inf)
+            self.assertTrue(np.all(scores >= previous_scores - 1e-12))
+        for walker_index in range(5):
+            basis = provider.get_basis(walker_index=walker_index)
+            self.assertAlmostEqual(basis.score_ket(ket=target_ket), scores[walker_index])
+            for index in range(basis.size):
+                self.assertTrue(is_stabilizer_state(ket=basis.kets[:, index]))
+
+    def test_padded_initial_basis(self):
+        target_ket = np.array([1, 0, 0, 0.5, 0, 0, 0, 0.25])
+        target_ket = target_ket / np.linalg.norm(target_ket)
+        initial_ket = np.zeros(8)
+        initial_ket[0] = 1
+        provider = VectorizedRandomWalkStabBasisProvider(target_qstate=ket_to_qstate(target_ket), stabrank=2,
+                                                         number_of_walkers=3, rng=2,
+                                                         initial_basis=Basis(kets=initial_ket[:, np.newaxis]))
+        provider.get_next_scores(beta=1.)
+        for walker_index in range(3):
+            basis = provider.get_basis(walker_index=walker_index)
+            self.assertEqual(basis.size, 2)
+            self.assertTrue(np.allclose(basis.kets[:, 0], initial_ket))
+            self.assertTrue(is_stabilizer_state(ket=basis.kets[:, 1]))
+            self.assertEqual(np.linalg.matrix_rank(basis.kets), 2)
+        # a larger initial basis loses its weakest states
+        initial_kets = np.zeros((8, 3))
+        initial_kets[[0, 3, 5], [0, 1, 2]] = 1
+        provider = VectorizedRandomWalkStabBasisProvider(target_qstate=ket_to_qstate(target_ket), stabrank=2,
+                                                         number_of_walkers=3, rng=2,
+                                                         initial_basis=Basis(kets=initial_kets))
+        provider.get_next_scores(beta=1.)
+        for walker_index in range(3):
+            self.assertTrue(np.allclose(provider.get_basis(walker_index=walker_index).kets, initial_kets[:, :2]))
+
+
+class TestRealArithmetic(unittest.TestCase):
+
+    def test_random_real_stabilizer_state(self):
+        rng = np.random.default_rng(4)
+        kets = set()
+        for _ in range(2000):
+            ket = RandomStabBasisProvider.get_random_real_stabilizer_state(number_of_qubits=2, rng=rng)
+            self.assertTrue(is_stabilizer_state(ket=ket))
+            kets.add(tuple(np.round(ket * np.sign(ket[np.argmax(np.abs(ket))]), 8)))
+        # all 24 real stabilizer states on two qubits, up to sign
+        self.assertEqual(len(kets), 24)
+
+    def test_chosen_for_real_targets(self):
+        dicke_qstate = ket_to_qstate(np.array([0, 1, 1, 0, 1, 0, 0, 0]) / np.sqrt(3))
+        provider = RandomWalkStabBasisProvider(target_qstate=dicke_qstate, stabrank=2, rng=1)
+        self.assertTrue(provider.real)
+        basis = provider.get_next_basis(move_decider=MoveDecider())
+        for _ in range(10):
+            basis = provider.get_next_basis(move_decider=MoveDecider())
+            self.assertEqual(basis.kets.dtype, np.float64)
+        self.assertAlmostEqual(basis.score(qstate=dicke_qstate),
+                               Basis(kets=basis.kets).score_ket(ket=dicke_qstate.ket))
+        vectorized_provider = VectorizedRandomWalkStabBasisProvider(target_qstate=dicke_qstate, stabrank=2,
+                                                                    number_of_walkers=3, rng=1)
+        self.assertTrue(vectorized_provider.real)
+        vectorized_provider.get_next_scores(beta=1.)
+        self.assertEqual(vectorized_provider.get_next_scores(beta=1.).dtype, np.float64)
+        self.assertTrue(vectorized_provider.get_basis(walker_index=0).is_real)
+        complex_qstate = ket_to_qstate(np.array([1, 1j]) / np.sqrt(2))
+        self.assertFalse(RandomWalkStabBasisProvider(target_qstate=complex_qstate, rng=1).real)
+        # a real target with an initial basis that is not real
+        initial_basis = Basis(kets=np.array([[1, 1, 0, 0], [1, -1j, 0, 0]]).T)
+        provider = RandomWalkStabBasisProvider(target_qstate=ket_to_qstate(np.array([1, 0, 0, 1]) / np.sqrt(2)),
+                                               stabrank=2, rng=1, initial_basis=initial_basis)
+        self.assertFalse(provider.real)
+
+
+class TestStagnationDetector(unittest.TestCase):
+
+    def test_plateau(self):
+        detector = StagnationDetector(plateau_length=3)
+        self.assertFalse(detector.update(score=0.5, accepted=True))
+        self.assertFalse(detector.update(score=0.4, accepted=True))
+        self.assertFalse(detector.update(score=0.5, accepted=True))
+        self.assertFalse(detector.update(score=0.6, accepted=True))
+        self.assertEqual(detector.steps_since_improvement, 0)
+        for __ in range(2):
+            self.assertFalse(detector.update(score=0.6, accepted=True))
+        self.assertTrue(detector.update(score=0.6, accepted=True))
+        detector.reset()
+        self.assertFalse(detector.update(score=0.6, accepted=True))
+
+    def test_acceptance_collapse(self):
+        detector = StagnationDetector(window=4, min_acceptance_rate=0.5)
+        scores = [0.1, 0.2, 0.3, 0.4, 0.5]
+        acceptances = [True, False, True, False, False]
+        outcomes = [detector.update(score=score, accepted=accepted)
+                    for score, accepted in zip(scores, acceptances)]
+        self.assertEqual(outcomes, [False, False, False, False, True])
+        self.assertEqual(detector.acceptance_rate, 0.25)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,69 @@
+import math
+import unittest
+from stabranksearcher.dicke_state_factory import get_dicke_state
+from stabranksearcher.quantum_state_tools import ket_to_qstate
+from stabranksearcher.search_result import SearchResult, FOUND, BUDGET_EXHAUSTED
+from stabranksearcher.tuning import get_annealing_grid, PilotStatistics, AnnealingTuner
+
+
+class TestTuning(unittest.TestCase):
+
+    def setUp(self):
+        self.target_qstate = ket_to_qstate(get_dicke_state(number_of_qubits=3, hamming_weight=1))
+        self.configurations = get_annealing_grid(beta_inits=[1.], beta_finals=[10., 100.],
+                                                 numbers_of_betas=[5], numbers_of_bases=[1, 300])
+
+    def test_grid(self):
+        grid = get_annealing_grid(beta_inits=[1., 20.], beta_finals=[10., 100.], numbers_of_betas=[5, 10],
+                                  numbers_of_bases=[100])
+        self.assertEqual(len(grid), 6)
+        self.assertTrue(all(configuration["beta_final"] > configuration["beta_init"] for configuration in grid))
+        self.assertEqual(grid[0], {"beta_init": 1., "beta_final": 10., "number_of_betas": 5, "number_of_bases": 100})
+
+    def test_pilot_statistics(self):
+        statistics = PilotStatistics(configuration=self.configurations[0])
+        statistics.record(SearchResult(basis=None, score=0.5, stop_reason=BUDGET_EXHAUSTED, elapsed=1.))
+        self.assertEqual(statistics.success_rate, 0.)
+        self.assertEqual(statistics.expected_time_to_solution, math.inf)
+        statistics.record(SearchResult(basis=None, score=1., stop_reason=FOUND, elapsed=3.))
+        self.assertEqual((statistics.number_of_runs, statistics.number_of_successes), (2, 1))
+        self.assertEqual(statistics.success_probability, 0.5)
+        self.assertEqual(statistics.success_rate, 0.25)
+        self.assertEqual(statistics.expected_time_to_solution, 4.)
+        self.assertEqual(statistics.mean_score, 0.75)
+        self.assertEqual(statistics.to_dict()["configuration"], self.configurations[0])
+
+    def test_run_grid(self):
+        tuner = AnnealingTuner(configurations=self.configurations, seed=1)
+        ranking = tuner.run_grid(target_qstate=self.target_qstate, stabrank=3, number_of_runs=2)
+        self.assertEqual(len(ranking), len(self.configurations))
+        self.assertTrue(all(statistics.number_of_runs == 2 for statistics in ranking))
+        sort_keys = [statistics.get_sort_key() for statistics in ranking]
+        self.assertEqual(sort_keys, sorted(sort_keys, reverse=True))
+        # a single basis per run hardly ever spans the W state
+        self.assertGreater(ranking[0].configuration["number_of_bases"], 1)
+        self.assertGreater(ranking[0].number_of_successes, 0)
+
+    def test_successive_halving(self):
+        tuner = AnnealingTuner(configurations=self.configurations, seed=2)
+        ranking = tuner.run_successive_halving(target_qstate=self.target_qstate, stabrank=3, number_of_runs=1)
+        self.assertEqual(len(ranking), 4)
+        # 4 configurations with a single run, 2 with two more, 1 with four more
+        self.assertEqual(ranking[0].number_of_runs, 7)
+        self.assertEqual(ranking[1].number_of_runs, 3)
+        self.assertEqual(sorted(statistics.number_of_runs for statistics in ranking[2:]), [1, 1])
+        with self.assertRaises(ValueError):
+            tuner.run_successive_halving(target_qstate=self.target_qstate, stabrank=3, reduction_factor=1)
+
+    def test_seed_determinism(self):
+        outcomes = []
+        for _ in range(2):
+            tuner = AnnealingTuner(configurations=self.configurations, seed=3)
+            tuner.run_grid(target_qstate=self.target_qstate, stabrank=2, number_of_runs=2)
+            # the ranking also depends on the timing, the runs themselves do not
+            outcomes.append([(statistics.number_of_successes, round(statistics.mean_score, 10))
+                             for statistics in tuner.statistics])
+        self.assertEqual(outcomes[0], outcomes[1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import os
+import sys
+import time
+import socket
+import tempfile
+import unittest
+import subprocess
+import multiprocessing
+import numpy as np
+from stabranksearcher.dicke_state_factory import get_recursive_dicke_basis
+from stabranksearcher.search_result import decode_ket
+from stabranksearcher.work_queue import (
+    WorkQueue,
+    run_worker,
+    populate_dicke_sweep,
+    run_dicke_task,
+    get_queued_dicke_basis_getter)
+
+
+def _square(task):
+    time.sleep(0.01)
+    return {"value": task["x"] ** 2}
+
+
+def _run_square_worker(directory):
+    run_worker(directory=directory, task_runner=_square, heartbeat_timeout=10., poll_interval=0.01)
+
+
+class TestWorkQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_claim_and_complete(self):
+        work_queue = WorkQueue(directory=self.directory.name)
+        task_id = work_queue.add_task({"x": 3})
+        self.assertEqual(work_queue.add_task({"x": 3}), task_id)
+        self.assertEqual(work_queue.number_pending, 1)
+        claimed_task_id, task = work_queue.claim()
+        self.assertEqual(claimed_task_id, task_id)
+        self.assertEqual(task, {"x": 3})
+        self.assertIsNone(work_queue.claim())
+        self.assertFalse(work_queue.is_finished())
+        work_queue.complete(task_id=task_id, result={"value": 9})
+        self.assertTrue(work_queue.is_finished())
+        self.assertEqual(work_queue.get_results(), {task_id: {"value": 9}})
+        # finished tasks are not added again
+        work_queue.add_task({"x": 3})
+        self.assertEqual(work_queue.number_pending, 0)
+
+    def test_requeue_stale(self):
+        work_queue = WorkQueue(directory=self.directory.name, heartbeat_timeout=60.)
+        task_id = work_queue.add_task({"x": 3})
+        work_queue.claim()
+        self.assertEqual(work_queue.requeue_stale(), 0)
+
+        # simulate a worker that stopped sending heartbeats
+        claimed_path = os.path.join(self.directory.name, WorkQueue.CLAIMED, task_id + ".json")
+        old_time = time.time() - 120.
+        os.utime(claimed_path, (old_time, old_time))
+        self.assertEqual(work_queue.requeue_stale(), 1)
+        self.assertEqual(work_queue.number_pending, 1)
+        self.assertFalse(work_queue.heartbeat(task_id=task_id))
+
+    def test_claim_of_old_task_is_not_stale(self):
+        work_queue = WorkQueue(directory=self.directory.name, heartbeat_timeout=60.)
+        task_id = work_queue.add_task({"x": 3})
+        pending_path = os.path.join(self.directory.name, WorkQueue.PENDING, task_id + ".json")
+        old_time = time.time() - 120.
+        os.utime(pending_path, (old_time, old_time))
+        # before the first heartbeat of its worker
+        work_queue.heartbeat = lambda task_id: True
+        work_queue.claim()
+        self.assertEqual(work_queue.requeue_stale(), 0)
+
+    def test_workers_do_not_import_the_search_service(self):
+        code = "import sys, stabranksearcher.work_queue; sys.exit('stabranksearcher.search_service' in sys.modules)"
+        self.assertEqual(subprocess.run([sys.executable, "-c", code]).returncode, 0)
+
+    def test_several_worker_processes(self):
+        work_queue = WorkQueue(directory=self.directory.name)
+        task_ids = [work_queue.add_task({"x": x}) for x in range(40)]
+        workers = [multiprocessing.Process(target=_run_square_worker, args=(self.directory.name,))
+                   for __ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            self.assertEqual(worker.exitcode, 0)
+        self.assertTrue(work_queue.is_finished())
+        results = work_queue.get_results()
+        self.assertEqual(sorted(results), sorted(task_ids))
+        for x, task_id in enumerate(task_ids):
+            self.assertEqual(results[task_id]["value"], x ** 2)
+
+    def test_dicke_sweep(self):
+        work_queue = WorkQueue(directory=self.directory.name)
+        task_ids = populate_dicke_sweep(work_queue=work_queue,
+                                        numbers_of_qubits=[2],
+                                        stabranks=[1, 2],
+                                        beta_schedules=[(1, 10, 2)],
+                                        number_of_bases=20,
+                                        seed=1)
+        self.assertEqual(len(task_ids), 6)
+        task = work_queue.get_task(task_ids[0])
+        self.assertEqual(task["hamming_weight"], 0)
+        result = run_dicke_task(task)
+        self.assertLessEqual(result["counter"], 2 * 20)
+        self.assertEqual(result["size"], len(result["basis"]))
+        self.assertIn(result["stop_reason"], ["found", "known", "budget_exhausted"])
+
+    def test_dicke_sweep_with_rank_descent(self):
+        work_queue = WorkQueue(directory=self.directory.name)
+        store_path = os.path.join(self.directory.name, "results-{hostname}.sqlite")
+        for number_of_qubits in [3, 4]:
+            populate_dicke_sweep(work_queue=work_queue,
+                                 numbers_of_qubits=[number_of_qubits],
+                                 hamming_weights=[1],
+                                 stabranks=[1],
+                                 beta_schedules=[(1, 100, 5)],
+                                 number_of_bases=50,
+                                 seed=1,
+                                 result_store=store_path,
+                                 rank_descent=True)
+            self.assertEqual(run_worker(directory=self.directory.name, task_runner=run_dicke_task,
+                                        poll_interval=0.01), 1)
+        results = sorted(work_queue.get_results().values(), key=lambda result: result["task"]["number_of_qubits"])
+        self.assertTrue(all(result["success"] for result in results))
+        # D(3, 1) starts from a basis of size 2; D(4, 1) from one built from that solution
+        self.assertEqual([result["size"] for result in results], [2, 2])
+        self.assertTrue(os.path.exists(store_path.format(hostname=socket.gethostname())))
+
+    def test_warm_start_from_queued_results(self):
+        work_queue = WorkQueue(directory=self.directory.name)
+        populate_dicke_sweep(work_queue=work_queue, numbers_of_qubits=[3], hamming_weights=[1],
+                             stabranks=[2], beta_schedules=[(1, 100, 5)], number_of_bases=50, seed=1)
+        run_worker(directory=self.directory.name, task_runner=run_dicke_task, poll_interval=0.01)
+        result, = work_queue.get_results().values()
+        self.assertTrue(result["success"])
+        found_kets = np.column_stack([decode_ket(encoded_ket) for encoded_ket in result["basis"]])
+        # the task for D(4, 1) builds on the solution for D(3, 1) found by the
+        # first round, without a result store
+        populate_dicke_sweep(work_queue=work_queue, numbers_of_qubits=[4], hamming_weights=[1],
+                             stabranks=[2], beta_schedules=[(1, 100, 5)], number_of_bases=50, seed=1,
+                             recursive_warm_start=True)
+        task = work_queue.get_task(work_queue.claim()[0])
+        self.assertEqual(task["queue"], self.directory.name)
+        get_known_basis = get_queued_dicke_basis_getter(work_queue=WorkQueue(directory=task["queue"]))
+        self.assertTrue(np.allclose(get_known_basis(3, 1).kets, found_kets))
+        self.assertIsNone(get_known_basis(3, 2))
+        initial_basis = get_recursive_dicke_basis(number_of_qubits=4, hamming_weight=1,
+                                                  get_known_basis=get_known_basis)
+        self.assertTrue(np.allclose(initial_basis.kets[0::2, :2], found_kets))
+        self.assertTrue(run_dicke_task(task)["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()